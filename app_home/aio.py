@@ -0,0 +1,68 @@
+# app_home/aio.py
+"""
+Tiện ích cho view async (chạy dưới ASGI, xem foodshopeight_be/asgi.py).
+
+DRF chưa hỗ trợ view async nên các endpoint chờ I/O (long-poll đơn hàng, tình trạng
+món, dashboard, kiểm tra token) là view Django thuần, xác thực JWT bằng hàm dưới đây
+và đọc DB bằng async ORM (afirst / aaggregate / async for) – không giữ thread khi chờ.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import token_revoked
+
+_jwt = JWTAuthentication()
+
+
+async def atoken_revoked(token):
+    """token_revoked() cho view async (đọc cache / DB nên chạy qua thread)."""
+    return await sync_to_async(token_revoked)(token)
+
+
+def validate_token(raw):
+    """Token (str/bytes) -> validated token, sai/hết hạn -> None. Không chạm DB."""
+    if isinstance(raw, str):
+        raw = raw.encode()
+    try:
+        return _jwt.get_validated_token(raw)
+    except (InvalidToken, TokenError):
+        return None
+
+
+async def aget_user(request):
+    """User đang đăng nhập: Bearer JWT, không có header thì dùng session (admin)."""
+    header = _jwt.get_header(request)
+    if header is None:
+        user = await request.auser()
+        return user if user.is_authenticated else None
+
+    raw = _jwt.get_raw_token(header)
+    token = validate_token(raw) if raw else None
+    if token is None or await atoken_revoked(token):
+        return None
+    lookup = {api_settings.USER_ID_FIELD: token.get(api_settings.USER_ID_CLAIM), "is_active": True}
+    return await get_user_model().objects.filter(**lookup).afirst()
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, safe=False, encoder=DjangoJSONEncoder,
+                        json_dumps_params={"ensure_ascii": False})
+
+
+def async_login_required(view):
+    """Như IsAuthenticated của DRF cho view async: thiếu/sai token -> 401."""
+    @wraps(view)
+    async def inner(request, *args, **kwargs):
+        user = await aget_user(request)
+        if user is None:
+            return json_response({"detail": "Chưa đăng nhập hoặc token không hợp lệ."}, status=401)
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return inner
@@ -4,3 +4,21 @@ from django.apps import AppConfig
 class AppHomeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app_home'
+
+    def ready(self):
+        from . import filters  # noqa: F401 – đăng ký system check cho ordering
+        from . import schema  # noqa: F401 – security scheme Bearer JWT cho drf-spectacular
+        from django.contrib.auth import get_user_model
+        from . import authentication, caching, dbstats
+        from .models import (
+            Unit, IngredientCategory, MenuCategory, Department, Position, DiningTable, AppSetting,
+        )
+
+        # version theo bảng cho ETag
+        caching.track(Unit, IngredientCategory, MenuCategory, Department, Position, DiningTable, AppSetting)
+
+        # đếm request / kết nối DB mới (xem manage.py db_connection_stats)
+        dbstats.connect_signals()
+
+        # đổi quyền / khóa tài khoản -> thu hồi JWT (claim trong token đã cũ)
+        authentication.revoke_on_change(get_user_model(), ("is_active", "is_staff", "is_superuser"))
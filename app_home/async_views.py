@@ -0,0 +1,46 @@
+# app_home/async_views.py
+"""
+Kiểm tra token cho gateway / thiết bị POS (chạy dưới ASGI).
+
+GET  /api/app-home/token/check/   (Authorization: Bearer <access>)
+POST /api/app-home/token/check/   {"token": "<access>"}
+Hợp lệ -> 200 {"valid": true, "user": {...}, "exp": ...}; sai/hết hạn/đã thu hồi/user bị khóa -> 401.
+"""
+import json
+
+from django.contrib.auth import get_user_model
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+from rest_framework_simplejwt.settings import api_settings
+
+from .aio import atoken_revoked, json_response, validate_token
+
+
+def _raw_token(request):
+    if request.method == "POST":
+        try:
+            return (json.loads(request.body or b"{}") or {}).get("token")
+        except (ValueError, AttributeError):
+            return None
+    header = request.META.get("HTTP_AUTHORIZATION", "").split()
+    if len(header) == 2 and header[0] in api_settings.AUTH_HEADER_TYPES:
+        return header[1]
+    return None
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+async def token_check(request):
+    raw = _raw_token(request)
+    token = validate_token(raw) if raw else None
+    if token is None:
+        return json_response({"valid": False, "detail": "Token không hợp lệ hoặc đã hết hạn."}, status=401)
+    if await atoken_revoked(token):
+        return json_response({"valid": False, "detail": "Phiên đăng nhập đã bị thu hồi, vui lòng đăng nhập lại."},
+                             status=401)
+
+    lookup = {api_settings.USER_ID_FIELD: token.get(api_settings.USER_ID_CLAIM), "is_active": True}
+    user = await get_user_model().objects.filter(**lookup).values("id", "username", "is_staff").afirst()
+    if user is None:
+        return json_response({"valid": False, "detail": "Tài khoản không tồn tại hoặc đã bị khóa."}, status=401)
+    return json_response({"valid": True, "user": user, "exp": token.get("exp")})
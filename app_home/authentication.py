@@ -0,0 +1,181 @@
+# app_home/authentication.py
+"""
+Xác thực JWT không truy vấn DB (REST_FRAMEWORK.DEFAULT_AUTHENTICATION_CLASSES).
+
+- Claim quyền nằm sẵn trong token (CustomTokenObtainPairSerializer.get_token):
+      user_id, username, is_staff, is_superuser, staff_id, positions, department
+  request.user là StaffTokenUser dựng từ token, không SELECT bảng auth_user mỗi request.
+- Thu hồi: token phát hành trước thời điểm thu hồi của user bị từ chối.
+    + revoke(user_id): ghi thời điểm (ms) vào key riêng của user "jwt:revoked:<id>" trong
+      cache dùng chung (CACHE_URL – locmem thì worker khác không thấy, xem check W004),
+      giữ bằng REFRESH_TOKEN_LIFETIME (lâu hơn thì token cũ đã hết hạn).
+    + So theo claim iat_ms (ms, CustomTokenObtainPairSerializer) thay cho iat tính bằng giây:
+      token phát hành ngay sau revoke trong cùng giây vẫn hợp lệ.
+    + user is_active=False trong DB: từ chối mọi token.
+  Mỗi process nhớ kết quả theo user và danh sách user bị khóa JWT_REVOCATION_TTL giây
+  (mặc định 30) -> không phải 1 lượt cache / query mỗi request.
+- View async (app_home.aio, /token/check/) gọi cùng token_revoked().
+- Đổi quyền (is_active/is_staff/is_superuser, chức danh, phòng ban, trạng thái nhân sự)
+  tự revoke qua revoke_on_change() đăng ký trong AppConfig.ready(): client đăng nhập
+  lại để nhận claim mới.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import checks
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_delete, pre_save
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+REVOKED_CACHE_KEY = "jwt:revoked:{user_id}"
+ISSUED_AT_MS_CLAIM = "iat_ms"
+
+# user_id -> (revoked_at_ms, monotonic lúc đọc cache); danh sách user bị khóa trong DB
+_local = {"users": {}, "inactive": frozenset(), "loaded_at": -math.inf}
+
+
+class StaffTokenUser(TokenUser):
+    """User dựng từ claim của token (SIMPLE_JWT.TOKEN_USER_CLASS)."""
+
+    @cached_property
+    def staff_id(self):
+        return self.token.get("staff_id")
+
+    @cached_property
+    def positions(self):
+        return list(self.token.get("positions") or ())
+
+    @cached_property
+    def department(self):
+        return self.token.get("department")
+
+
+# -------------------- THU HỒI --------------------
+def _keep_seconds():
+    return int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+
+
+def invalidate(user_id=None):
+    """Buộc process này đọc lại trạng thái thu hồi (của 1 user, hoặc tất cả) ở request kế tiếp."""
+    if user_id is None:
+        _local["users"] = {}
+        _local["loaded_at"] = -math.inf
+    else:
+        _local["users"].pop(str(user_id), None)
+
+
+def revoke(user_id, at=None):
+    """Từ chối mọi token của user phát hành tới thời điểm `at` (giây epoch, mặc định: bây giờ)."""
+    at_ms = int((at if at is not None else time.time()) * 1000)
+    # 1 key / user: các lần revoke đồng thời của user khác nhau không ghi đè lẫn nhau
+    key = REVOKED_CACHE_KEY.format(user_id=user_id)
+    if at_ms > (cache.get(key) or 0):
+        cache.set(key, at_ms, _keep_seconds())
+    invalidate(user_id)
+
+
+def _ttl():
+    return getattr(settings, "JWT_REVOCATION_TTL", 30)
+
+
+def _inactive():
+    if time.monotonic() - _local["loaded_at"] > _ttl():
+        _local["inactive"] = frozenset(
+            str(pk) for pk in get_user_model().objects.filter(is_active=False).values_list("pk", flat=True)
+        )
+        _local["loaded_at"] = time.monotonic()
+    return _local["inactive"]
+
+
+def _revoked_at(user_id):
+    cached = _local["users"].get(user_id)
+    if cached is None or time.monotonic() - cached[1] > _ttl():
+        cached = (cache.get(REVOKED_CACHE_KEY.format(user_id=user_id)) or 0, time.monotonic())
+        _local["users"][user_id] = cached
+    return cached[0]
+
+
+def issued_at_ms(token):
+    """Thời điểm phát hành (ms) của token; token cũ chỉ có iat (giây) -> đầu giây đó."""
+    value = token.get(ISSUED_AT_MS_CLAIM)
+    if value is not None:
+        return int(value)
+    iat = token.get("iat")
+    return None if iat is None else int(iat) * 1000
+
+
+def is_revoked(user_id, issued_ms):
+    user_id = str(user_id)
+    if user_id in _inactive():
+        return True
+    revoked_ms = _revoked_at(user_id)
+    if not revoked_ms:
+        return False
+    return issued_ms is None or issued_ms <= revoked_ms
+
+
+def token_revoked(token):
+    return is_revoked(token.get(api_settings.USER_ID_CLAIM), issued_at_ms(token))
+
+
+def revoke_on_change(model, fields, user_field="pk"):
+    """
+    Thu hồi token của user liên quan khi các field quyền của model đổi hoặc bản ghi bị xoá.
+    user_field: field trỏ tới user ("pk" cho chính model User, "user_id" cho StaffProfile).
+    """
+    label = model._meta.label_lower
+
+    def _schedule(*user_ids):
+        for user_id in {uid for uid in user_ids if uid is not None}:
+            transaction.on_commit(lambda uid=user_id: revoke(uid))
+
+    def on_save(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        current = getattr(instance, user_field)
+        if instance.pk is None:
+            # hồ sơ mới gắn vào user đã có -> token cũ thiếu claim staff_id/positions
+            if user_field != "pk":
+                _schedule(current)
+            return
+        old = sender.objects.filter(pk=instance.pk).values(*fields, user_field).first()
+        if old is None:
+            return
+        if old[user_field] != current or any(old[name] != getattr(instance, name) for name in fields):
+            _schedule(old[user_field], current)
+
+    def on_delete(sender, instance, **kwargs):
+        _schedule(getattr(instance, user_field))
+
+    pre_save.connect(on_save, sender=model, weak=False, dispatch_uid=f"jwt_revoke_save_{label}")
+    post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=f"jwt_revoke_delete_{label}")
+
+
+# -------------------- DRF --------------------
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if token_revoked(validated_token):
+            raise AuthenticationFailed("Phiên đăng nhập đã bị thu hồi, vui lòng đăng nhập lại.", code="token_revoked")
+        return user
+
+
+# -------------------- SYSTEM CHECK: cache thu hồi phải dùng chung giữa worker --------------------
+@checks.register()
+def check_revocation_cache(app_configs=None, **kwargs):
+    if settings.DEBUG or not isinstance(cache, LocMemCache):
+        return []
+    return [checks.Warning(
+        "CACHES['default'] là locmem: revoke() chỉ có hiệu lực trong process gọi nó, "
+        "token đã thu hồi vẫn được các worker khác chấp nhận.",
+        hint="Đặt CACHE_URL trỏ redis/memcached dùng chung cho mọi worker.",
+        id="app_home.W004",
+    )]
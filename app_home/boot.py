@@ -0,0 +1,58 @@
+# app_home/boot.py
+"""
+Dữ liệu danh mục client cần khi khởi động (đơn vị, danh mục, phòng ban, chức danh, bàn,
+thiết lập) – trả kèm response đăng nhập để app chỉ cần 1 round-trip.
+
+Bộ dữ liệu được cache theo version các bảng (app_home.caching.table_state): trong lúc
+không ai sửa danh mục, mỗi lần đăng nhập chỉ tốn 1 query đọc version. Client gửi lại
+reference_version đã có -> không trả lại dữ liệu.
+"""
+import hashlib
+
+from django.core.cache import cache
+
+from .caching import table_state
+from .models import AppSetting, Department, DiningTable, IngredientCategory, MenuCategory, Position, Unit
+from .serializers import (
+    AppSettingSerializer, DepartmentSerializer, DiningTableSerializer, IngredientCategorySerializer,
+    MenuCategorySerializer, PositionSerializer, UnitSerializer,
+)
+
+REFERENCE_SERIALIZERS = {
+    "units": UnitSerializer,
+    "ingredient_categories": IngredientCategorySerializer,
+    "menu_categories": MenuCategorySerializer,
+    "departments": DepartmentSerializer,
+    "positions": PositionSerializer,
+    "dining_tables": DiningTableSerializer,
+    "app_settings": AppSettingSerializer,
+}
+REFERENCE_MODELS = (Unit, IngredientCategory, MenuCategory, Department, Position, DiningTable, AppSetting)
+CACHE_SECONDS = 24 * 3600
+
+
+def reference_version():
+    versions, _ = table_state(REFERENCE_MODELS)
+    return hashlib.md5(",".join(map(str, versions)).encode()).hexdigest()[:16]
+
+
+def _build():
+    data = {}
+    for key, serializer_class in REFERENCE_SERIALIZERS.items():
+        model = serializer_class.Meta.model
+        queryset = serializer_class.optimize_queryset(model.objects.order_by("pk"), set(serializer_class.Meta.fields))
+        data[key] = serializer_class(queryset, many=True).data
+    return data
+
+
+def reference_bundle(known_version=None):
+    """(version, dữ liệu) – dữ liệu None nếu client đã có đúng version."""
+    version = reference_version()
+    if known_version == version:
+        return version, None
+    key = f"boot:reference:{version}"
+    data = cache.get(key)
+    if data is None:
+        data = _build()
+        cache.set(key, data, CACHE_SECONDS)
+    return version, data
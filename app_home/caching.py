@@ -0,0 +1,162 @@
+# app_home/caching.py
+"""
+Conditional GET (ETag) cho các ModelViewSet.
+
+- Mỗi bảng được theo dõi có 1 dòng TableVersion, tăng version khi save/delete
+  (đăng ký trong AppConfig.ready(): caching.track(MenuItem, RecipeItem)).
+  Ghi hàng loạt không phát post_save (bulk_update, queryset.update) -> gọi bump(Model).
+  Version chỉ tăng sau khi transaction commit (on_commit): dòng TableVersion nóng
+  không bị khoá suốt transaction ghi, các checkout song song không phải xếp hàng.
+- ConditionalGetMixin khai báo các bảng mà response phụ thuộc (kể cả bảng lồng):
+      cache_tables = (InventoryLot, Ingredient, Supplier)
+  ETag = hash(đường dẫn + query string + Accept(-Language) + version các bảng).
+  Khớp If-None-Match -> 304, không chạy queryset/serializer.
+  Không gửi Last-Modified: HTTP date chỉ tới giây, 2 lần ghi trong cùng 1 giây thì
+  client chỉ gửi If-Modified-Since sẽ nhận 304 cũ; version thì luôn tăng.
+"""
+import hashlib
+
+from django.core import checks
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+from .models import TableVersion
+
+_tracked = set()
+_conditional_viewsets = []
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+# -------------------- VERSION THEO BẢNG --------------------
+def bump(*models):
+    """Tăng version sau commit (ngoài transaction thì chạy ngay); rollback -> không tăng."""
+    labels = [_label(model) for model in models]
+    transaction.on_commit(lambda: _bump_labels(labels))
+
+
+def _bump_labels(labels):
+    now = timezone.now()
+    for label in labels:
+        updated = TableVersion.objects.filter(table=label).update(version=F("version") + 1, updated_at=now)
+        if not updated:
+            obj, created = TableVersion.objects.get_or_create(
+                table=label, defaults={"version": 1, "updated_at": now}
+            )
+            if not created:
+                TableVersion.objects.filter(pk=obj.pk).update(version=F("version") + 1, updated_at=now)
+
+
+def _on_write(sender, raw=False, **kwargs):
+    if not raw:
+        bump(sender)
+
+
+def track(*models):
+    for model in models:
+        label = _label(model)
+        _tracked.add(label)
+        post_save.connect(_on_write, sender=model, dispatch_uid=f"table_version_save_{label}")
+        post_delete.connect(_on_write, sender=model, dispatch_uid=f"table_version_delete_{label}")
+
+
+def table_state(models):
+    """(danh sách version theo thứ tự models, thời điểm ghi gần nhất) – 1 query."""
+    labels = [_label(m) for m in models]
+    rows = dict(
+        (table, (version, updated_at))
+        for table, version, updated_at in TableVersion.objects.filter(table__in=labels)
+        .values_list("table", "version", "updated_at")
+    )
+    return _state(labels, rows)
+
+
+async def atable_state(models):
+    """Bản async của table_state() cho view ASGI (long-poll)."""
+    labels = [_label(m) for m in models]
+    rows = {
+        table: (version, updated_at)
+        async for table, version, updated_at in TableVersion.objects.filter(table__in=labels)
+        .values_list("table", "version", "updated_at")
+    }
+    return _state(labels, rows)
+
+
+def _state(labels, rows):
+    versions = [rows.get(label, (0, None))[0] for label in labels]
+    stamps = [stamp for _, stamp in rows.values() if stamp is not None]
+    return versions, max(stamps) if stamps else None
+
+
+# -------------------- VIEWSET --------------------
+class ConditionalGetMixin:
+    cache_tables = ()
+    conditional_actions = ("list", "retrieve")
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.cache_tables:
+            _conditional_viewsets.append(cls)
+
+    def get_cache_tables(self):
+        if self.cache_tables:
+            return self.cache_tables
+        return (self.get_serializer_class().Meta.model,)
+
+    def get_etag(self, request):
+        versions, _ = table_state(self.get_cache_tables())
+        raw = "|".join([
+            request.get_full_path(),
+            request.META.get("HTTP_ACCEPT", ""),
+            request.META.get("HTTP_ACCEPT_LANGUAGE", ""),
+            ",".join(map(str, versions)),
+        ])
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        response = get_conditional_response(request._request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            # luôn hỏi lại server; response theo user đăng nhập nên không cho proxy dùng chung
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ("Accept", "Authorization"))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if "list" not in self.conditional_actions:
+            return super().list(request, *args, **kwargs)
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        if "retrieve" not in self.conditional_actions:
+            return super().retrieve(request, *args, **kwargs)
+        return self._conditional(super().retrieve, request, *args, **kwargs)
+
+
+# -------------------- SYSTEM CHECK: bảng phụ thuộc phải được track --------------------
+@checks.register()
+def check_tracked_tables(app_configs=None, **kwargs):
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+
+    errors = []
+    for viewset in _conditional_viewsets:
+        for model in viewset.cache_tables:
+            if _label(model) not in _tracked:
+                errors.append(checks.Error(
+                    f"{viewset.__name__}: bảng {model._meta.label} chưa được caching.track() "
+                    f"nên ETag sẽ không đổi khi dữ liệu đổi.",
+                    hint="Gọi caching.track(Model) trong AppConfig.ready() của app chứa model.",
+                    obj=viewset,
+                    id="app_home.E002",
+                ))
+    return errors
@@ -0,0 +1,123 @@
+# app_home/dbstats.py
+"""
+Theo dõi việc tái sử dụng kết nối DB.
+
+- Đếm request và số kết nối DB mới mở (signal connection_created) theo alias,
+  cộng dồn trong process rồi đẩy vào cache mỗi FLUSH_EVERY request / FLUSH_SECONDS giây
+  (cache dùng chung giữa các worker -> cần CACHE_URL trỏ redis/memcached).
+- Pool của foodshopeight_be.db.mysql_pool được đẩy kèm (created / reused / discarded).
+- System check cảnh báo cấu hình khiến mỗi request phải handshake lại MySQL.
+Xem: python manage.py db_connection_stats
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+
+from foodshopeight_be.db.pool import all_pools
+
+CACHE_PREFIX = "dbstats:"
+FLUSH_EVERY = 200
+FLUSH_SECONDS = 30
+POOL_ENGINE = "foodshopeight_be.db.mysql_pool"
+
+_pending = Counter()
+_pool_seen = {}
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+# -------------------- ĐẾM --------------------
+def _on_request_started(**kwargs):
+    # signal chạy trên nhiều thread (ASGI / gthread) -> đếm và đọc dưới cùng lock với flush()
+    with _lock:
+        _pending["requests"] += 1
+        due = _pending["requests"] >= FLUSH_EVERY or time.monotonic() - _last_flush > FLUSH_SECONDS
+    if due:
+        flush()
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    with _lock:
+        _pending[f"connections:{connection.alias}"] += 1
+
+
+def flush():
+    global _last_flush
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        for alias, pool in all_pools().items():
+            for key, value in pool.stats.items():
+                name = f"pool:{alias}:{key}"
+                delta = value - _pool_seen.get(name, 0)
+                if delta:
+                    pending[name] = pending.get(name, 0) + delta
+                    _pool_seen[name] = value
+        _last_flush = time.monotonic()
+
+    keys = {CACHE_PREFIX + name: delta for name, delta in pending.items() if delta}
+    for key, delta in keys.items():
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.set(key, delta, None)
+    if keys:
+        names = set(cache.get(CACHE_PREFIX + "keys") or ()) | set(keys)
+        cache.set(CACHE_PREFIX + "keys", sorted(names), None)
+
+
+def read():
+    """{tên: giá trị} đã cộng dồn từ mọi worker."""
+    names = cache.get(CACHE_PREFIX + "keys") or ()
+    values = cache.get_many(names)
+    return {name[len(CACHE_PREFIX):]: value for name, value in values.items()}
+
+
+def reset():
+    names = cache.get(CACHE_PREFIX + "keys") or ()
+    cache.delete_many(list(names) + [CACHE_PREFIX + "keys"])
+
+
+def connect_signals():
+    request_started.connect(_on_request_started, dispatch_uid="dbstats_request_started")
+    connection_created.connect(_on_connection_created, dispatch_uid="dbstats_connection_created")
+
+
+# -------------------- SYSTEM CHECK: cấu hình kết nối --------------------
+@checks.register()
+def check_persistent_connections(app_configs=None, **kwargs):
+    warnings = []
+    for alias, db in settings.DATABASES.items():
+        engine = db.get("ENGINE", "")
+        if "mysql" not in engine:
+            continue
+        max_age = db.get("CONN_MAX_AGE", 0)
+        pooled = engine == POOL_ENGINE
+        if not pooled and max_age == 0:
+            warnings.append(checks.Warning(
+                f"DATABASES['{alias}']: CONN_MAX_AGE=0 và không dùng pool -> mỗi request mở kết nối MySQL mới.",
+                hint="Đặt CONN_MAX_AGE (vd. 300) cho WSGI, hoặc ENGINE foodshopeight_be.db.mysql_pool cho ASGI.",
+                id="app_home.W001",
+            ))
+        if not pooled and max_age != 0 and not db.get("CONN_HEALTH_CHECKS"):
+            warnings.append(checks.Warning(
+                f"DATABASES['{alias}']: kết nối bền nhưng CONN_HEALTH_CHECKS=False -> "
+                f"request đầu sau khi MySQL đóng kết nối (wait_timeout) sẽ lỗi.",
+                hint="Đặt CONN_HEALTH_CHECKS=True.",
+                id="app_home.W002",
+            ))
+        if pooled and max_age != 0:
+            warnings.append(checks.Warning(
+                f"DATABASES['{alias}']: dùng pool nhưng CONN_MAX_AGE={max_age} -> kết nối bị giữ theo thread, "
+                f"không được trả về pool sau request.",
+                hint="Đặt CONN_MAX_AGE=0 khi dùng foodshopeight_be.db.mysql_pool.",
+                id="app_home.W003",
+            ))
+    return warnings
@@ -4,7 +4,11 @@ from .serializers import *
 def custom_token_obtain_pair_view_schema():
     return extend_schema(
         summary="Đăng nhập và nhận JWT token",
-        description="API này cho phép người dùng đăng nhập và nhận JWT token.",
+        description=(
+            "API này cho phép người dùng đăng nhập và nhận JWT token, kèm thông tin nhân sự "
+            "và danh mục khởi động (units, categories, departments, positions, dining_tables, "
+            "app_settings). Gửi kèm `reference_version` đã lưu -> `reference` = null nếu danh mục chưa đổi."
+        ),
         responses={
             200: {
                 "type": "object",
@@ -17,6 +21,11 @@ def custom_token_obtain_pair_view_schema():
                         "type": "string",
                         "example": "eyJ0eXAiOiJKV1QiLCJhbGciOiJIUzI1NiJ9...",
                     },
+                    "user": {"type": "object"},
+                    "staff": {"type": "object", "nullable": True},
+                    "positions": {"type": "array", "items": {"type": "object"}},
+                    "reference_version": {"type": "string", "example": "3f2a9c1d0b7e4a55"},
+                    "reference": {"type": "object", "nullable": True},
                 },
                 "description": "Đăng nhập thành công",
             },
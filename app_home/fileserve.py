@@ -0,0 +1,117 @@
+# app_home/fileserve.py
+"""
+Phục vụ file media (ảnh món, ảnh nhân sự) và static khi chưa có CDN.
+
+- MEDIA_ACCEL_REDIRECT (vd. "/protected-media/") -> chỉ trả header X-Accel-Redirect,
+  nginx tự gửi file (location internal alias tới MEDIA_ROOT), worker Python không đọc file:
+      location /protected-media/ { internal; alias /srv/foodshopeight/media/; }
+- Không cấu hình -> FileResponse (gunicorn dùng wsgi.file_wrapper = sendfile).
+- File biến thể có hash trong tên (app_home.images) -> Cache-Control immutable 1 năm,
+  file khác -> MEDIA_CACHE_SECONDS + Last-Modified để trình duyệt hỏi lại bằng 304.
+- Static: chọn bản .br/.gz do collectstatic nén sẵn (app_home.staticstorage) theo
+  Accept-Encoding; tên có hash manifest -> immutable 1 năm, lần tải sau không cần request.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from .images import HASHED_NAME
+
+IMMUTABLE_SECONDS = 365 * 24 * 3600
+STATIC_CACHE_SECONDS = 3600
+# tên do ManifestStaticFilesStorage sinh: base.5af66c1b1797.css
+MANIFEST_HASHED_NAME = re.compile(r"\.[0-9a-f]{12}\.[^./]+$")
+# ưu tiên brotli (nhỏ hơn gzip ~15-20% với css/js)
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _resolve(root, path):
+    try:
+        fullpath = safe_join(root, path)
+    except SuspiciousFileOperation as exc:
+        raise Http404("File không tồn tại") from exc
+    if not os.path.isfile(fullpath):
+        raise Http404("File không tồn tại")
+    return fullpath
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _not_modified(request, stat):
+    return not was_modified_since(request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime)
+
+
+@require_safe
+def serve_media(request, path):
+    fullpath = _resolve(settings.MEDIA_ROOT, path)
+    stat = os.stat(fullpath)
+    if _not_modified(request, stat):
+        response = HttpResponseNotModified()
+    else:
+        content_type, encoding = mimetypes.guess_type(fullpath)
+        content_type = content_type or "application/octet-stream"
+        accel = getattr(settings, "MEDIA_ACCEL_REDIRECT", "")
+        if accel:
+            response = HttpResponse(content_type=content_type)
+            response["X-Accel-Redirect"] = accel.rstrip("/") + "/" + quote(path)
+        else:
+            response = FileResponse(open(fullpath, "rb"), content_type=content_type)
+        if encoding:
+            response["Content-Encoding"] = encoding
+
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    if HASHED_NAME.search(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_SECONDS, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=getattr(settings, "MEDIA_CACHE_SECONDS", 3600))
+    return response
+
+
+@require_safe
+def serve_static(request, path):
+    fullpath = _resolve(settings.STATIC_ROOT, path)
+    stat = os.stat(fullpath)
+    if _not_modified(request, stat):
+        response = HttpResponseNotModified()
+    else:
+        content_type, _ = mimetypes.guess_type(fullpath)
+        accepted = _accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        for coding, suffix in PRECOMPRESSED:
+            if coding in accepted and os.path.isfile(fullpath + suffix):
+                response = FileResponse(open(fullpath + suffix, "rb"),
+                                        content_type=content_type or "application/octet-stream")
+                response["Content-Encoding"] = coding
+                break
+        else:
+            response = FileResponse(open(fullpath, "rb"), content_type=content_type or "application/octet-stream")
+
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if MANIFEST_HASHED_NAME.search(path):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_SECONDS, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=STATIC_CACHE_SECONDS)
+    return response
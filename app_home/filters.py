@@ -0,0 +1,342 @@
+# app_home/filters.py
+"""
+Thành phần lọc / sắp xếp dùng chung cho các CommonViewSet.
+
+Lọc (?category=1&available=true&date_from=2025-01-01):
+- Mỗi viewset khai báo query_filters theo thứ tự cột của composite index, ví dụ
+      query_filters = {
+          "category": IntegerFilter("category_id"),
+          "is_active": BooleanFilter("is_active"),
+          "date_from": DateFilter("start_date", "gte"),
+      }
+- DeclarativeFilterBackend kiểm tra kiểu (sai -> 400 kèm lỗi từng tham số),
+  bỏ qua tham số rỗng, và dựng "query plan" (thứ tự lookup) cho từng tổ hợp
+  tham số; plan được cache nên cùng tổ hợp luôn sinh cùng 1 câu SQL.
+- Lọc không quy về 1 lookup (vd. theo khung giờ bán): method="tên_hàm" trên viewset,
+  backend gọi view.tên_hàm(queryset, giá_trị_đã_parse) sau các lookup thường:
+      "sellable_now": BooleanFilter(None, method="filter_sellable_now")
+
+Sắp xếp (?ordering=a,-b):
+- Mỗi viewset khai báo các key được phép và cột thực tế tương ứng, ví dụ
+      ordering_fields = {"name": ("name",), "category": ("category", "name")}
+      default_ordering = ("category",)
+- Key lạ -> 400 thay vì 500 của order_by.
+- Luôn nối thêm khoá duy nhất (pk) để phân trang ổn định.
+- Cột đầu của mỗi key phải có index (kiểm tra bằng system check app_home.E001).
+
+Sparse fieldsets (?fields=id,name / ?omit=ingredient_detail):
+- SparseFieldsMixin.optimize_queryset(qs) gọi Serializer.optimize_queryset() với tập
+  field được trả về -> field bị bỏ thì join / prefetch / annotate tương ứng cũng bị bỏ.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+from django.core import checks
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .serializers import requested_field_names
+
+_ordering_viewsets = []
+
+
+class OrderingMixin:
+    ordering_param = "ordering"
+    ordering_fields = {}
+    default_ordering = ()
+    ordering_tiebreaker = "pk"
+    # Bảng rất nhỏ (vd. AppSetting 1 dòng) có thể bỏ qua yêu cầu index
+    ordering_allow_unindexed = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.ordering_fields:
+            _ordering_viewsets.append(cls)
+
+    def get_ordering_keys(self):
+        raw = self.request.query_params.get(self.ordering_param) if self.request else None
+        if not raw:
+            return list(self.default_ordering)
+        keys = [k.strip() for k in raw.split(",") if k.strip()]
+        invalid = [k for k in keys if k.lstrip("-") not in self.ordering_fields]
+        if invalid:
+            raise ValidationError({
+                self.ordering_param: (
+                    f"Không hỗ trợ sắp xếp theo: {', '.join(invalid)}. "
+                    f"Cho phép: {', '.join(self.ordering_fields)}"
+                )
+            })
+        return keys or list(self.default_ordering)
+
+    def get_ordering_columns(self):
+        columns = []
+        for key in self.get_ordering_keys():
+            desc = key.startswith("-")
+            for column in self.ordering_fields[key.lstrip("-")]:
+                if column not in columns and f"-{column}" not in columns:
+                    columns.append(f"-{column}" if desc else column)
+        bare = {c.lstrip("-") for c in columns}
+        if self.ordering_tiebreaker and not bare & {"pk", "id", self.ordering_tiebreaker}:
+            columns.append(self.ordering_tiebreaker)
+        return columns
+
+    def order_queryset(self, qs):
+        return qs.order_by(*self.get_ordering_columns())
+
+
+class SparseFieldsMixin:
+    fields_param = "fields"
+    omit_param = "omit"
+
+    def get_requested_fields(self):
+        return requested_field_names(self.get_serializer_class(), self.request)
+
+    def optimize_queryset(self, qs):
+        serializer_class = self.get_serializer_class()
+        optimize = getattr(serializer_class, "optimize_queryset", None)
+        if optimize is None:
+            return qs
+        return optimize(qs, self.get_requested_fields())
+
+
+# -------------------- LỌC KHAI BÁO --------------------
+class QueryFilter:
+    """1 tham số query -> 1 lookup ORM. Lớp con override parse() để ép kiểu."""
+    schema_type = "string"
+
+    def __init__(self, field, lookup="exact", help_text="", method=None):
+        self.field = field
+        self.lookup = lookup
+        self.help_text = help_text
+        self.method = method
+
+    @property
+    def orm_lookup(self):
+        return self.field if self.lookup == "exact" else f"{self.field}__{self.lookup}"
+
+    def is_noop(self, raw):
+        return raw is None or str(raw).strip() == ""
+
+    def parse(self, raw):
+        return str(raw).strip()
+
+
+class CharFilter(QueryFilter):
+    pass
+
+
+class IntegerFilter(QueryFilter):
+    schema_type = "integer"
+
+    def parse(self, raw):
+        try:
+            value = int(str(raw).strip())
+        except ValueError:
+            raise ValueError("Phải là số nguyên")
+        if value < 0:
+            raise ValueError("Phải >= 0")
+        return value
+
+
+class DecimalFilter(QueryFilter):
+    schema_type = "number"
+
+    def parse(self, raw):
+        try:
+            value = Decimal(str(raw).strip())
+        except InvalidOperation:
+            raise ValueError("Phải là số")
+        if not value.is_finite():
+            raise ValueError("Phải là số")
+        return value
+
+
+class DateFilter(QueryFilter):
+    schema_type = "string"
+
+    def parse(self, raw):
+        try:
+            value = parse_date(str(raw).strip())
+        except ValueError:
+            value = None
+        if value is None:
+            raise ValueError("Ngày không hợp lệ (YYYY-MM-DD)")
+        return value
+
+
+class DayBoundaryFilter(DateFilter):
+    """
+    Ngày -> mốc giờ địa phương trên cột DateTime, vẫn dùng được index của cột:
+    upper=False: field >= đầu ngày; upper=True: field < đầu ngày hôm sau.
+    """
+
+    def __init__(self, field, upper=False, help_text=""):
+        super().__init__(field, "lt" if upper else "gte", help_text)
+        self.upper = upper
+
+    def parse(self, raw):
+        day = super().parse(raw)
+        if self.upper:
+            day += timedelta(days=1)
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class BooleanFilter(QueryFilter):
+    schema_type = "boolean"
+    TRUE_VALUES = ("1", "true", "t", "yes", "y")
+    FALSE_VALUES = ("0", "false", "f", "no", "n")
+
+    def parse(self, raw):
+        value = str(raw).strip().lower()
+        if value in self.TRUE_VALUES:
+            return True
+        if value in self.FALSE_VALUES:
+            return False
+        raise ValueError("Chỉ nhận true/false")
+
+
+class ChoiceFilter(QueryFilter):
+    def __init__(self, field, choices, lookup="exact", help_text="", method=None):
+        super().__init__(field, lookup, help_text, method)
+        self.choices = [value for value, _ in choices]
+
+    def parse(self, raw):
+        value = str(raw).strip()
+        if value not in self.choices:
+            raise ValueError(f"Chỉ nhận: {', '.join(self.choices)}")
+        return value
+
+
+def query_param(params, name, flt, default=None):
+    """
+    Đọc 1 tham số ngoài queryset (vd. khoảng ngày của action tổng hợp) bằng cùng
+    QueryFilter: rỗng -> default, sai kiểu -> 400 như DeclarativeFilterBackend.
+    """
+    raw = params.get(name)
+    if flt.is_noop(raw):
+        return default
+    try:
+        return flt.parse(raw)
+    except ValueError as exc:
+        raise ValidationError({name: str(exc)})
+
+
+@lru_cache(maxsize=512)
+def _query_plan(view_cls, active_params):
+    """
+    Plan cho 1 tổ hợp tham số: danh sách (param, orm_lookup) theo thứ tự khai báo
+    trong query_filters (= thứ tự cột index), không phụ thuộc thứ tự trên URL.
+    """
+    filters = view_cls.query_filters
+    return tuple((param, filters[param].orm_lookup) for param in filters if param in active_params)
+
+
+class DeclarativeFilterBackend(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        filters = getattr(view, "query_filters", None)
+        if not filters:
+            return queryset
+
+        params = request.query_params
+        values, errors = {}, {}
+        for param, flt in filters.items():
+            raw = params.get(param)
+            if flt.is_noop(raw):
+                continue
+            try:
+                values[param] = flt.parse(raw)
+            except ValueError as exc:
+                errors[param] = str(exc)
+        if errors:
+            raise ValidationError(errors)
+        if not values:
+            return queryset
+
+        plan = _query_plan(type(view), frozenset(p for p in values if filters[p].method is None))
+        if plan:
+            queryset = queryset.filter(**{lookup: values[param] for param, lookup in plan})
+        for param, flt in filters.items():
+            if flt.method is not None and param in values:
+                queryset = getattr(view, flt.method)(queryset, values[param])
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        sparse = [
+            {
+                "name": name,
+                "required": False,
+                "in": "query",
+                "description": description,
+                "schema": {"type": "string"},
+            }
+            for name, description in (
+                (getattr(view, "fields_param", None), "Chỉ trả về các field này (phân tách bằng dấu phẩy)"),
+                (getattr(view, "omit_param", None), "Bỏ các field này (phân tách bằng dấu phẩy)"),
+            )
+            if name
+        ]
+        return sparse + [
+            {
+                "name": param,
+                "required": False,
+                "in": "query",
+                "description": flt.help_text,
+                "schema": {"type": flt.schema_type, **({"format": "date"} if isinstance(flt, DateFilter) else {})},
+            }
+            for param, flt in (getattr(view, "query_filters", None) or {}).items()
+        ]
+
+
+# -------------------- SYSTEM CHECK: cột sắp xếp phải có index --------------------
+def _leading_indexed_columns(model):
+    opts = model._meta
+    indexed = {"pk", opts.pk.name, opts.pk.attname}
+    for field in opts.concrete_fields:
+        if field.primary_key or field.unique or field.db_index:
+            indexed.update({field.name, field.attname})
+    for index in opts.indexes:
+        if index.fields:
+            indexed.add(index.fields[0].lstrip("-"))
+    for constraint in opts.constraints:
+        fields = getattr(constraint, "fields", None)
+        if fields:
+            indexed.add(fields[0])
+    for together in opts.unique_together:
+        indexed.add(together[0])
+    return indexed
+
+
+def _queryset_model(viewset):
+    queryset = getattr(viewset, "queryset", None)
+    if queryset is not None:
+        return queryset.model
+    serializer_class = getattr(viewset, "serializer_class", None)
+    meta = getattr(serializer_class, "Meta", None)
+    return getattr(meta, "model", None)
+
+
+@checks.register()
+def check_ordering_indexes(app_configs=None, **kwargs):
+    # import urlconf để mọi viewset được nạp trước khi kiểm tra
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+
+    errors = []
+    for viewset in _ordering_viewsets:
+        model = _queryset_model(viewset)
+        if model is None or viewset.ordering_allow_unindexed:
+            continue
+        indexed = _leading_indexed_columns(model)
+        for key, columns in viewset.ordering_fields.items():
+            if columns[0] not in indexed:
+                errors.append(checks.Error(
+                    f"{viewset.__name__}: key sắp xếp '{key}' dùng cột '{columns[0]}' không có index "
+                    f"trên {model._meta.label}.",
+                    hint="Thêm models.Index vào Meta.indexes hoặc bỏ key khỏi ordering_fields.",
+                    obj=viewset,
+                    id="app_home.E001",
+                ))
+    return errors
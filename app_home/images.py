@@ -0,0 +1,135 @@
+# app_home/images.py
+"""
+Ảnh món / ảnh nhân sự: sinh sẵn các bản thu nhỏ khi upload (Pillow).
+
+- Mỗi biến thể (thumb / card / full) có 2 định dạng: WebP (nhẹ, trình duyệt mới)
+  và JPEG (tablet/webview cũ). Không phóng to ảnh nhỏ hơn khung.
+- Tên file = <thư mục upload>/v/<sha1 nội dung ảnh gốc>-<biến thể>.<đuôi> -> nội dung
+  không bao giờ đổi dưới cùng một tên, nên media view trả Cache-Control immutable 1 năm.
+- Kết quả lưu vào JSONField của model (vd. MenuItem.image_variants):
+      {"thumb": {"width": 160, "height": 120, "webp": "menu/v/…-thumb.webp", "jpeg": "…"}, ...}
+  gọi refresh_variants() trong Model.save(); ảnh cũ chạy: python manage.py generate_image_variants
+"""
+import hashlib
+import logging
+import posixpath
+import re
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = {
+    "thumb": (160, 160),
+    "card": (480, 480),
+    "full": (1280, 1280),
+}
+WEBP_QUALITY = 78
+JPEG_QUALITY = 82
+
+# tên file do generate_variants() sinh ra (dùng để nhận biết file bất biến khi phục vụ)
+HASHED_NAME = re.compile(r"(^|/)v/[0-9a-f]{16}-[a-z]+\.(webp|jpg)$")
+
+
+def _variant_name(upload_dir, digest, variant, ext):
+    return posixpath.join(upload_dir, "v", f"{digest[:16]}-{variant}.{ext}")
+
+
+def _encode(image, fmt):
+    buffer = BytesIO()
+    if fmt == "jpeg":
+        if image.mode not in ("RGB", "L"):
+            # JPEG không có kênh alpha -> nền trắng
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.convert("RGBA").getchannel("A"))
+            image = background
+        image.save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def generate_variants(field_file, storage=default_storage):
+    """Đọc ảnh gốc (đã lưu hoặc vừa upload), ghi các biến thể, trả dict cho JSONField."""
+    field_file.open("rb")
+    try:
+        data = field_file.read()
+    finally:
+        field_file.seek(0)
+
+    digest = hashlib.sha1(data).hexdigest()
+    upload_dir = field_file.field.upload_to if isinstance(field_file.field.upload_to, str) else ""
+    try:
+        source = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+        source.load()
+    except (UnidentifiedImageError, OSError) as exc:
+        logger.warning("Không đọc được ảnh %s: %s", field_file.name, exc)
+        return {}
+    if source.mode not in ("RGB", "RGBA", "L"):
+        source = source.convert("RGBA" if "A" in source.getbands() or "transparency" in source.info else "RGB")
+
+    variants = {}
+    for variant, box in VARIANTS.items():
+        image = source.copy()
+        image.thumbnail(box, Image.Resampling.LANCZOS)
+        entry = {"width": image.width, "height": image.height}
+        for fmt, ext in (("webp", "webp"), ("jpeg", "jpg")):
+            name = _variant_name(upload_dir, digest, variant, ext)
+            if not storage.exists(name):
+                name = storage.save(name, ContentFile(_encode(image, fmt)))
+            entry[fmt] = name
+        variants[variant] = entry
+    return variants
+
+
+def refresh_variants(instance, field_name, variants_field, update_fields=None):
+    """
+    Gọi trong Model.save() trước super().save(). Ảnh mới upload -> sinh biến thể,
+    xoá ảnh -> xoá dict. Trả update_fields đã bổ sung variants_field (nếu cần).
+    """
+    if update_fields is not None and field_name not in update_fields:
+        return update_fields
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        variants = {}
+    elif not field_file._committed:
+        variants = generate_variants(field_file)
+    else:
+        return update_fields
+    setattr(instance, variants_field, variants)
+    if update_fields is not None:
+        update_fields = set(update_fields) | {variants_field}
+    return update_fields
+
+
+def variant_urls(field_file, variants, request=None):
+    """{biến thể: {width, height, webp, jpeg}} với URL tuyệt đối (nếu có request)."""
+    if not field_file:
+        return None
+
+    def absolute(name):
+        url = default_storage.url(name)
+        return request.build_absolute_uri(url) if request else url
+
+    result = {}
+    for variant, entry in (variants or {}).items():
+        result[variant] = {
+            "width": entry.get("width"),
+            "height": entry.get("height"),
+            "webp": absolute(entry["webp"]) if entry.get("webp") else None,
+            "jpeg": absolute(entry["jpeg"]) if entry.get("jpeg") else None,
+        }
+    return result
+
+
+def display_url(field_file, variants, request=None, variant="full"):
+    """URL để hiển thị: bản JPEG của biến thể (nhẹ, chạy mọi thiết bị), chưa có thì ảnh gốc."""
+    if not field_file:
+        return None
+    name = (variants or {}).get(variant, {}).get("jpeg")
+    url = default_storage.url(name) if name else field_file.url
+    return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,95 @@
+"""
+So sánh kích thước trên đường truyền và CPU khi nén response API ở các mức gzip/brotli.
+
+    python manage.py bench_compression
+    python manage.py bench_compression --path "/api/app-menu/menu-items/?limit=200" --bandwidth 1500
+    python manage.py bench_compression --file dump.json
+
+Mặc định lấy JSON thật từ vài endpoint nặng (menu kèm công thức, lô hàng, đơn hàng) qua
+test client trong process (không nén), rồi nén lại từng mức. Thời gian truyền ước tính theo
+--bandwidth (kbit/s, mặc định 2000 ~ 4G yếu); "tổng" = CPU nén + truyền, chọn mức có tổng nhỏ
+rồi đặt API_COMPRESSION_GZIP_LEVEL / API_COMPRESSION_BROTLI_QUALITY.
+"""
+import gzip
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIClient
+
+from middleware.compression import brotli
+
+DEFAULT_PATHS = (
+    "/api/app-menu/menu-items/?limit=100",
+    "/api/app-menu/menu-recipes/?limit=200",
+    "/api/app-inventory/lots/?limit=200",
+    "/api/app-order/orders/?limit=100",
+)
+GZIP_LEVELS = (1, 6, 9)
+BROTLI_QUALITIES = (1, 4, 6, 11)
+
+
+def _timed(func, data, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        packed = func(data)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return packed, best
+
+
+class Command(BaseCommand):
+    help = "Benchmark kích thước/CPU của nén gzip & brotli trên payload JSON của API."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", action="append", dest="paths", help="Endpoint GET (lặp lại được)")
+        parser.add_argument("--file", action="append", dest="files", help="File payload có sẵn (lặp lại được)")
+        parser.add_argument("--bandwidth", type=float, default=2000, help="Băng thông kbit/s để ước tính thời gian truyền")
+        parser.add_argument("--repeat", type=int, default=5, help="Số lần nén mỗi mức (lấy lần nhanh nhất)")
+
+    def _payloads(self, options):
+        payloads = []
+        for path in options["files"] or ():
+            with open(path, "rb") as fh:
+                payloads.append((path, fh.read()))
+        if options["files"] and not options["paths"]:
+            return payloads
+
+        client = APIClient()
+        client.force_authenticate(get_user_model()(username="bench", is_staff=True, is_superuser=True))
+        for path in options["paths"] or DEFAULT_PATHS:
+            response = client.get(path, HTTP_ACCEPT="application/json", HTTP_ACCEPT_ENCODING="identity")
+            if response.status_code != 200:
+                self.stdout.write(self.style.WARNING(f"{path}: HTTP {response.status_code}, bỏ qua"))
+                continue
+            payloads.append((path, response.content))
+        return payloads
+
+    def handle(self, *args, **options):
+        payloads = self._payloads(options)
+        if not payloads:
+            raise CommandError("Không có payload nào để đo.")
+
+        codecs = [(f"gzip-{level}", lambda data, level=level: gzip.compress(data, compresslevel=level, mtime=0))
+                  for level in GZIP_LEVELS]
+        if brotli is not None:
+            codecs += [(f"br-{quality}", lambda data, quality=quality: brotli.compress(data, quality=quality))
+                       for quality in BROTLI_QUALITIES]
+        else:
+            self.stdout.write(self.style.WARNING("Chưa cài brotli: chỉ đo gzip."))
+
+        bytes_per_ms = options["bandwidth"] * 1000 / 8 / 1000
+        for name, data in payloads:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{name}  ({len(data):,} byte)"))
+            self.stdout.write(f"  {'codec':<9} {'byte':>10} {'tỉ lệ':>7} {'CPU ms':>8} {'truyền ms':>10} {'tổng ms':>8}")
+            self.stdout.write(f"  {'none':<9} {len(data):>10,} {'100%':>7} {0:>8.2f} "
+                              f"{len(data) / bytes_per_ms:>10.1f} {len(data) / bytes_per_ms:>8.1f}")
+            for codec, compress in codecs:
+                packed, seconds = _timed(compress, data, options["repeat"])
+                cpu_ms = seconds * 1000
+                wire_ms = len(packed) / bytes_per_ms
+                self.stdout.write(
+                    f"  {codec:<9} {len(packed):>10,} {len(packed) / len(data):>7.1%} {cpu_ms:>8.2f} "
+                    f"{wire_ms:>10.1f} {cpu_ms + wire_ms:>8.1f}"
+                )
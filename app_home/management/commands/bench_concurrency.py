@@ -0,0 +1,108 @@
+"""
+Đo số kết nối đồng thời 1 worker phục vụ được: WSGI (gunicorn sync) so với ASGI (uvicorn).
+
+Chạy server 1 worker rồi bắn cùng một URL với nhiều mức đồng thời, ví dụ:
+    gunicorn foodshopeight_be.wsgi -w 1 -b 127.0.0.1:8001
+    uvicorn foodshopeight_be.asgi:application --workers 1 --port 8002
+
+    python manage.py bench_concurrency --url http://127.0.0.1:8001/api/app-order/live/orders/?timeout=5 \
+        --concurrency 1,10,50,200 --requests 400 --token <access>
+    (lặp lại với cổng 8002)
+
+Endpoint chờ I/O (long-poll, dashboard) là nơi khác biệt rõ nhất: worker sync giữ 1 request
+tới khi trả lời nên các kết nối còn lại xếp hàng; worker ASGI nhả event loop khi chờ.
+Client là asyncio thuần (không cần thư viện ngoài), mỗi request một kết nối HTTP/1.1, chỉ http://.
+"""
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = "Benchmark số request đồng thời 1 worker xử lý được (so sánh gunicorn sync và uvicorn)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", required=True, help="URL http:// cần đo")
+        parser.add_argument("--concurrency", default="1,10,50",
+                            help="Các mức đồng thời, phân tách bằng dấu phẩy (mặc định 1,10,50)")
+        parser.add_argument("--requests", type=int, default=200, help="Tổng số request mỗi mức")
+        parser.add_argument("--token", default="", help="JWT access token (gửi Authorization: Bearer)")
+        parser.add_argument("--timeout", type=float, default=60, help="Timeout mỗi request (giây)")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http" or not url.hostname:
+            raise CommandError("Chỉ hỗ trợ URL http://host[:port]/path")
+        try:
+            levels = [int(x) for x in options["concurrency"].split(",") if x.strip()]
+        except ValueError:
+            raise CommandError("--concurrency phải là danh sách số nguyên, vd. 1,10,50")
+
+        path = (url.path or "/") + (f"?{url.query}" if url.query else "")
+        headers = [f"GET {path} HTTP/1.1", f"Host: {url.netloc}", "Connection: close", "Accept: application/json"]
+        if options["token"]:
+            headers.append(f"Authorization: Bearer {options['token']}")
+        payload = ("\r\n".join(headers) + "\r\n\r\n").encode()
+        target = (url.hostname, url.port or 80)
+
+        self.stdout.write(f"{'conc':>6} {'ok':>6} {'err':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+        for level in levels:
+            ok, errors, latencies, elapsed = asyncio.run(
+                self._run(target, payload, level, options["requests"], options["timeout"])
+            )
+            self.stdout.write(
+                f"{level:>6} {ok:>6} {errors:>5} {ok / elapsed if elapsed else 0:>9.1f} "
+                f"{_percentile(latencies, 50) * 1000:>9.1f} {_percentile(latencies, 95) * 1000:>9.1f} "
+                f"{max(latencies, default=0) * 1000:>9.1f}"
+            )
+            if errors and not ok:
+                self.stdout.write(self.style.WARNING("  mọi request đều lỗi – kiểm tra URL/token/server."))
+        self.stdout.write(self.style.SUCCESS("Xong."))
+
+    async def _run(self, target, payload, concurrency, total, timeout):
+        latencies = []
+        counts = {"ok": 0, "errors": 0}
+        queue = asyncio.Queue()
+        for _ in range(total):
+            queue.put_nowait(None)
+
+        async def one():
+            reader, writer = await asyncio.open_connection(*target)
+            try:
+                writer.write(payload)
+                await writer.drain()
+                status_line = await reader.readline()
+                await reader.read()  # Connection: close -> đọc tới EOF
+            finally:
+                writer.close()
+            return int(status_line.split()[1])
+
+        async def client():
+            while not queue.empty():
+                queue.get_nowait()
+                started = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(one(), timeout)
+                except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                    counts["errors"] += 1
+                    continue
+                if status < 400:
+                    counts["ok"] += 1
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    counts["errors"] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(max(1, concurrency))))
+        elapsed = time.perf_counter() - started
+        return counts["ok"], counts["errors"], latencies, elapsed
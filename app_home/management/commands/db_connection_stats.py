@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from app_home import dbstats
+
+MYSQL_STATUS = ("Connections", "Threads_connected", "Threads_created", "Aborted_connects", "Uptime")
+
+
+def _ratio(part, whole):
+    return f"{part / whole:.1%}" if whole else "-"
+
+
+class Command(BaseCommand):
+    help = "Báo cáo tỉ lệ tái sử dụng kết nối DB (request / kết nối mới / pool) của các worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Xoá bộ đếm sau khi in")
+
+    def handle(self, *args, **options):
+        if isinstance(caches["default"], LocMemCache):
+            self.stdout.write(self.style.WARNING(
+                "CACHE đang là locmem: chỉ thấy số liệu của chính process này. "
+                "Đặt CACHE_URL (redis/memcached) để gom số liệu của mọi worker."
+            ))
+        dbstats.flush()
+        stats = dbstats.read()
+        requests = stats.get("requests", 0)
+        self.stdout.write(f"Requests: {requests}")
+
+        for alias, db in settings.DATABASES.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"[{alias}] {db.get('ENGINE')}"))
+            self.stdout.write(
+                f"  CONN_MAX_AGE={db.get('CONN_MAX_AGE', 0)} "
+                f"CONN_HEALTH_CHECKS={db.get('CONN_HEALTH_CHECKS', False)} "
+                f"POOL={db.get('POOL') or '-'}"
+            )
+            opened = stats.get(f"connections:{alias}", 0)
+            self.stdout.write(
+                f"  Kết nối mới: {opened} – tái sử dụng: {_ratio(max(requests - opened, 0), requests)}"
+            )
+
+            created = stats.get(f"pool:{alias}:created", 0)
+            reused = stats.get(f"pool:{alias}:reused", 0)
+            if created or reused:
+                self.stdout.write(
+                    f"  Pool: mở mới {created}, mượn lại {reused} ({_ratio(reused, created + reused)}), "
+                    f"đóng bỏ {stats.get(f'pool:{alias}:discarded', 0)}, "
+                    f"chờ quá hạn {stats.get(f'pool:{alias}:timeouts', 0)}"
+                )
+
+            connection = connections[alias]
+            if connection.vendor == "mysql":
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SHOW GLOBAL STATUS WHERE Variable_name IN (%s)" % ", ".join(["%s"] * len(MYSQL_STATUS)),
+                        MYSQL_STATUS,
+                    )
+                    for name, value in cursor.fetchall():
+                        self.stdout.write(f"  MySQL {name}: {value}")
+
+        if options["reset"]:
+            dbstats.reset()
+            self.stdout.write(self.style.SUCCESS("Đã xoá bộ đếm."))
@@ -0,0 +1,41 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from app_home import caching
+from app_home.images import generate_variants
+
+# model -> (field ảnh, JSONField lưu biến thể)
+IMAGE_FIELDS = {
+    "app_menu.MenuItem": ("image", "image_variants"),
+    "app_hr.StaffProfile": ("avatar", "avatar_variants"),
+}
+
+
+class Command(BaseCommand):
+    help = "Sinh ảnh thu nhỏ (thumb/card/full, WebP + JPEG) cho ảnh đã upload trước khi có pipeline ảnh."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Sinh lại cả những ảnh đã có biến thể")
+
+    def handle(self, *args, **options):
+        for label, (field_name, variants_field) in IMAGE_FIELDS.items():
+            model = apps.get_model(label)
+            queryset = model.objects.exclude(**{field_name: ""}).exclude(**{f"{field_name}__isnull": True})
+            if not options["force"]:
+                queryset = queryset.filter(**{variants_field: {}})
+
+            done = missing = 0
+            for pk, name in queryset.values_list("pk", field_name).iterator():
+                instance = model(pk=pk, **{field_name: name})
+                field_file = getattr(instance, field_name)
+                if not field_file.storage.exists(name):
+                    missing += 1
+                    continue
+                variants = generate_variants(field_file)
+                # update() thay vì save(): không đụng updated_at / signal của model
+                model.objects.filter(pk=pk).update(**{variants_field: variants})
+                done += 1
+            if done:
+                caching.bump(model)
+            self.stdout.write(self.style.SUCCESS(f"{label}: {done} ảnh") +
+                              (self.style.WARNING(f", {missing} file không tồn tại") if missing else ""))
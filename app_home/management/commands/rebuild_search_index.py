@@ -0,0 +1,27 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from app_home import search
+
+
+class Command(BaseCommand):
+    help = "Dựng lại chỉ mục tìm kiếm (SearchToken). Chạy 1 lần sau khi migrate hoặc khi đổi cấu hình field."
+
+    def add_arguments(self, parser):
+        parser.add_argument("models", nargs="*", help="Ví dụ: app_menu.MenuItem (mặc định: tất cả model đã đăng ký)")
+
+    def handle(self, *args, **options):
+        if options["models"]:
+            try:
+                models = [apps.get_model(label) for label in options["models"]]
+            except (LookupError, ValueError) as exc:
+                raise CommandError(str(exc))
+        else:
+            models = search.registered_models()
+
+        for model in models:
+            try:
+                count = search.rebuild(model)
+            except KeyError:
+                raise CommandError(f"{model._meta.label} chưa đăng ký tìm kiếm")
+            self.stdout.write(self.style.SUCCESS(f"{model._meta.label}: {count} token"))
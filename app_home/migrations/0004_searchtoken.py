@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_home', '0003_alter_unit_options_alter_unit_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=64, verbose_name='Model')),
+                ('object_id', models.BigIntegerField(verbose_name='ID bản ghi')),
+                ('token', models.CharField(max_length=64, verbose_name='Token')),
+                ('weight', models.PositiveSmallIntegerField(default=1, verbose_name='Trọng số')),
+            ],
+            options={
+                'verbose_name': 'Chỉ mục tìm kiếm',
+                'verbose_name_plural': 'Chỉ mục tìm kiếm',
+                'indexes': [models.Index(fields=['model_label', 'token'], name='app_home_se_model_l_efd72d_idx')],
+                'constraints': [models.UniqueConstraint(fields=('model_label', 'object_id', 'token'), name='uniq_search_token')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_home', '0004_searchtoken'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='menucategory',
+            index=models.Index(fields=['sort_order', 'name'], name='app_home_me_sort_or_73ae95_idx'),
+        ),
+    ]
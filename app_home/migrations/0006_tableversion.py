@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:17
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_home', '0005_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(max_length=100, unique=True, verbose_name='Bảng')),
+                ('version', models.BigIntegerField(default=0, verbose_name='Version')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Ghi lần cuối')),
+            ],
+            options={
+                'verbose_name': 'Version bảng',
+                'verbose_name_plural': 'Version bảng',
+            },
+        ),
+    ]
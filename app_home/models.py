@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 class UserProxy(User):
@@ -38,6 +39,7 @@ class MenuCategory(models.Model):
 
     class Meta:
         ordering = ["sort_order", "name"]
+        indexes = [models.Index(fields=["sort_order", "name"])]
         verbose_name = "Danh mục menu"
         verbose_name_plural = "Danh mục menu"
 
@@ -102,3 +104,46 @@ class AppSetting(models.Model):
 
     def __str__(self):
         return f"VAT {self.vat_percent}% - {self.currency}"
+
+class SearchToken(models.Model):
+    """
+    Chỉ mục tìm kiếm phụ (side index) dùng chung cho nhiều model.
+    Mỗi dòng là 1 token đã bỏ dấu + viết thường của 1 bản ghi, tra theo prefix
+    trên index (model_label, token) thay cho LIKE '%...%' quét toàn bảng.
+    Được duy trì tự động khi save/delete (xem app_home/search.py).
+    """
+    model_label = models.CharField("Model", max_length=64)
+    object_id = models.BigIntegerField("ID bản ghi")
+    token = models.CharField("Token", max_length=64)
+    weight = models.PositiveSmallIntegerField("Trọng số", default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["model_label", "object_id", "token"], name="uniq_search_token"),
+        ]
+        indexes = [
+            models.Index(fields=["model_label", "token"]),
+        ]
+        verbose_name = "Chỉ mục tìm kiếm"
+        verbose_name_plural = "Chỉ mục tìm kiếm"
+
+    def __str__(self):
+        return f"{self.model_label}#{self.object_id}: {self.token}"
+
+
+class TableVersion(models.Model):
+    """
+    Version theo bảng, tăng mỗi khi có ghi (save/delete/bulk) vào bảng đó.
+    Dùng làm validator HTTP (ETag) cho các API danh sách/chi tiết:
+    1 query nhỏ thay vì serialize lại để so sánh (xem app_home/caching.py).
+    """
+    table = models.CharField("Bảng", max_length=100, unique=True)  # model label: "app_menu.menuitem"
+    version = models.BigIntegerField("Version", default=0)
+    updated_at = models.DateTimeField("Ghi lần cuối", default=timezone.now)
+
+    class Meta:
+        verbose_name = "Version bảng"
+        verbose_name_plural = "Version bảng"
+
+    def __str__(self):
+        return f"{self.table} v{self.version}"
@@ -0,0 +1,32 @@
+# app_home/renderers.py
+"""
+JSONRenderer nhanh hơn cho các danh sách lớn: dùng orjson nếu đã cài,
+ngược lại (hoặc khi cần indent cho Browsable API) quay về JSONRenderer của DRF.
+Kết quả giống hệt DRF: UTF-8 không escape, không khoảng trắng, datetime UTC dạng ...Z,
+kiểu lạ (Decimal, timedelta, lazy string...) đi qua encoder của DRF.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson là tuỳ chọn
+    orjson = None
+
+_drf_encoder = encoders.JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    if orjson is not None:
+        options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            return orjson.dumps(data, default=_drf_encoder.default, option=self.options)
+        except (orjson.JSONEncodeError, TypeError):
+            # vd. số nguyên > 64 bit: để encoder chuẩn xử lý
+            return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,191 @@
+# app_home/rows.py
+"""
+Đường đọc nhanh cho các danh sách lớn (OrderItem, InventoryLot, RecipeItem...).
+
+Thay vì khởi tạo model + chạy ModelSerializer từng field cho mỗi dòng, RowBuilder
+đọc .values_list() (1 query, join sẵn quan hệ lồng) rồi dựng dict bằng các bộ chuyển
+đổi đã biên dịch trước từ model field: Decimal -> chuỗi đủ số lẻ, date/datetime -> ISO.
+Kết quả phải giống hệt serializer tương ứng (xem tests.py của từng app).
+
+Khai báo:
+    class InventoryLotRows(RowBuilder):
+        model = InventoryLot
+        fields = (
+            "id",
+            ("ingredient", "ingredient_id"),
+            ("ingredient_detail", Nested(IngredientRows, "ingredient")),
+            "quantity_remaining",
+        )
+
+Bật cho viewset:
+    class InventoryLotViewSet(FastListMixin, CommonViewSet):
+        row_builder = InventoryLotRows     # None -> dùng serializer như cũ
+"""
+import decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from rest_framework.response import Response
+
+
+# -------------------- BỘ CHUYỂN ĐỔI --------------------
+def decimal_string(decimal_places, max_digits=None):
+    """Giống serializers.DecimalField.to_representation (coerce_to_string)."""
+    exponent = decimal.Decimal(".1") ** decimal_places
+    context = decimal.getcontext().copy()
+    if max_digits is not None:
+        context.prec = max_digits
+
+    def convert(value):
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return "{:f}".format(value.quantize(exponent, context=context))
+    return convert
+
+
+def date_iso(value):
+    return value.isoformat()
+
+
+def datetime_iso(value):
+    """Giống serializers.DateTimeField.to_representation (ISO 8601, UTC -> 'Z')."""
+    if settings.USE_TZ:
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value, timezone.get_current_timezone())
+        value = timezone.localtime(value)
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def converter_for(model_field):
+    if isinstance(model_field, models.DecimalField):
+        return decimal_string(model_field.decimal_places, model_field.max_digits)
+    if isinstance(model_field, models.DateTimeField):
+        return datetime_iso
+    if isinstance(model_field, models.DateField):
+        return date_iso
+    return None
+
+
+def _resolve_field(model, path):
+    field = None
+    for part in path.split("__"):
+        field = model._meta.get_field(part)
+        if field.is_relation and field.related_model is not None:
+            model = field.related_model
+    return field
+
+
+# -------------------- KHAI BÁO --------------------
+class Nested:
+    """
+    Đối tượng lồng qua FK; FK null -> None (như serializer lồng read_only).
+    Field đầu tiên của rows lồng phải là khoá chính ("id") để nhận biết FK null.
+    """
+
+    def __init__(self, rows, relation):
+        self.rows = rows
+        self.relation = relation
+
+
+class Computed:
+    """Cột tính bằng expression; factory nhận đường dẫn OuterRef tới bản ghi hiện tại."""
+
+    def __init__(self, factory, convert=None):
+        self.factory = factory
+        self.convert = convert
+
+
+class RowBuilder:
+    model = None
+    fields = ()
+
+    @classmethod
+    def _entries(cls):
+        for entry in cls.fields:
+            if isinstance(entry, str):
+                yield entry, entry
+            else:
+                yield entry
+
+    @classmethod
+    def _compile(cls, keep, prefix, paths, annotations):
+        """Trả về plan [(tên, vị trí cột, converter, plan lồng)]; thêm cột vào paths."""
+        plan = []
+        for name, source in cls._entries():
+            if keep is not None and name not in keep:
+                continue
+            if isinstance(source, Nested):
+                sub_prefix = f"{prefix}{source.relation}__"
+                null_index = len(paths)
+                sub_plan = source.rows._compile(None, sub_prefix, paths, annotations)
+                plan.append((name, null_index, None, sub_plan))
+            elif isinstance(source, Computed):
+                alias = f"_row_{prefix.replace('__', '_')}{name}"
+                annotations[alias] = source.factory(prefix[:-2] if prefix else "pk")
+                plan.append((name, len(paths), source.convert, None))
+                paths.append(alias)
+            else:
+                plan.append((name, len(paths), converter_for(_resolve_field(cls.model, source)), None))
+                paths.append(f"{prefix}{source}")
+        return plan
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def compile(cls, keep=None):
+        paths, annotations = [], {}
+        plan = cls._compile(keep, "", paths, annotations)
+        return tuple(paths), annotations, plan
+
+    @classmethod
+    def values(cls, queryset, keep=None):
+        """queryset -> values_list đã annotate, kèm plan để dựng dict."""
+        paths, annotations, plan = cls.compile(frozenset(keep) if keep is not None else None)
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset.values_list(*paths), plan
+
+    @staticmethod
+    def assemble(plan, row):
+        out = {}
+        for name, index, convert, sub_plan in plan:
+            value = row[index]
+            if sub_plan is not None:
+                out[name] = None if value is None else RowBuilder.assemble(sub_plan, row)
+            elif value is None or convert is None:
+                out[name] = value
+            else:
+                out[name] = convert(value)
+        return out
+
+    @classmethod
+    def build(cls, queryset, keep=None):
+        rows, plan = cls.values(queryset, keep)
+        return [cls.assemble(plan, row) for row in rows]
+
+
+# -------------------- VIEWSET --------------------
+class FastListMixin:
+    """list() đọc bằng row_builder (nếu có) thay cho serializer; các action khác giữ nguyên."""
+    row_builder = None
+
+    def list(self, request, *args, **kwargs):
+        if self.row_builder is None:
+            return super().list(request, *args, **kwargs)
+        from .serializers import requested_field_names  # serializers import rows -> tránh vòng
+
+        queryset = self.filter_queryset(self.get_queryset())
+        keep = requested_field_names(self.get_serializer_class(), request)
+        rows, plan = self.row_builder.values(queryset, keep)
+
+        page = self.paginate_queryset(rows)
+        data = [self.row_builder.assemble(plan, row) for row in (rows if page is None else page)]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
@@ -0,0 +1,11 @@
+# app_home/schema.py
+"""
+Extension drf-spectacular cho các thành phần riêng của project
+(nạp trong AppHomeConfig.ready() để đăng ký trước khi sinh schema).
+"""
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    """StatelessJWTAuthentication -> security scheme Bearer JWT như JWTAuthentication gốc."""
+    target_class = "app_home.authentication.StatelessJWTAuthentication"
@@ -0,0 +1,229 @@
+# app_home/search.py
+"""
+Tìm kiếm dùng chung cho các danh sách (món, nguyên liệu, NCC, nhân sự...).
+
+- Văn bản được chuẩn hoá: viết thường, bỏ dấu tiếng Việt ("Phở bò" -> "pho bo").
+- Mỗi bản ghi được tách token và lưu vào bảng SearchToken khi save/delete.
+- Truy vấn: mỗi từ khoá khớp theo prefix của token (dùng index, không LIKE '%..%'),
+  bản ghi phải khớp đủ mọi từ khoá, xếp hạng theo trọng số field + khớp trọn từ.
+  Gom nhóm / xếp hạng chạy trong SQL (subquery), không giới hạn số kết quả.
+- Field khai báo "contains" (SĐT, email) khớp thêm icontains trên chính bảng.
+
+Đăng ký model trong AppConfig.ready():
+    search.register(MenuItem, {"name": 3, "description": 1})
+    search.register(Supplier, {"name": 3, "phone": 1}, contains=("phone", "email"))
+"""
+import re
+import unicodedata
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+
+from .models import SearchToken
+
+TOKEN_MAX_LENGTH = 64
+EXACT_BONUS = 2
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+_registry = {}
+
+
+# -------------------- CHUẨN HOÁ --------------------
+def normalize(text):
+    """Viết thường + bỏ dấu: 'Phở Bò Đặc Biệt' -> 'pho bo dac biet'."""
+    if not text:
+        return ""
+    text = str(text).replace("đ", "d").replace("Đ", "D")
+    text = unicodedata.normalize("NFD", text)
+    text = "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def tokenize(text):
+    """Danh sách token duy nhất (giữ thứ tự)."""
+    seen = {}
+    for tok in normalize(text).split():
+        seen.setdefault(tok[:TOKEN_MAX_LENGTH], None)
+    return list(seen)
+
+
+# -------------------- ĐĂNG KÝ & DUY TRÌ CHỈ MỤC --------------------
+def _label(model):
+    return model._meta.label_lower
+
+
+def _resolve(instance, path):
+    value = instance
+    for part in path.split("__"):
+        value = getattr(value, part, None)
+        if value is None:
+            return ""
+    return value
+
+
+def document_tokens(instance, fields):
+    """{token: weight} của 1 bản ghi; token xuất hiện ở nhiều field lấy trọng số cao nhất."""
+    tokens = {}
+    for path, weight in fields.items():
+        for tok in tokenize(_resolve(instance, path)):
+            tokens[tok] = max(weight, tokens.get(tok, 0))
+    return tokens
+
+
+def index_instances(model, instances):
+    """Ghi lại chỉ mục cho danh sách bản ghi (xoá token cũ + bulk_create token mới)."""
+    config = _registry[_label(model)]
+    label = _label(model)
+    instances = list(instances)
+    if not instances:
+        return 0
+    rows = [
+        SearchToken(model_label=label, object_id=obj.pk, token=tok, weight=weight)
+        for obj in instances
+        for tok, weight in document_tokens(obj, config["fields"]).items()
+    ]
+    with transaction.atomic():
+        SearchToken.objects.filter(model_label=label, object_id__in=[o.pk for o in instances]).delete()
+        SearchToken.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def rebuild(model, batch_size=500):
+    """Dựng lại toàn bộ chỉ mục của 1 model (dùng cho backfill)."""
+    config = _registry[_label(model)]
+    qs = model._default_manager.all().order_by("pk")
+    if config["select_related"]:
+        qs = qs.select_related(*config["select_related"])
+    SearchToken.objects.filter(model_label=_label(model)).delete()
+    total, batch = 0, []
+    for obj in qs.iterator(chunk_size=batch_size):
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            total += index_instances(model, batch)
+            batch = []
+    total += index_instances(model, batch)
+    return total
+
+
+def _on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_instances(sender, [instance])
+
+
+def _on_delete(sender, instance, **kwargs):
+    SearchToken.objects.filter(model_label=_label(sender), object_id=instance.pk).delete()
+
+
+def register(model, fields, depends_on=None, contains=()):
+    """
+    fields: {"đường_dẫn_field": trọng_số}, có thể đi qua FK: "category__name".
+    contains: field khớp thêm icontains (không qua chỉ mục) – vd. SĐT, email.
+    depends_on: {ModelLiênQuan: "fk_lookup"} – khi bản ghi liên quan đổi (vd. đổi tên
+    danh mục) thì index lại các bản ghi trỏ tới nó.
+    """
+    label = _label(model)
+    related = sorted({path.rsplit("__", 1)[0] for path in fields if "__" in path})
+    _registry[label] = {
+        "model": model, "fields": dict(fields), "select_related": related, "contains": tuple(contains),
+    }
+
+    post_save.connect(_on_save, sender=model, dispatch_uid=f"search_save_{label}")
+    post_delete.connect(_on_delete, sender=model, dispatch_uid=f"search_delete_{label}")
+
+    for related_model, lookup in (depends_on or {}).items():
+        def _reindex_dependants(sender, instance, raw=False, _model=model, _lookup=lookup, **kwargs):
+            if raw:
+                return
+            qs = _model._default_manager.filter(**{_lookup: instance})
+            cfg = _registry[_label(_model)]
+            if cfg["select_related"]:
+                qs = qs.select_related(*cfg["select_related"])
+            index_instances(_model, qs)
+
+        post_save.connect(
+            _reindex_dependants, sender=related_model, weak=False,
+            dispatch_uid=f"search_dep_{label}_{_label(related_model)}",
+        )
+
+
+def registered_models():
+    return [cfg["model"] for cfg in _registry.values()]
+
+
+# -------------------- TRUY VẤN --------------------
+def _scored_tokens(model, terms):
+    """
+    Queryset SearchToken gom theo object_id (GROUP BY trong SQL), cột "score".
+    Điểm từng từ khoá = MAX(trọng số token khớp, x EXACT_BONUS nếu khớp trọn từ);
+    HAVING mọi từ khoá đều > 0 (AND).
+    """
+    cond = Q()
+    per_term = {}
+    for pos, term in enumerate(terms):
+        cond |= Q(token__startswith=term)
+        per_term[f"t{pos}"] = Max(Case(
+            When(token=term, then=F("weight") * EXACT_BONUS),
+            When(token__startswith=term, then=F("weight")),
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+    return (
+        SearchToken.objects
+        .filter(model_label=_label(model))
+        .filter(cond)
+        .order_by()
+        .values("object_id")
+        .annotate(**per_term)
+        .filter(**{f"{alias}__gt": 0 for alias in per_term})
+        .annotate(score=sum((F(alias) for alias in per_term), Value(0)))
+    )
+
+
+def ranked_ids(model, query, limit=None):
+    """
+    [(object_id, score)] theo điểm giảm dần. Mọi từ khoá đều phải khớp (AND),
+    mỗi từ khoá khớp prefix của 1 token; khớp trọn từ được cộng điểm.
+    Gom nhóm, xếp hạng và LIMIT đều chạy trong SQL.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return []
+    rows = _scored_tokens(model, terms).order_by("-score", "object_id").values_list("object_id", "score")
+    if limit is not None:
+        rows = rows[:limit]
+    return list(rows)
+
+
+def _contains_filter(model, query):
+    """Q icontains trên các field 'contains' (SĐT, email: gõ giữa chuỗi vẫn khớp)."""
+    cond = Q()
+    query = query.strip()
+    if query:
+        for field in _registry[_label(model)]["contains"]:
+            cond |= Q(**{f"{field}__icontains": query})
+    return cond
+
+
+def search_queryset(qs, query, rank=True):
+    """
+    Lọc queryset theo chỉ mục (+ icontains trên field 'contains'), không giới hạn số bản ghi.
+    rank=True: sắp theo điểm (thay cho ordering mặc định); bản ghi chỉ khớp icontains xếp cuối.
+    """
+    terms = tokenize(query)
+    cond = _contains_filter(qs.model, query)
+    if terms:
+        scored = _scored_tokens(qs.model, terms)
+        cond |= Q(pk__in=scored.values("object_id"))
+    if not cond:
+        return qs.none()
+    qs = qs.filter(cond)
+    if rank and terms:
+        score = Subquery(scored.filter(object_id=OuterRef("pk")).values("score")[:1])
+        qs = qs.annotate(search_rank=Coalesce(score, Value(0))).order_by("-search_rank", "pk")
+    return qs
+
+
+def matching_ids(model, query):
+    """Subquery id bản ghi khớp – dùng trong filter(x_id__in=...), không kéo id về Python."""
+    return search_queryset(model._default_manager.all(), query, rank=False).values("pk")
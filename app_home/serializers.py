@@ -1,18 +1,143 @@
+import time
+
+from django.core.exceptions import ObjectDoesNotExist
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from .authentication import ISSUED_AT_MS_CLAIM, token_revoked
 from .models import (
     Unit, IngredientCategory, MenuCategory,
     Department, Position, DiningTable, AppSetting
 )
+from .rows import RowBuilder
+
+
+def _split_fields(raw):
+    if not raw:
+        return None
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    return [name.strip() for name in raw if name and name.strip()]
+
+
+def requested_field_names(serializer_class, request=None, fields=None, omit=None):
+    """
+    Tập field sẽ được trả về: fields/omit truyền trực tiếp, hoặc ?fields=a,b / ?omit=c
+    trên request. Field không tồn tại bị bỏ qua.
+    """
+    declared = list(getattr(getattr(serializer_class, "Meta", None), "fields", None) or ())
+    if fields is None and omit is None and request is not None:
+        params = getattr(request, "query_params", request.GET)
+        fields, omit = params.get("fields"), params.get("omit")
+    fields, omit = _split_fields(fields), _split_fields(omit)
+
+    names = [name for name in declared if name in fields] if fields else declared
+    if omit:
+        names = [name for name in names if name not in omit]
+    return set(names)
+
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets cho ModelSerializer:
+        UnitSerializer(obj, fields=("id", "code"))   hoặc   GET ...?fields=id,code&omit=name
+    Tham số từ request chỉ áp dụng cho serializer gốc (serializer lồng được khai báo
+    ở class nên không có context lúc khởi tạo).
+    Serializer có quan hệ lồng override optimize_queryset() để chỉ join/prefetch/annotate
+    cho các field thực sự được trả về.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        omit = kwargs.pop("omit", None)
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get("request") if (fields is None and omit is None) else None
+        if fields is None and omit is None and request is None:
+            return
+        keep = requested_field_names(type(self), request, fields, omit)
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        return queryset
+
+
+# schema OpenAPI cho field biến thể ảnh (xem app_home.images.variant_urls)
+_IMAGE_VARIANT = {
+    "type": "object",
+    "properties": {
+        "width": {"type": "integer"},
+        "height": {"type": "integer"},
+        "webp": {"type": "string", "format": "uri"},
+        "jpeg": {"type": "string", "format": "uri"},
+    },
+}
+IMAGE_VARIANTS_SCHEMA = {
+    "type": "object",
+    "nullable": True,
+    "properties": {name: _IMAGE_VARIANT for name in ("thumb", "card", "full")},
+}
+
+
+def staff_profile_of(user):
+    """
+    StaffProfile của user (None nếu không có) kèm position/department trong 1 query;
+    kết quả được gắn vào user nên các lần gọi sau (claim JWT, response đăng nhập) không query lại.
+    """
+    from app_hr.models import StaffProfile
+
+    accessor = type(user).staff_profile.related
+    if not accessor.is_cached(user):
+        profile = (
+            StaffProfile.objects.select_related("position__department", "department")
+            .filter(user=user).first()
+        )
+        accessor.set_cached_value(user, profile)
+    try:
+        return user.staff_profile
+    except ObjectDoesNotExist:
+        return None
+
+
+def request_staff_id(request):
+    """Id StaffProfile của người gọi API: lấy từ claim JWT, user DB (session/admin) thì tra hồ sơ."""
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return None
+    if hasattr(user, "staff_id"):
+        return user.staff_id
+    profile = staff_profile_of(user)
+    return profile.pk if profile else None
+
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        # Add custom claims
+        # iat tính bằng giây; mốc ms để so với thời điểm thu hồi (access token copy claim này)
+        token[ISSUED_AT_MS_CLAIM] = int(time.time() * 1000)
+        # Add custom claims – đủ cho phân quyền mà không cần query user (app_home.authentication)
         token["username"] = user.username
+        token["is_staff"] = user.is_staff
+        token["is_superuser"] = user.is_superuser
+        profile = staff_profile_of(user)
+        token["staff_id"] = profile.pk if profile else None
+        token["positions"] = [profile.position_id] if profile and profile.position_id else []
+        token["department"] = profile.department_id if profile else None
         return token
 
-class UnitSerializer(serializers.ModelSerializer):
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        if token_revoked(refresh):
+            raise AuthenticationFailed("Phiên đăng nhập đã bị thu hồi, vui lòng đăng nhập lại.", code="token_revoked")
+        return super().validate(attrs)
+
+class UnitSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Unit
         fields = ["id", "code", "name"]
@@ -22,14 +147,14 @@ class UnitSerializer(serializers.ModelSerializer):
         }
 
 
-class IngredientCategorySerializer(serializers.ModelSerializer):
+class IngredientCategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = IngredientCategory
         fields = ["id", "name"]
         extra_kwargs = {"name": {"help_text": "Tên danh mục nguyên liệu"}}
 
 
-class MenuCategorySerializer(serializers.ModelSerializer):
+class MenuCategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = MenuCategory
         fields = ["id", "name", "sort_order"]
@@ -39,13 +164,13 @@ class MenuCategorySerializer(serializers.ModelSerializer):
         }
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Department
         fields = ["id", "name"]
 
 
-class PositionSerializer(serializers.ModelSerializer):
+class PositionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     # Trả về cả id department và thông tin chi tiết để tiện UI
     department = serializers.PrimaryKeyRelatedField(
         queryset=Department.objects.all(), allow_null=True, required=False
@@ -56,18 +181,35 @@ class PositionSerializer(serializers.ModelSerializer):
         model = Position
         fields = ["id", "name", "department", "department_detail"]
 
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        if "department_detail" in fields:
+            queryset = queryset.select_related("department")
+        return queryset
+
 
-class DiningTableSerializer(serializers.ModelSerializer):
+class DiningTableSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = DiningTable
         fields = ["id", "name"]
 
 
-class AppSettingSerializer(serializers.ModelSerializer):
+class AppSettingSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = AppSetting
         fields = ["id", "vat_percent", "currency"]
         extra_kwargs = {
             "vat_percent": {"help_text": "VAT mặc định (%)"},
             "currency": {"help_text": "Mã tiền tệ, ví dụ: VND"},
-        }
\ No newline at end of file
+        }
+
+
+# -------------------- ĐỌC NHANH (.values) --------------------
+class UnitRows(RowBuilder):
+    model = Unit
+    fields = ("id", "code", "name")
+
+
+class IngredientCategoryRows(RowBuilder):
+    model = IngredientCategory
+    fields = ("id", "name")
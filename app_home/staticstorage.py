@@ -0,0 +1,71 @@
+# app_home/staticstorage.py
+"""
+Storage cho static: tên file có hash nội dung + bản nén sẵn.
+
+python manage.py collectstatic ghi vào STATIC_ROOT:
+    admin/css/base.css                    (bản gốc, cho tham chiếu không qua {% static %})
+    admin/css/base.5af66c1b1797.css       (hash -> cache 1 năm, đổi nội dung = đổi tên)
+    admin/css/base.5af66c1b1797.css.gz    (gzip -9)
+    admin/css/base.5af66c1b1797.css.br    (brotli, nếu đã cài package brotli)
+app_home.fileserve.serve_static (hoặc nginx gzip_static/brotli_static) chọn bản nén
+theo Accept-Encoding. manifest_strict=False: file chưa có trong manifest (vd. tinymce
+tự nạp plugin bằng đường dẫn tương đối) vẫn dùng tên gốc thay vì lỗi 500.
+"""
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # brotli là tuỳ chọn, thiếu thì chỉ có .gz
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".mjs", ".map", ".svg", ".json", ".html", ".txt", ".xml", ".ico", ".ttf", ".eot"}
+MIN_COMPRESS_SIZE = 256
+
+
+def compress_file(path):
+    """Ghi path.gz / path.br cạnh file gốc nếu nén có lợi. Trả danh sách đuôi đã ghi."""
+    with open(path, "rb") as fh:
+        data = fh.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return []
+
+    written = []
+    candidates = [(".gz", lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        candidates.append((".br", lambda raw: brotli.compress(raw, quality=11)))
+    source_mtime = os.path.getmtime(path)
+    for suffix, compress in candidates:
+        # collectstatic chạy lại: bản nén còn mới hơn file gốc -> khỏi nén lại (brotli 11 khá chậm)
+        if os.path.exists(path + suffix) and os.path.getmtime(path + suffix) >= source_mtime:
+            written.append(suffix)
+            continue
+        packed = compress(data)
+        if len(packed) < len(data) * 0.95:
+            with open(path + suffix, "wb") as fh:
+                fh.write(packed)
+            written.append(suffix)
+        elif os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run=dry_run, **options):
+            if not isinstance(processed, Exception):
+                names.add(name)
+                if hashed_name:
+                    names.add(hashed_name)
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                compress_file(self.path(name))
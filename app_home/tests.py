@@ -1,3 +1,96 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from app_home.models import Department, IngredientCategory, MenuCategory, Position, Unit
+from app_home.renderers import FastJSONRenderer
+from app_inventory.models import Ingredient, InventoryLot, Supplier
+from app_inventory.serializers import InventoryLotRows, InventoryLotSerializer
+from app_menu.models import MenuItem, RecipeItem
+from app_menu.serializers import RecipeItemRows, RecipeItemSerializer
+from app_order.models import Order, OrderItem
+from app_order.serializers import OrderItemReadSerializer, OrderItemRows
+
+
+class FastReadPathTests(TestCase):
+    """RowBuilder + FastJSONRenderer phải cho ra đúng JSON như serializer + JSONRenderer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        kg = Unit.objects.create(code="kg", name="Kilogram")
+        meat = IngredientCategory.objects.create(name="Thịt")
+        beef = Ingredient.objects.create(name="Bò", category=meat, unit=kg, min_stock=Decimal("1.5"))
+        noodle = Ingredient.objects.create(name="Bánh phở", category=meat, unit=kg,
+                                           reference_unit_price=Decimal("12000"))
+        supplier = Supplier.objects.create(name="Công ty Thịt Sạch ABC")
+        InventoryLot.objects.create(ingredient=beef, supplier=supplier, quantity_received=Decimal("10"),
+                                    unit_price=Decimal("250000.5"), received_date=date(2025, 1, 2),
+                                    expiry_date=date(2025, 1, 9))
+        InventoryLot.objects.create(ingredient=beef, quantity_received=Decimal("2.125"),
+                                    quantity_remaining=Decimal("0.3"), unit_price=Decimal("240000"))
+        InventoryLot.objects.create(ingredient=noodle, quantity_received=Decimal("5"), unit_price=Decimal("12000"))
+
+        soup = MenuCategory.objects.create(name="Món nước")
+        pho = MenuItem.objects.create(name="Phở bò", category=soup, price=Decimal("55000"))
+        RecipeItem.objects.create(menu_item=pho, ingredient=beef, quantity=Decimal("0.15"))
+        RecipeItem.objects.create(menu_item=pho, ingredient=noodle, quantity=Decimal("0.2"))
+
+        order = Order.objects.create(order_number="HD-001")
+        OrderItem.objects.create(order=order, menu_item=pho, name="Phở bò", unit_price=Decimal("55000"),
+                                 quantity=2, total=Decimal("110000"))
+
+    def assertSameJSON(self, serializer_class, rows_class, queryset, **kwargs):
+        expected = JSONRenderer().render(serializer_class(queryset, many=True, **kwargs).data)
+        actual = FastJSONRenderer().render(rows_class.build(queryset, kwargs.get("fields")))
+        self.assertEqual(actual, expected)
+
+    def test_inventory_lots(self):
+        self.assertSameJSON(InventoryLotSerializer, InventoryLotRows, InventoryLot.objects.order_by("pk"))
+
+    def test_inventory_lots_sparse(self):
+        self.assertSameJSON(InventoryLotSerializer, InventoryLotRows, InventoryLot.objects.order_by("pk"),
+                            fields=("id", "supplier_detail", "unit_price"))
+
+    def test_recipe_items(self):
+        self.assertSameJSON(RecipeItemSerializer, RecipeItemRows, RecipeItem.objects.order_by("pk"))
+
+    def test_order_items(self):
+        self.assertSameJSON(OrderItemReadSerializer, OrderItemRows, OrderItem.objects.order_by("pk"))
+
+    def test_renderer_matches_drf_on_plain_data(self):
+        data = {"total": Decimal("1.50"), "day": date(2025, 1, 2), "name": "Phở", 1: None}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class DeclarativeFilterTests(TestCase):
+    """query_filters của CommonViewSet phải thực sự thu hẹp danh sách."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.kitchen = Department.objects.create(name="Bếp")
+        cls.service = Department.objects.create(name="Phục vụ")
+        Position.objects.create(name="Đầu bếp", department=cls.kitchen)
+        Position.objects.create(name="Phụ bếp", department=cls.kitchen)
+        Position.objects.create(name="Phục vụ bàn", department=cls.service)
+        cls.user = get_user_model().objects.create_user("filter_test", password="x")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def names(self, response):
+        self.assertEqual(response.status_code, 200)
+        return sorted(row["name"] for row in response.json()["results"])
+
+    def test_positions_filtered_by_department(self):
+        response = self.client.get("/api/app-home/v1/positions/", {"department": self.kitchen.pk})
+        self.assertEqual(self.names(response), ["Phụ bếp", "Đầu bếp"])
 
-# Create your tests here.
+    def test_invalid_filter_value_is_rejected(self):
+        response = self.client.get("/api/app-home/v1/positions/", {"department": "abc"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("department", response.json())
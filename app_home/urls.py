@@ -3,8 +3,8 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from . import views
-from rest_framework_simplejwt.views import TokenRefreshView,TokenObtainPairView
+from . import async_views, views
+from rest_framework_simplejwt.views import TokenRefreshView
 
 router = DefaultRouter()
 app_name = 'app_home'
@@ -19,7 +19,8 @@ router.register(r'app-settings', views.AppSettingViewSet, basename='app-setting'
 
 urlpatterns = [
     path("v1/", include(router.urls)),
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/token/', views.CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/check/', async_views.token_check, name='token_check'),
 
     ]
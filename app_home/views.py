@@ -7,6 +7,8 @@ from drf_spectacular.utils import (
 from django.db.models import Q
 
 from .pagination import CustomPagination
+from .caching import ConditionalGetMixin
+from .filters import SparseFieldsMixin, OrderingMixin, DeclarativeFilterBackend, CharFilter, IntegerFilter
 from .models import (
     Unit, IngredientCategory, MenuCategory,
     Department, Position, DiningTable, AppSetting
@@ -24,43 +26,66 @@ from rest_framework import viewsets
 from django.contrib.auth.models import User
 from django.db.models import Q
 
-from .serializers import CustomTokenObtainPairSerializer
+from .serializers import CustomTokenObtainPairSerializer, staff_profile_of
 from .pagination import CustomPagination
+from .boot import reference_bundle
 from .docs import *
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from app_hr.serializers import StaffProfileSerializer
+
+LOGIN_STAFF_FIELDS = ("id", "full_name", "email", "phone", "department_detail", "position_detail", "status", "avatar_url")
 
 # Create your views here.
 class CustomTokenObtainPairView(TokenObtainPairView):
+    """
+    Đăng nhập: token + thông tin user/nhân sự + danh mục khởi động trong 1 response.
+    Query: 1 (xác thực user) + 1 (StaffProfile kèm position/department) + 1 (version danh mục,
+    dữ liệu danh mục lấy từ cache – xem app_home/boot.py).
+    """
     serializer_class = CustomTokenObtainPairSerializer
+
     @extend_schema(tags=["app_home"])
     @custom_token_obtain_pair_view_schema()
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         try:
             serializer.is_valid(raise_exception=True)
-        except Exception as e:
+        except (AuthenticationFailed, ValidationError):
             return Response(
                 {"detail": "Invalid credentials"}, status=status.HTTP_401_UNAUTHORIZED
             )
-        user = User.objects.get(username=request.data['username'])
-        user_serializer = UserRegistrationSerializer(user, fields=('id', 'username', 'email', 'first_name', 'last_name'))
-        # Lấy userProfile từ user
-        user_profile = UserProfile.objects.get(user=user)
-        positions = user_profile.positions.all()
-        positions = PositionSerializer(positions, many=True, fields=( 'title',))
+        # user đã có từ authenticate(), profile đã được get_token() nạp sẵn (select_related)
+        user = serializer.user
+        profile = staff_profile_of(user)
+        context = self.get_serializer_context()
 
+        reference_version, reference = reference_bundle(request.data.get("reference_version"))
         response_data = {
             "refresh": serializer.validated_data["refresh"],
             "access": serializer.validated_data["access"],
-            "user": user_serializer.data,
-            "positions": positions.data
+            "user": {
+                "id": user.pk,
+                "username": user.username,
+                "email": user.email,
+                "first_name": user.first_name,
+                "last_name": user.last_name,
+                "is_staff": user.is_staff,
+            },
+            "staff": StaffProfileSerializer(profile, fields=LOGIN_STAFF_FIELDS, context=context).data
+            if profile else None,
+            "positions": PositionSerializer([profile.position], many=True, fields=("id", "name")).data
+            if profile and profile.position else [],
+            "reference_version": reference_version,
+            "reference": reference,
         }
 
         return Response(response_data, status=status.HTTP_200_OK)
 
 # ---- Base ViewSet: chỉ định quyền + phân trang tuỳ biến ----
-class CommonViewSet(viewsets.ModelViewSet):
+class CommonViewSet(ConditionalGetMixin, SparseFieldsMixin, OrderingMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]   # đổi IsAdminUser nếu cần
     pagination_class = CustomPagination                   # <-- dùng CustomPagination của bạn
+    filter_backends = [DeclarativeFilterBackend]          # áp dụng query_filters của từng viewset
 
 
 # -------------------- UNIT --------------------
@@ -75,14 +100,16 @@ class CommonViewSet(viewsets.ModelViewSet):
 )
 class UnitViewSet(CommonViewSet):
     serializer_class = UnitSerializer
+    cache_tables = (Unit,)
+    ordering_fields = {"code": ("code",)}
+    default_ordering = ("code",)
 
     def get_queryset(self):
         qs = Unit.objects.all()
         search = self.request.query_params.get("search")
-        ordering = self.request.query_params.get("ordering", "code")
         if search:
             qs = qs.filter(Q(code__icontains=search) | Q(name__icontains=search))
-        return qs.order_by(ordering)
+        return self.order_queryset(qs)
 
 
 # -------------------- INGREDIENT CATEGORY --------------------
@@ -97,14 +124,16 @@ class UnitViewSet(CommonViewSet):
 )
 class IngredientCategoryViewSet(CommonViewSet):
     serializer_class = IngredientCategorySerializer
+    cache_tables = (IngredientCategory,)
+    ordering_fields = {"name": ("name",)}
+    default_ordering = ("name",)
 
     def get_queryset(self):
         qs = IngredientCategory.objects.all()
         search = self.request.query_params.get("search")
-        ordering = self.request.query_params.get("ordering", "name")
         if search:
             qs = qs.filter(name__icontains=search)
-        return qs.order_by(ordering)
+        return self.order_queryset(qs)
 
 
 # -------------------- MENU CATEGORY --------------------
@@ -114,7 +143,7 @@ class IngredientCategoryViewSet(CommonViewSet):
         summary="Danh sách danh mục menu",
         parameters=[
             OpenApiParameter("ordering", OpenApiTypes.STR, OpenApiParameter.QUERY,
-                             description="Sắp xếp: 'sort_order', '-sort_order', 'name', ..."),
+                             description="Sắp xếp: 'sort_order' (mặc định), 'name'; thêm '-' để giảm dần"),
             OpenApiParameter("search", OpenApiTypes.STR, OpenApiParameter.QUERY,
                              description="Tìm theo tên danh mục"),
         ],
@@ -127,18 +156,19 @@ class IngredientCategoryViewSet(CommonViewSet):
 )
 class MenuCategoryViewSet(CommonViewSet):
     serializer_class = MenuCategorySerializer
+    cache_tables = (MenuCategory,)
+    ordering_fields = {
+        "sort_order": ("sort_order", "name"),
+        "name": ("name",),
+    }
+    default_ordering = ("sort_order",)
 
     def get_queryset(self):
         qs = MenuCategory.objects.all()
         search = self.request.query_params.get("search")
-        ordering = self.request.query_params.get("ordering", "sort_order,name")
         if search:
             qs = qs.filter(name__icontains=search)
-        # Hỗ trợ chuỗi nhiều trường "a,b"
-        if "," in ordering:
-            fields = [f.strip() for f in ordering.split(",") if f.strip()]
-            return qs.order_by(*fields)
-        return qs.order_by(ordering)
+        return self.order_queryset(qs)
 
 
 # -------------------- DEPARTMENT --------------------
@@ -153,14 +183,16 @@ class MenuCategoryViewSet(CommonViewSet):
 )
 class DepartmentViewSet(CommonViewSet):
     serializer_class = DepartmentSerializer
+    cache_tables = (Department,)
+    ordering_fields = {"name": ("name",)}
+    default_ordering = ("name",)
 
     def get_queryset(self):
         qs = Department.objects.all()
         search = self.request.query_params.get("search")
-        ordering = self.request.query_params.get("ordering", "name")
         if search:
             qs = qs.filter(name__icontains=search)
-        return qs.order_by(ordering)
+        return self.order_queryset(qs)
 
 
 # -------------------- POSITION --------------------
@@ -174,7 +206,7 @@ class DepartmentViewSet(CommonViewSet):
             OpenApiParameter("search", OpenApiTypes.STR, OpenApiParameter.QUERY,
                              description="Tìm theo tên vị trí hoặc tên phòng ban"),
             OpenApiParameter("ordering", OpenApiTypes.STR, OpenApiParameter.QUERY,
-                             description="Sắp xếp: 'name', 'department__name', ..."),
+                             description="Sắp xếp: 'name' (mặc định), 'department' (theo id phòng ban, rồi tên)"),
         ],
     ),
     retrieve=extend_schema(summary="Chi tiết vị trí"),
@@ -185,17 +217,20 @@ class DepartmentViewSet(CommonViewSet):
 )
 class PositionViewSet(CommonViewSet):
     serializer_class = PositionSerializer
+    cache_tables = (Position, Department,)
+    ordering_fields = {
+        "name": ("name",),
+        "department": ("department", "name"),
+    }
+    default_ordering = ("name",)
+    query_filters = {"department": IntegerFilter("department_id")}
 
     def get_queryset(self):
-        qs = Position.objects.select_related("department")
+        qs = self.optimize_queryset(Position.objects.all())
         search = self.request.query_params.get("search")
-        department_id = self.request.query_params.get("department")
-        ordering = self.request.query_params.get("ordering", "name")
-        if department_id:
-            qs = qs.filter(department_id=department_id)
         if search:
             qs = qs.filter(Q(name__icontains=search) | Q(department__name__icontains=search))
-        return qs.order_by(ordering)
+        return self.order_queryset(qs)
 
 
 # -------------------- DINING TABLE --------------------
@@ -210,14 +245,16 @@ class PositionViewSet(CommonViewSet):
 )
 class DiningTableViewSet(CommonViewSet):
     serializer_class = DiningTableSerializer
+    cache_tables = (DiningTable,)
+    ordering_fields = {"name": ("name",)}
+    default_ordering = ("name",)
 
     def get_queryset(self):
         qs = DiningTable.objects.all()
         search = self.request.query_params.get("search")
-        ordering = self.request.query_params.get("ordering", "name")
         if search:
             qs = qs.filter(name__icontains=search)
-        return qs.order_by(ordering)
+        return self.order_queryset(qs)
 
 
 # -------------------- APP SETTING --------------------
@@ -241,11 +278,15 @@ class DiningTableViewSet(CommonViewSet):
 )
 class AppSettingViewSet(CommonViewSet):
     serializer_class = AppSettingSerializer
+    cache_tables = (AppSetting,)
+    ordering_fields = {
+        "id": ("id",),
+        "vat_percent": ("vat_percent",),
+        "currency": ("currency",),
+    }
+    default_ordering = ("id",)
+    ordering_allow_unindexed = True  # bảng thiết lập chỉ có 1 dòng
+    query_filters = {"currency": CharFilter("currency", "iexact")}
 
     def get_queryset(self):
-        qs = AppSetting.objects.all()
-        currency = self.request.query_params.get("currency")
-        ordering = self.request.query_params.get("ordering", "id")
-        if currency:
-            qs = qs.filter(currency__iexact=currency)
-        return qs.order_by(ordering)
+        return self.order_queryset(AppSetting.objects.all())
@@ -1,6 +1,10 @@
 # app_hr/admin.py
 from django.contrib import admin
-from .models import StaffProfile, StaffStatus
+
+from app_home.images import display_url
+from .models import (
+    ClockEvent, PayrollRun, Payslip, Shift, StaffMonthlyTimesheet, StaffPerformanceMetric, StaffProfile, StaffStatus,
+)
 
 
 @admin.register(StaffProfile)
@@ -16,13 +20,14 @@ class StaffProfileAdmin(admin.ModelAdmin):
         "start_date",
         "performance",
         "shifts_this_month",
+        "hours_this_month",
         "total_hours",
     )
     list_filter = ("status", "department", "position")
     search_fields = ("full_name", "email", "phone", "position__name", "department__name")
     ordering = ("full_name",)
-    list_editable = ("status", "salary", "performance")
-    readonly_fields = ("avatar_preview",)
+    list_editable = ("status", "salary")
+    readonly_fields = ("avatar_preview", "performance", "shifts_this_month", "hours_this_month", "total_hours")
 
     fieldsets = (
         (None, {
@@ -40,14 +45,105 @@ class StaffProfileAdmin(admin.ModelAdmin):
             "fields": (
                 "salary",
                 "start_date",
-                ("performance", "shifts_this_month", "total_hours"),
+                "performance",
+                ("shifts_this_month", "hours_this_month", "total_hours"),
             )
         }),
     )
 
     def avatar_preview(self, obj):
         if obj.avatar:
-            return f'<img src="{obj.avatar.url}" style="max-height: 100px;"/>'
+            return f'<img src="{display_url(obj.avatar, obj.avatar_variants, variant="thumb")}" style="max-height: 100px;"/>'
         return "(No image)"
     avatar_preview.allow_tags = True
     avatar_preview.short_description = "Ảnh đại diện"
+
+
+@admin.register(Shift)
+class ShiftAdmin(admin.ModelAdmin):
+    list_display = ("staff", "date", "start_at", "end_at", "status")
+    list_filter = ("status", "date")
+    search_fields = ("staff__full_name", "note")
+    date_hierarchy = "date"
+    autocomplete_fields = ("staff",)
+
+
+@admin.register(ClockEvent)
+class ClockEventAdmin(admin.ModelAdmin):
+    list_display = ("staff", "kind", "at", "worked_minutes", "shift")
+    list_filter = ("kind",)
+    search_fields = ("staff__full_name",)
+    date_hierarchy = "at"
+    # số phút đã cộng vào bảng công -> không sửa tay
+    readonly_fields = ("staff", "shift", "kind", "at", "worked_minutes")
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(StaffMonthlyTimesheet)
+class StaffMonthlyTimesheetAdmin(admin.ModelAdmin):
+    list_display = ("staff", "month", "shifts", "worked_minutes", "hours", "closed_at")
+    list_filter = ("month",)
+    search_fields = ("staff__full_name",)
+    readonly_fields = ("staff", "month", "shifts", "worked_minutes", "closed_at", "updated_at")
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(StaffPerformanceMetric)
+class StaffPerformanceMetricAdmin(admin.ModelAdmin):
+    list_display = ("staff", "day", "orders_served", "avg_prep_seconds", "revenue", "computed_at")
+    list_filter = ("day",)
+    search_fields = ("staff__full_name",)
+    date_hierarchy = "day"
+    readonly_fields = ("staff", "day", "orders_served", "prep_seconds", "revenue", "computed_at")
+
+    def has_add_permission(self, request):
+        return False
+
+
+class PayslipInline(admin.TabularInline):
+    model = Payslip
+    extra = 0
+    fields = ("full_name", "base_salary", "worked_hours", "overtime_hours", "net_pay")
+    readonly_fields = fields
+    can_delete = False
+    show_change_link = True
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PayrollRun)
+class PayrollRunAdmin(admin.ModelAdmin):
+    """Tạo kỳ lương chỉ xếp hàng; tính lương + xuất file do lệnh process_payroll_runs (cron) làm."""
+    list_display = ("month", "status", "staff_count", "documents_done", "total_net", "created_at", "finished_at")
+    list_filter = ("status",)
+    fields = ("month", "status", "staff_count", "documents_done", "total_net", "csv_file", "error",
+              "created_by", "created_at", "computed_at", "finished_at")
+    readonly_fields = ("status", "staff_count", "documents_done", "total_net", "csv_file", "error",
+                       "created_by", "created_at", "computed_at", "finished_at")
+    inlines = [PayslipInline]
+
+    def get_readonly_fields(self, request, obj=None):
+        # đã tạo thì không đổi tháng
+        return self.readonly_fields + (("month",) if obj else ())
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(Payslip)
+class PayslipAdmin(admin.ModelAdmin):
+    list_display = ("full_name", "run", "base_salary", "worked_hours", "overtime_hours", "net_pay")
+    list_filter = ("run",)
+    search_fields = ("full_name", "staff__email")
+    readonly_fields = ("run", "staff", "full_name", "base_salary", "standard_hours", "worked_hours",
+                       "overtime_hours", "base_pay", "overtime_pay", "net_pay", "document")
+
+    def has_add_permission(self, request):
+        return False
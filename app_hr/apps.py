@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class AppHrConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app_hr'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from app_home import authentication, caching, search
+        from .models import (
+            ClockEvent, PayrollRun, Payslip, Shift, StaffMonthlyTimesheet, StaffPerformanceMetric, StaffProfile,
+        )
+
+        search.register(StaffProfile, {"full_name": 3, "email": 2, "phone": 2}, contains=("phone", "email"))
+        caching.track(StaffProfile, get_user_model(), Shift, ClockEvent, StaffMonthlyTimesheet, StaffPerformanceMetric,
+                      PayrollRun, Payslip)
+        # chức danh / phòng ban / trạng thái nằm trong claim JWT -> đổi thì thu hồi token
+        authentication.revoke_on_change(StaffProfile, ("position_id", "department_id", "status"), user_field="user_id")
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from app_hr.services import close_month
+
+
+class Command(BaseCommand):
+    help = "Chốt bảng công tháng (mặc định: tháng trước) và chuyển bộ đếm ca/giờ sang tháng mới. Chạy qua cron đầu mỗi tháng."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", help="Tháng cần chốt YYYY-MM")
+
+    def handle(self, *args, **options):
+        if options["month"]:
+            try:
+                month = parse_date(f"{options['month']}-01")
+            except ValueError:
+                month = None
+            if month is None:
+                raise CommandError("--month phải có dạng YYYY-MM")
+        else:
+            month = (timezone.localdate().replace(day=1) - timedelta(days=1)).replace(day=1)
+
+        closed = close_month(month)
+        self.stdout.write(self.style.SUCCESS(f"Đã chốt {closed} bảng công tháng {month:%m/%Y}"))
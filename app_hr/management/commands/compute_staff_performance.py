@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from app_hr import services
+
+
+class Command(BaseCommand):
+    help = ("Tính số liệu phục vụ theo ngày (đơn hoàn tất, thời gian chế biến, doanh thu) từ lần chạy trước "
+            "tới hôm nay, rồi cập nhật điểm hiệu suất nhân sự. Chạy qua cron (vd. mỗi giờ).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Tính lại từ ngày YYYY-MM-DD (mặc định: ngày đã tính gần nhất)")
+        parser.add_argument("--window", type=int, default=services.PERFORMANCE_WINDOW_DAYS,
+                            help="Số ngày gần nhất dùng để chấm điểm hiệu suất")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options["since"]:
+            try:
+                day_from = parse_date(options["since"])
+            except ValueError:
+                day_from = None
+            if day_from is None:
+                raise CommandError("--since phải có dạng YYYY-MM-DD")
+        else:
+            day_from, _ = services.pending_metric_range(today)
+        if options["window"] < 1:
+            raise CommandError("--window phải >= 1")
+
+        rows = services.compute_performance_metrics(day_from, today)
+        changed = services.refresh_performance(today, options["window"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Đã tính {rows} dòng số liệu từ {day_from} tới {today}, cập nhật điểm cho {changed} nhân sự"
+        ))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from app_hr import payroll
+
+
+class Command(BaseCommand):
+    help = ("Tính lương + xuất phiếu lương PDF/CSV cho các kỳ lương chưa xong (tạo từ admin/API). "
+            "Chạy qua cron (vd. mỗi phút); kỳ bị ngắt giữa chừng sẽ được làm tiếp.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", help="Tạo (nếu chưa có) và xử lý ngay kỳ lương tháng YYYY-MM")
+
+    def handle(self, *args, **options):
+        if options["month"]:
+            try:
+                month = parse_date(f"{options['month']}-01")
+            except ValueError:
+                month = None
+            if month is None:
+                raise CommandError("--month phải có dạng YYYY-MM")
+            try:
+                run, _ = payroll.create_run(month)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            runs = [run]
+        else:
+            runs = list(payroll.pending_runs())
+
+        failed = 0
+        for run in runs:
+            try:
+                if payroll.process_run(run):
+                    run.refresh_from_db()
+                    self.stdout.write(self.style.SUCCESS(
+                        f"{run}: {run.staff_count} phiếu lương, tổng thực lĩnh {run.total_net}"
+                    ))
+                else:
+                    self.stdout.write(f"{run}: đang được xử lý ở worker khác hoặc đã xong, bỏ qua")
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(self.style.ERROR(f"{run}: {exc}"))
+        if failed:
+            raise CommandError(f"{failed} kỳ lương lỗi, sẽ thử lại ở lần chạy sau")
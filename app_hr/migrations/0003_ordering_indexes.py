@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_home', '0005_ordering_indexes'),
+        ('app_hr', '0002_alter_staffprofile_options_alter_staffprofile_avatar_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='staffprofile',
+            index=models.Index(fields=['full_name'], name='app_hr_staf_full_na_a8ff18_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffprofile',
+            index=models.Index(fields=['salary'], name='app_hr_staf_salary_86d8de_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffprofile',
+            index=models.Index(fields=['start_date'], name='app_hr_staf_start_d_15be92_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffprofile',
+            index=models.Index(fields=['status', 'full_name'], name='app_hr_staf_status_66d560_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffprofile',
+            index=models.Index(fields=['department', 'full_name'], name='app_hr_staf_departm_9d6717_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffprofile',
+            index=models.Index(fields=['position', 'full_name'], name='app_hr_staf_positio_530ab7_idx'),
+        ),
+    ]
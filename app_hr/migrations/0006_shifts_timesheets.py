@@ -0,0 +1,133 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_home', '0006_tableversion'),
+        ('app_hr', '0005_avatar_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClockEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('in', 'Vào ca'), ('out', 'Ra ca')], max_length=3, verbose_name='Loại')),
+                ('at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Thời điểm')),
+                ('worked_minutes', models.PositiveIntegerField(default=0, verbose_name='Số phút làm')),
+            ],
+            options={
+                'verbose_name': 'Chấm công',
+                'verbose_name_plural': 'Chấm công',
+            },
+        ),
+        migrations.CreateModel(
+            name='Shift',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Ngày')),
+                ('start_at', models.DateTimeField(verbose_name='Bắt đầu (dự kiến)')),
+                ('end_at', models.DateTimeField(verbose_name='Kết thúc (dự kiến)')),
+                ('status', models.CharField(choices=[('scheduled', 'Đã xếp'), ('in_progress', 'Đang làm'), ('done', 'Hoàn thành'), ('missed', 'Vắng'), ('cancelled', 'Hủy')], default='scheduled', max_length=20, verbose_name='Trạng thái')),
+                ('note', models.CharField(blank=True, default='', max_length=255, verbose_name='Ghi chú')),
+            ],
+            options={
+                'verbose_name': 'Ca làm',
+                'verbose_name_plural': 'Ca làm',
+                'ordering': ('date', 'start_at'),
+            },
+        ),
+        migrations.CreateModel(
+            name='StaffMonthlyTimesheet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Tháng (ngày 1)')),
+                ('shifts', models.PositiveIntegerField(default=0, verbose_name='Số ca')),
+                ('worked_minutes', models.PositiveIntegerField(default=0, verbose_name='Số phút làm')),
+                ('closed_at', models.DateTimeField(blank=True, null=True, verbose_name='Chốt lúc')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Cập nhật lúc')),
+            ],
+            options={
+                'verbose_name': 'Bảng công tháng',
+                'verbose_name_plural': 'Bảng công tháng',
+            },
+        ),
+        migrations.AddField(
+            model_name='staffprofile',
+            name='hours_this_month',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=7, verbose_name='Giờ làm trong tháng'),
+        ),
+        migrations.AlterField(
+            model_name='staffprofile',
+            name='shifts_this_month',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Số ca trong tháng'),
+        ),
+        migrations.AlterField(
+            model_name='staffprofile',
+            name='total_hours',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=9, verbose_name='Tổng giờ làm'),
+        ),
+        migrations.AddIndex(
+            model_name='staffprofile',
+            index=models.Index(fields=['shifts_this_month'], name='app_hr_staf_shifts__58448a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffprofile',
+            index=models.Index(fields=['hours_this_month'], name='app_hr_staf_hours_t_ac6bab_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffprofile',
+            index=models.Index(fields=['total_hours'], name='app_hr_staf_total_h_e43bd8_idx'),
+        ),
+        migrations.AddField(
+            model_name='clockevent',
+            name='staff',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='clock_events', to='app_hr.staffprofile', verbose_name='Nhân sự'),
+        ),
+        migrations.AddField(
+            model_name='shift',
+            name='staff',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shifts', to='app_hr.staffprofile', verbose_name='Nhân sự'),
+        ),
+        migrations.AddField(
+            model_name='clockevent',
+            name='shift',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='clock_events', to='app_hr.shift', verbose_name='Ca làm'),
+        ),
+        migrations.AddField(
+            model_name='staffmonthlytimesheet',
+            name='staff',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timesheets', to='app_hr.staffprofile', verbose_name='Nhân sự'),
+        ),
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(fields=['staff', 'date'], name='app_hr_shif_staff_i_afebee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(fields=['date', 'status'], name='app_hr_shif_date_c6f097_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clockevent',
+            index=models.Index(fields=['staff', 'at'], name='app_hr_cloc_staff_i_f166d4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clockevent',
+            index=models.Index(fields=['at'], name='app_hr_cloc_at_098439_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffmonthlytimesheet',
+            index=models.Index(fields=['month', 'worked_minutes'], name='app_hr_staf_month_4b2f91_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='staffmonthlytimesheet',
+            constraint=models.UniqueConstraint(fields=('staff', 'month'), name='uniq_timesheet_staff_month'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:44
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_hr', '0006_shifts_timesheets'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='staffprofile',
+            name='performance',
+            field=models.PositiveIntegerField(default=0, editable=False, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)], verbose_name='Hiệu suất (0–100)'),
+        ),
+        migrations.CreateModel(
+            name='StaffPerformanceMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Ngày')),
+                ('orders_served', models.PositiveIntegerField(default=0, verbose_name='Số đơn hoàn tất')),
+                ('prep_seconds', models.PositiveBigIntegerField(default=0, verbose_name='Tổng thời gian chế biến (giây)')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Doanh thu thu được')),
+                ('computed_at', models.DateTimeField(auto_now=True, verbose_name='Tính lúc')),
+                ('staff', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='performance_metrics', to='app_hr.staffprofile', verbose_name='Nhân sự')),
+            ],
+            options={
+                'verbose_name': 'Hiệu suất theo ngày',
+                'verbose_name_plural': 'Hiệu suất theo ngày',
+                'indexes': [models.Index(fields=['day', 'staff'], name='app_hr_staf_day_e28abc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('staff', 'day'), name='uniq_performance_staff_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:47
+
+import app_hr.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_hr', '0007_staff_performance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True, verbose_name='Tháng (ngày 1)')),
+                ('status', models.CharField(choices=[('pending', 'Chờ xử lý'), ('computed', 'Đã tính lương'), ('done', 'Hoàn tất'), ('failed', 'Lỗi')], default='pending', max_length=20, verbose_name='Trạng thái')),
+                ('staff_count', models.PositiveIntegerField(default=0, verbose_name='Số phiếu lương')),
+                ('documents_done', models.PositiveIntegerField(default=0, verbose_name='Số phiếu đã xuất file')),
+                ('total_net', models.DecimalField(decimal_places=2, default=0, max_digits=18, verbose_name='Tổng thực lĩnh')),
+                ('csv_file', models.FileField(blank=True, storage=app_hr.models.payroll_storage, upload_to='payroll/', verbose_name='File CSV')),
+                ('computed_at', models.DateTimeField(blank=True, null=True, verbose_name='Tính lương lúc')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Lỗi gần nhất')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='Đang xử lý tới')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Tạo lúc')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Hoàn tất lúc')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Người tạo')),
+            ],
+            options={
+                'verbose_name': 'Kỳ lương',
+                'verbose_name_plural': 'Kỳ lương',
+                'ordering': ('-month',),
+            },
+        ),
+        migrations.CreateModel(
+            name='Payslip',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('full_name', models.CharField(max_length=255, verbose_name='Họ tên (snapshot)')),
+                ('base_salary', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Lương cơ bản')),
+                ('standard_hours', models.DecimalField(decimal_places=2, max_digits=7, verbose_name='Giờ chuẩn')),
+                ('worked_hours', models.DecimalField(decimal_places=2, max_digits=7, verbose_name='Giờ làm')),
+                ('overtime_hours', models.DecimalField(decimal_places=2, default=0, max_digits=7, verbose_name='Giờ tăng ca')),
+                ('base_pay', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Lương theo giờ làm')),
+                ('overtime_pay', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Lương tăng ca')),
+                ('net_pay', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Thực lĩnh')),
+                ('document', models.FileField(blank=True, storage=app_hr.models.payroll_storage, upload_to='payroll/', verbose_name='Phiếu lương PDF')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payslips', to='app_hr.payrollrun', verbose_name='Kỳ lương')),
+                ('staff', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='payslips', to='app_hr.staffprofile', verbose_name='Nhân sự')),
+            ],
+            options={
+                'verbose_name': 'Phiếu lương',
+                'verbose_name_plural': 'Phiếu lương',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='payrollrun',
+            index=models.Index(fields=['status', 'month'], name='app_hr_payr_status_9116e5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payslip',
+            index=models.Index(fields=['staff', 'run'], name='app_hr_pays_staff_i_fa26eb_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='payslip',
+            constraint=models.UniqueConstraint(fields=('run', 'staff'), name='uniq_payslip_run_staff'),
+        ),
+    ]
@@ -1,6 +1,12 @@
+from decimal import Decimal
+
 from django.db import models
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
+from app_home.images import refresh_variants
 from app_home.models import Department, Position
 
 class StaffStatus(models.TextChoices):
@@ -45,19 +51,241 @@ class StaffProfile(models.Model):
     start_date = models.DateField("Ngày bắt đầu", null=True, blank=True)
 
     status = models.CharField("Trạng thái", max_length=20, choices=StaffStatus.choices, default=StaffStatus.ACTIVE)
+    # tính từ StaffPerformanceMetric (app_hr.services.refresh_performance), không nhập tay
     performance = models.PositiveIntegerField(
         "Hiệu suất (0–100)",
         default=0,
+        editable=False,
         validators=[MinValueValidator(0), MaxValueValidator(100)]
     )
-    shifts_this_month = models.PositiveIntegerField("Số ca trong tháng", default=0)
-    total_hours = models.PositiveIntegerField("Tổng giờ làm", default=0)
+    # bộ đếm do hệ thống chấm công cập nhật (app_hr.services), không nhập tay
+    shifts_this_month = models.PositiveIntegerField("Số ca trong tháng", default=0, editable=False)
+    hours_this_month = models.DecimalField("Giờ làm trong tháng", max_digits=7, decimal_places=2,
+                                           default=0, editable=False)
+    total_hours = models.DecimalField("Tổng giờ làm", max_digits=9, decimal_places=2, default=0, editable=False)
 
     avatar = models.ImageField("Ảnh đại diện", upload_to="staff/", null=True, blank=True)
+    avatar_variants = models.JSONField("Ảnh thu nhỏ", default=dict, blank=True, editable=False)
+    updated_at = models.DateTimeField("Cập nhật lúc", auto_now=True, db_index=True)
 
     class Meta:
+        indexes = [
+            models.Index(fields=["full_name"]),
+            models.Index(fields=["salary"]),
+            models.Index(fields=["start_date"]),
+            models.Index(fields=["status", "full_name"]),
+            models.Index(fields=["department", "full_name"]),
+            models.Index(fields=["position", "full_name"]),
+            models.Index(fields=["shifts_this_month"]),
+            models.Index(fields=["hours_this_month"]),
+            models.Index(fields=["total_hours"]),
+        ]
         verbose_name = "Hồ sơ nhân sự"
         verbose_name_plural = "Hồ sơ nhân sự"
 
     def __str__(self):
         return self.full_name
+
+    def save(self, *args, **kwargs):
+        kwargs["update_fields"] = refresh_variants(self, "avatar", "avatar_variants", kwargs.get("update_fields"))
+        super().save(*args, **kwargs)
+
+
+# -------------------- CA LÀM / CHẤM CÔNG --------------------
+class Shift(models.Model):
+    """Ca làm đã xếp lịch cho 1 nhân sự"""
+
+    class Status(models.TextChoices):
+        SCHEDULED = "scheduled", "Đã xếp"
+        IN_PROGRESS = "in_progress", "Đang làm"
+        DONE = "done", "Hoàn thành"
+        MISSED = "missed", "Vắng"
+        CANCELLED = "cancelled", "Hủy"
+
+    staff = models.ForeignKey(StaffProfile, on_delete=models.CASCADE, related_name="shifts", verbose_name="Nhân sự")
+    date = models.DateField("Ngày")
+    start_at = models.DateTimeField("Bắt đầu (dự kiến)")
+    end_at = models.DateTimeField("Kết thúc (dự kiến)")
+    status = models.CharField("Trạng thái", max_length=20, choices=Status.choices, default=Status.SCHEDULED)
+    note = models.CharField("Ghi chú", max_length=255, blank=True, default="")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["staff", "date"]),
+            models.Index(fields=["date", "status"]),
+        ]
+        ordering = ("date", "start_at")
+        verbose_name = "Ca làm"
+        verbose_name_plural = "Ca làm"
+
+    def __str__(self):
+        return f"{self.staff} – {self.date}"
+
+    def clean(self):
+        if self.start_at and self.end_at and self.end_at <= self.start_at:
+            raise ValidationError({"end_at": "Giờ kết thúc phải sau giờ bắt đầu"})
+
+
+class ClockEvent(models.Model):
+    """Chấm công vào/ra. Lượt ra ghi sẵn số phút làm của lượt vào tương ứng."""
+
+    class Kind(models.TextChoices):
+        IN = "in", "Vào ca"
+        OUT = "out", "Ra ca"
+
+    staff = models.ForeignKey(StaffProfile, on_delete=models.CASCADE, related_name="clock_events",
+                              verbose_name="Nhân sự")
+    shift = models.ForeignKey(Shift, on_delete=models.SET_NULL, null=True, blank=True, related_name="clock_events",
+                              verbose_name="Ca làm")
+    kind = models.CharField("Loại", max_length=3, choices=Kind.choices)
+    at = models.DateTimeField("Thời điểm", default=timezone.now)
+    worked_minutes = models.PositiveIntegerField("Số phút làm", default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["staff", "at"]),
+            models.Index(fields=["at"]),
+        ]
+        verbose_name = "Chấm công"
+        verbose_name_plural = "Chấm công"
+
+    def __str__(self):
+        return f"{self.staff} {self.get_kind_display()} {self.at:%d/%m %H:%M}"
+
+
+class StaffMonthlyTimesheet(models.Model):
+    """Tổng công theo tháng, cộng dồn ở mỗi lượt ra ca (không quét lại ClockEvent)."""
+    staff = models.ForeignKey(StaffProfile, on_delete=models.CASCADE, related_name="timesheets",
+                              verbose_name="Nhân sự")
+    month = models.DateField("Tháng (ngày 1)")
+    shifts = models.PositiveIntegerField("Số ca", default=0)
+    worked_minutes = models.PositiveIntegerField("Số phút làm", default=0)
+    closed_at = models.DateTimeField("Chốt lúc", null=True, blank=True)
+    updated_at = models.DateTimeField("Cập nhật lúc", auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["staff", "month"], name="uniq_timesheet_staff_month"),
+        ]
+        indexes = [
+            models.Index(fields=["month", "worked_minutes"]),
+        ]
+        verbose_name = "Bảng công tháng"
+        verbose_name_plural = "Bảng công tháng"
+
+    def __str__(self):
+        return f"{self.staff} – {self.month:%m/%Y}"
+
+    @property
+    def hours(self):
+        return (Decimal(self.worked_minutes) / 60).quantize(Decimal("0.01"))
+
+
+# -------------------- HIỆU SUẤT --------------------
+class StaffPerformanceMetric(models.Model):
+    """
+    Số liệu phục vụ của 1 nhân sự trong 1 ngày, gom từ Order.handled_by / Payment.received_by.
+    Lưu tổng (không lưu trung bình) để cộng gộp nhiều ngày thành cửa sổ bất kỳ.
+    """
+    staff = models.ForeignKey(StaffProfile, on_delete=models.CASCADE, related_name="performance_metrics",
+                              verbose_name="Nhân sự")
+    day = models.DateField("Ngày")
+    orders_served = models.PositiveIntegerField("Số đơn hoàn tất", default=0)
+    prep_seconds = models.PositiveBigIntegerField("Tổng thời gian chế biến (giây)", default=0)
+    revenue = models.DecimalField("Doanh thu thu được", max_digits=16, decimal_places=2, default=0)
+    computed_at = models.DateTimeField("Tính lúc", auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["staff", "day"], name="uniq_performance_staff_day"),
+        ]
+        indexes = [
+            models.Index(fields=["day", "staff"]),
+        ]
+        verbose_name = "Hiệu suất theo ngày"
+        verbose_name_plural = "Hiệu suất theo ngày"
+
+    def __str__(self):
+        return f"{self.staff} – {self.day}"
+
+    @property
+    def avg_prep_seconds(self):
+        return round(self.prep_seconds / self.orders_served) if self.orders_served else None
+
+
+# -------------------- BẢNG LƯƠNG --------------------
+def payroll_storage():
+    # file lương không nằm trong MEDIA_ROOT (media được phục vụ công khai)
+    return FileSystemStorage(location=settings.PAYROLL_ROOT)
+
+
+class PayrollRun(models.Model):
+    """
+    Kỳ lương của 1 tháng (mỗi tháng 1 kỳ). Tạo kỳ chỉ ghi trạng thái "chờ xử lý"; lệnh
+    process_payroll_runs (cron) tính phiếu lương và xuất file, chạy lại sẽ làm tiếp phần còn dở.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Chờ xử lý"
+        COMPUTED = "computed", "Đã tính lương"
+        DONE = "done", "Hoàn tất"
+        FAILED = "failed", "Lỗi"
+
+    month = models.DateField("Tháng (ngày 1)", unique=True)
+    status = models.CharField("Trạng thái", max_length=20, choices=Status.choices, default=Status.PENDING)
+    staff_count = models.PositiveIntegerField("Số phiếu lương", default=0)
+    documents_done = models.PositiveIntegerField("Số phiếu đã xuất file", default=0)
+    total_net = models.DecimalField("Tổng thực lĩnh", max_digits=18, decimal_places=2, default=0)
+    csv_file = models.FileField("File CSV", storage=payroll_storage, upload_to="payroll/", blank=True)
+    computed_at = models.DateTimeField("Tính lương lúc", null=True, blank=True)
+    error = models.TextField("Lỗi gần nhất", blank=True, default="")
+    locked_until = models.DateTimeField("Đang xử lý tới", null=True, blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name="+", verbose_name="Người tạo")
+    created_at = models.DateTimeField("Tạo lúc", auto_now_add=True)
+    finished_at = models.DateTimeField("Hoàn tất lúc", null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "month"]),
+        ]
+        ordering = ("-month",)
+        verbose_name = "Kỳ lương"
+        verbose_name_plural = "Kỳ lương"
+
+    def __str__(self):
+        return f"Lương {self.month:%m/%Y}"
+
+    def clean(self):
+        if self.month:
+            self.month = self.month.replace(day=1)
+            if self.month >= timezone.localdate().replace(day=1):
+                raise ValidationError({"month": "Chỉ tính lương cho tháng đã kết thúc."})
+
+
+class Payslip(models.Model):
+    """Phiếu lương của 1 nhân sự trong 1 kỳ – số liệu chốt tại thời điểm tính, không đổi theo hồ sơ."""
+    run = models.ForeignKey(PayrollRun, on_delete=models.CASCADE, related_name="payslips", verbose_name="Kỳ lương")
+    staff = models.ForeignKey(StaffProfile, on_delete=models.PROTECT, related_name="payslips", verbose_name="Nhân sự")
+    full_name = models.CharField("Họ tên (snapshot)", max_length=255)
+    base_salary = models.DecimalField("Lương cơ bản", max_digits=14, decimal_places=2)
+    standard_hours = models.DecimalField("Giờ chuẩn", max_digits=7, decimal_places=2)
+    worked_hours = models.DecimalField("Giờ làm", max_digits=7, decimal_places=2)
+    overtime_hours = models.DecimalField("Giờ tăng ca", max_digits=7, decimal_places=2, default=0)
+    base_pay = models.DecimalField("Lương theo giờ làm", max_digits=14, decimal_places=2)
+    overtime_pay = models.DecimalField("Lương tăng ca", max_digits=14, decimal_places=2, default=0)
+    net_pay = models.DecimalField("Thực lĩnh", max_digits=14, decimal_places=2)
+    document = models.FileField("Phiếu lương PDF", storage=payroll_storage, upload_to="payroll/", blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["run", "staff"], name="uniq_payslip_run_staff"),
+        ]
+        indexes = [
+            models.Index(fields=["staff", "run"]),
+        ]
+        verbose_name = "Phiếu lương"
+        verbose_name_plural = "Phiếu lương"
+
+    def __str__(self):
+        return f"{self.full_name} – {self.run}"
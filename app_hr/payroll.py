@@ -0,0 +1,242 @@
+# app_hr/payroll.py
+"""
+Tính lương theo kỳ (tháng) và xuất phiếu lương PDF / bảng lương CSV.
+
+- create_run(month): chỉ ghi PayrollRun "chờ xử lý" -> request admin/API trả về ngay.
+- process_run(run): chạy từ lệnh process_payroll_runs (cron). Các bước đều làm lại được:
+    1. tính phiếu lương cho nhân sự chưa có phiếu trong kỳ: 1 bulk_create, unique (run, staff)
+    2. xuất PDF cho phiếu chưa có file, từng lô BATCH_SIZE phiếu
+    3. ghi CSV cả kỳ, đánh dấu hoàn tất
+  Bị ngắt giữa chừng (deploy, OOM...) thì lần chạy sau làm tiếp phần còn thiếu.
+- 2 worker không xử lý cùng 1 kỳ: kỳ được "giữ" bằng locked_until (UPDATE có điều kiện),
+  hết hạn giữ thì worker khác nhận lại.
+"""
+import csv
+import io
+import logging
+import unicodedata
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from app_home import caching
+from . import services
+from .models import PayrollRun, Payslip, StaffMonthlyTimesheet, StaffProfile, StaffStatus
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+LEASE = timedelta(minutes=15)
+CENT = Decimal("0.01")
+# nghỉ phép vẫn là nhân sự đang làm -> vẫn có phiếu lương (0 giờ thì 0 đồng)
+PAYROLL_STATUSES = (StaffStatus.ACTIVE, StaffStatus.ON_LEAVE)
+CSV_COLUMNS = (
+    ("staff_id", "Mã NS"), ("full_name", "Họ tên"), ("base_salary", "Lương cơ bản"),
+    ("standard_hours", "Giờ chuẩn"), ("worked_hours", "Giờ làm"), ("overtime_hours", "Giờ tăng ca"),
+    ("base_pay", "Lương theo giờ"), ("overtime_pay", "Lương tăng ca"), ("net_pay", "Thực lĩnh"),
+)
+
+
+def create_run(month, created_by_id=None):
+    """(kỳ lương, đã tạo mới?) – gọi lại cùng tháng trả về kỳ đã có."""
+    month = services.month_start(month)
+    if month >= services.month_start(timezone.localdate()):
+        raise ValueError("Chỉ tính lương cho tháng đã kết thúc.")
+    return PayrollRun.objects.get_or_create(month=month, defaults={"created_by_id": created_by_id})
+
+
+def calculate(base_salary, worked_minutes):
+    """Số liệu 1 phiếu lương từ lương cơ bản và số phút làm trong tháng."""
+    standard = Decimal(settings.PAYROLL_STANDARD_HOURS)
+    worked = (Decimal(worked_minutes) / 60).quantize(CENT)
+    regular = min(worked, standard)
+    overtime = max(worked - standard, Decimal(0))
+    hourly = Decimal(base_salary) / standard if standard else Decimal(0)
+    base_pay = (hourly * regular).quantize(CENT)
+    overtime_pay = (hourly * overtime * Decimal(str(settings.PAYROLL_OVERTIME_RATE))).quantize(CENT)
+    return {
+        "base_salary": base_salary,
+        "standard_hours": standard,
+        "worked_hours": worked,
+        "overtime_hours": overtime,
+        "base_pay": base_pay,
+        "overtime_pay": overtime_pay,
+        "net_pay": base_pay + overtime_pay,
+    }
+
+
+# -------------------- XỬ LÝ KỲ LƯƠNG --------------------
+def _claim(run):
+    now = timezone.now()
+    claimed = (
+        PayrollRun.objects
+        .filter(pk=run.pk)
+        .exclude(status=PayrollRun.Status.DONE)
+        .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+        .update(locked_until=now + LEASE)
+    )
+    return claimed == 1
+
+
+def _extend_lease(run):
+    PayrollRun.objects.filter(pk=run.pk).update(locked_until=timezone.now() + LEASE)
+
+
+@transaction.atomic
+def compute_payslips(run):
+    """Bước 1: tạo phiếu lương còn thiếu trong kỳ. Trả số phiếu vừa tạo."""
+    # chốt bảng công trước (đã chốt thì không đổi gì)
+    services.close_month(run.month)
+    minutes = dict(
+        StaffMonthlyTimesheet.objects.filter(month=run.month).values_list("staff_id", "worked_minutes")
+    )
+    staff = (
+        StaffProfile.objects
+        .filter(status__in=PAYROLL_STATUSES)
+        .exclude(payslips__run=run)
+        .only("pk", "full_name", "salary")
+        .order_by("pk")
+    )
+    rows = [
+        Payslip(run=run, staff_id=profile.pk, full_name=profile.full_name,
+                **calculate(profile.salary, minutes.get(profile.pk, 0)))
+        for profile in staff
+    ]
+    Payslip.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+
+    totals = run.payslips.aggregate(n=Count("id"), total=Sum("net_pay"))
+    now = timezone.now()
+    PayrollRun.objects.filter(pk=run.pk).update(
+        status=PayrollRun.Status.COMPUTED, staff_count=totals["n"], total_net=totals["total"] or 0,
+        computed_at=now, error="",
+    )
+    run.refresh_from_db()
+    return len(rows)
+
+
+def _replace_file(fieldfile, name, content):
+    # chạy lại sau khi đã ghi file nhưng chưa kịp lưu DB -> ghi đè, không sinh tên _abc123
+    target = fieldfile.field.generate_filename(fieldfile.instance, name)
+    if fieldfile.storage.exists(target):
+        fieldfile.storage.delete(target)
+    fieldfile.save(name, ContentFile(content), save=False)
+
+
+def render_documents(run):
+    """Bước 2: xuất PDF cho các phiếu chưa có file, từng lô. Trả số phiếu đã xuất."""
+    done = 0
+    while True:
+        batch = list(run.payslips.filter(document="").order_by("pk")[:BATCH_SIZE])
+        if not batch:
+            return done
+        for slip in batch:
+            _replace_file(slip.document, f"{run.month:%Y-%m}/payslip-{slip.staff_id}.pdf", payslip_pdf(slip, run))
+        Payslip.objects.bulk_update(batch, ["document"])
+        PayrollRun.objects.filter(pk=run.pk).update(documents_done=F("documents_done") + len(batch))
+        _extend_lease(run)
+        done += len(batch)
+
+
+def write_csv(run):
+    """Bước 3: bảng lương cả kỳ (UTF-8 BOM để Excel đọc đúng tiếng Việt)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([label for _, label in CSV_COLUMNS])
+    for row in run.payslips.order_by("full_name", "pk").values_list(*(name for name, _ in CSV_COLUMNS)).iterator():
+        writer.writerow(row)
+    _replace_file(run.csv_file, f"{run.month:%Y-%m}/payroll-{run.month:%Y-%m}.csv",
+                  buffer.getvalue().encode("utf-8-sig"))
+
+
+def process_run(run):
+    """Chạy (tiếp) 1 kỳ lương. False nếu kỳ đang được worker khác xử lý hoặc đã xong."""
+    if not _claim(run):
+        return False
+    run.refresh_from_db()
+    try:
+        if run.computed_at is None:
+            compute_payslips(run)
+        render_documents(run)
+        write_csv(run)
+        run.documents_done = run.payslips.exclude(document="").count()
+        run.status = PayrollRun.Status.DONE
+        run.finished_at = timezone.now()
+        run.error = ""
+        run.locked_until = None
+        run.save(update_fields=["csv_file", "documents_done", "status", "finished_at", "error", "locked_until"])
+    except Exception as exc:
+        logger.exception("Kỳ lương %s lỗi", run.month)
+        PayrollRun.objects.filter(pk=run.pk).update(
+            status=PayrollRun.Status.FAILED, error=f"{type(exc).__name__}: {exc}", locked_until=None,
+        )
+        caching.bump(PayrollRun)
+        raise
+    caching.bump(PayrollRun, Payslip)
+    return True
+
+
+def pending_runs():
+    return PayrollRun.objects.exclude(status=PayrollRun.Status.DONE).order_by("month")
+
+
+# -------------------- PDF --------------------
+def _ascii(text):
+    # font chuẩn Helvetica của PDF không có dấu tiếng Việt -> bỏ dấu
+    text = str(text).replace("đ", "d").replace("Đ", "D")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+def _money(value):
+    return f"{Decimal(value):,.0f} VND"
+
+
+def pdf_document(lines, title=""):
+    """PDF 1 trang A4, mỗi phần tử của lines là 1 dòng chữ (không cần thư viện ngoài)."""
+    def esc(text):
+        return _ascii(text).replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    body = ["BT", "/F1 16 Tf", "56 780 Td", f"({esc(title)}) Tj", "/F1 11 Tf", "18 TL", "T*", "T*"]
+    for line in lines:
+        body += [f"({esc(line)}) Tj", "T*"]
+    body.append("ET")
+    stream = "\n".join(body).encode("latin-1")
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def payslip_pdf(slip, run):
+    return pdf_document([
+        f"Nhân sự: {slip.full_name} (mã {slip.staff_id})",
+        f"Kỳ lương: {run.month:%m/%Y}",
+        "",
+        f"Lương cơ bản: {_money(slip.base_salary)}",
+        f"Giờ chuẩn: {slip.standard_hours}   Giờ làm: {slip.worked_hours}   Tăng ca: {slip.overtime_hours}",
+        f"Lương theo giờ làm: {_money(slip.base_pay)}",
+        f"Lương tăng ca: {_money(slip.overtime_pay)}",
+        "",
+        f"THỰC LĨNH: {_money(slip.net_pay)}",
+    ], title=f"PHIẾU LƯƠNG THÁNG {run.month:%m/%Y}")
@@ -1,21 +1,28 @@
 # app_hr/serializers.py
 from rest_framework import serializers
 from django.conf import settings
+from django.utils import timezone
 from django.contrib.auth import get_user_model
+from drf_spectacular.utils import extend_schema_field
 
 from app_home.models import Department, Position
-from app_home.serializers import DepartmentSerializer, PositionSerializer  # tái dùng nested serializer đẹp sẵn có
-from .models import StaffProfile, StaffStatus
+from app_home.images import display_url, variant_urls
+from app_home.serializers import IMAGE_VARIANTS_SCHEMA, DynamicFieldsMixin, DepartmentSerializer, PositionSerializer  # tái dùng nested serializer đẹp sẵn có
+from app_home.serializers import request_staff_id
+from .services import CLOCK_SKEW
+from .models import (
+    ClockEvent, PayrollRun, Payslip, Shift, StaffMonthlyTimesheet, StaffPerformanceMetric, StaffProfile, StaffStatus,
+)
 
 User = get_user_model()
 
-class SimpleUserSerializer(serializers.ModelSerializer):
+class SimpleUserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ("id", "username", "email", "first_name", "last_name")
 
 
-class StaffProfileSerializer(serializers.ModelSerializer):
+class StaffProfileSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.all(), allow_null=True, required=False
     )
@@ -31,6 +38,7 @@ class StaffProfileSerializer(serializers.ModelSerializer):
     position_detail = PositionSerializer(source="position", read_only=True)
 
     avatar_url = serializers.SerializerMethodField(read_only=True)
+    avatar_variants = serializers.SerializerMethodField(read_only=True)
 
     status = serializers.ChoiceField(choices=StaffStatus.choices)
 
@@ -46,9 +54,9 @@ class StaffProfileSerializer(serializers.ModelSerializer):
             # work info
             "salary", "start_date",
             "status", "performance",
-            "shifts_this_month", "total_hours",
+            "shifts_this_month", "hours_this_month", "total_hours",
             # media
-            "avatar", "avatar_url",
+            "avatar", "avatar_url", "avatar_variants",
         ]
         extra_kwargs = {
             "full_name": {"help_text": "Họ tên nhân sự"},
@@ -57,20 +65,162 @@ class StaffProfileSerializer(serializers.ModelSerializer):
             "salary": {"help_text": "Lương cơ bản (VND)"},
             "start_date": {"help_text": "Ngày bắt đầu làm việc (YYYY-MM-DD)"},
             "status": {"help_text": "Trạng thái làm việc"},
-            "performance": {"help_text": "Điểm hiệu suất 0..100"},
-            "shifts_this_month": {"help_text": "Số ca trong tháng"},
-            "total_hours": {"help_text": "Tổng giờ làm tích lũy"},
+            "performance": {"help_text": "Điểm hiệu suất 0..100 (tính từ số liệu phục vụ, xem compute_staff_performance)"},
+            "shifts_this_month": {"help_text": "Số ca trong tháng (tự cập nhật khi chấm công)"},
+            "hours_this_month": {"help_text": "Số giờ làm trong tháng (tự cập nhật khi chấm công)"},
+            "total_hours": {"help_text": "Tổng giờ làm tích lũy (tự cập nhật khi chấm công)"},
             "avatar": {"help_text": "Ảnh đại diện (ImageField)"},
         }
 
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        related = []
+        if "user_detail" in fields:
+            related.append("user")
+        if "department_detail" in fields:
+            related.append("department")
+        if "position_detail" in fields:
+            related.append("position__department")
+        return queryset.select_related(*related) if related else queryset
+
     def get_avatar_url(self, obj):
+        return display_url(obj.avatar, obj.avatar_variants, self.context.get("request"), variant="card")
+
+    @extend_schema_field(IMAGE_VARIANTS_SCHEMA)
+    def get_avatar_variants(self, obj):
+        return variant_urls(obj.avatar, obj.avatar_variants, self.context.get("request"))
+
+
+
+# -------------------- CA LÀM / CHẤM CÔNG --------------------
+class ShiftSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    staff = serializers.PrimaryKeyRelatedField(queryset=StaffProfile.objects.all())
+    staff_name = serializers.CharField(source="staff.full_name", read_only=True)
+
+    class Meta:
+        model = Shift
+        fields = ["id", "staff", "staff_name", "date", "start_at", "end_at", "status", "note"]
+        read_only_fields = ["date"]
+        extra_kwargs = {
+            "start_at": {"help_text": "Giờ bắt đầu dự kiến"},
+            "end_at": {"help_text": "Giờ kết thúc dự kiến"},
+            "status": {"help_text": "Trạng thái ca (tự chuyển khi chấm công vào/ra)"},
+        }
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        return queryset.select_related("staff") if "staff_name" in fields else queryset
+
+    def validate(self, attrs):
+        start = attrs.get("start_at", getattr(self.instance, "start_at", None))
+        end = attrs.get("end_at", getattr(self.instance, "end_at", None))
+        if start and end and end <= start:
+            raise serializers.ValidationError({"end_at": "Giờ kết thúc phải sau giờ bắt đầu"})
+        if start:
+            attrs["date"] = timezone.localtime(start).date()
+        return attrs
+
+
+class ClockEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ClockEvent
+        fields = ["id", "staff", "shift", "kind", "at", "worked_minutes"]
+        read_only_fields = fields
+
+
+class ClockInputSerializer(serializers.Serializer):
+    staff = serializers.PrimaryKeyRelatedField(queryset=StaffProfile.objects.all(), help_text="Id hồ sơ nhân sự")
+    shift = serializers.PrimaryKeyRelatedField(queryset=Shift.objects.all(), required=False, allow_null=True,
+                                               help_text="Ca làm (chỉ khi vào ca)")
+    at = serializers.DateTimeField(required=False, help_text="Thời điểm (mặc định: bây giờ; chấm bù chỉ dành cho quản lý)")
+
+    def _is_manager(self):
         request = self.context.get("request")
-        if obj.avatar and hasattr(obj.avatar, "url"):
-            url = obj.avatar.url
-            return request.build_absolute_uri(url) if request else url
-        return None
-
-    def validate_performance(self, value):
-        if value < 0 or value > 100:
-            raise serializers.ValidationError("performance phải trong khoảng 0..100")
+        return bool(request and request.user.is_staff)
+
+    def validate_staff(self, value):
+        # nhân viên chỉ tự chấm công cho mình; quản lý (is_staff) chấm hộ được
+        if not self._is_manager() and value.pk != request_staff_id(self.context.get("request")):
+            raise serializers.ValidationError("Chỉ được chấm công cho chính mình.")
         return value
+
+    def validate_at(self, value):
+        now = timezone.now()
+        if value > now + CLOCK_SKEW:
+            raise serializers.ValidationError("Không chấm công trước cho thời điểm tương lai.")
+        if not self._is_manager() and value < now - CLOCK_SKEW:
+            raise serializers.ValidationError("Chỉ quản lý được chấm công bù.")
+        return value
+
+
+class StaffMonthlyTimesheetSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    staff_name = serializers.CharField(source="staff.full_name", read_only=True)
+    hours = serializers.DecimalField(max_digits=9, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = StaffMonthlyTimesheet
+        fields = ["id", "staff", "staff_name", "month", "shifts", "worked_minutes", "hours", "closed_at", "updated_at"]
+        read_only_fields = fields
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        return queryset.select_related("staff") if "staff_name" in fields else queryset
+
+
+# -------------------- HIỆU SUẤT --------------------
+class StaffPerformanceMetricSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    staff_name = serializers.CharField(source="staff.full_name", read_only=True)
+    avg_prep_seconds = serializers.IntegerField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = StaffPerformanceMetric
+        fields = ["id", "staff", "staff_name", "day", "orders_served", "prep_seconds", "avg_prep_seconds",
+                  "revenue", "computed_at"]
+        read_only_fields = fields
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        return queryset.select_related("staff") if "staff_name" in fields else queryset
+
+
+class StaffPerformanceSummarySerializer(serializers.Serializer):
+    staff = serializers.IntegerField()
+    orders_served = serializers.IntegerField()
+    avg_prep_seconds = serializers.IntegerField(allow_null=True)
+    revenue = serializers.DecimalField(max_digits=16, decimal_places=2)
+
+
+# -------------------- BẢNG LƯƠNG --------------------
+class PayrollRunSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    has_csv = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PayrollRun
+        fields = ["id", "month", "status", "staff_count", "documents_done", "total_net", "has_csv",
+                  "error", "created_at", "computed_at", "finished_at"]
+        read_only_fields = [name for name in fields if name != "month"]
+        extra_kwargs = {
+            # tháng đã có kỳ lương -> create trả về kỳ đó thay vì lỗi unique
+            "month": {"help_text": "Tháng tính lương (ngày bất kỳ trong tháng, đã kết thúc)", "validators": []},
+        }
+
+    def get_has_csv(self, obj) -> bool:
+        return bool(obj.csv_file)
+
+
+class PayslipSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    month = serializers.DateField(source="run.month", read_only=True)
+    has_document = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Payslip
+        fields = ["id", "run", "month", "staff", "full_name", "base_salary", "standard_hours", "worked_hours",
+                  "overtime_hours", "base_pay", "overtime_pay", "net_pay", "has_document"]
+        read_only_fields = fields
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        return queryset.select_related("run") if "month" in fields else queryset
+
+    def get_has_document(self, obj) -> bool:
+        return bool(obj.document)
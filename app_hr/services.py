@@ -0,0 +1,312 @@
+# app_hr/services.py
+"""
+Chấm công và tổng công tháng.
+
+- Mỗi lượt ra ca cộng dồn thẳng vào StaffMonthlyTimesheet (tháng của lượt vào) và các bộ
+  đếm trên StaffProfile bằng UPDATE ... SET x = x + n; không quét lại ClockEvent.
+- StaffProfile.shifts_this_month / hours_this_month chỉ phản ánh tháng hiện tại,
+  total_hours là luỹ kế. Đầu tháng chạy close_timesheet_month để chốt tháng trước và
+  chuyển bộ đếm sang tháng mới cho toàn bộ nhân sự bằng 1 câu UPDATE.
+
+Hiệu suất phục vụ (compute_staff_performance, chạy qua cron):
+- StaffPerformanceMetric giữ tổng theo (nhân sự, ngày): gom Order.handled_by theo ngày
+  completed_at và Payment.received_by theo ngày paid_at, mỗi khúc tối đa 31 ngày.
+- Mỗi lần chạy chỉ tính lại từ ngày đã tính gần nhất, không quét lại lịch sử.
+- StaffProfile.performance = điểm 0..100 trên cửa sổ PERFORMANCE_WINDOW_DAYS ngày,
+  so với người tốt nhất / trung bình toàn đội.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, IntegerField, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from app_home import caching
+from .models import ClockEvent, Shift, StaffMonthlyTimesheet, StaffPerformanceMetric, StaffProfile
+
+HOURS_PER_MINUTE = Decimal(1) / Decimal(60)
+# độ lệch đồng hồ cho phép giữa thiết bị chấm công và server; quá mức này chỉ quản lý được chấm bù
+CLOCK_SKEW = timedelta(minutes=5)
+
+
+class ClockError(ValueError):
+    """Thao tác chấm công không hợp lệ (vào ca 2 lần, ra ca khi chưa vào...)."""
+
+
+def month_start(value):
+    if isinstance(value, datetime):
+        value = timezone.localtime(value).date()
+    return value.replace(day=1)
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _hours(minutes):
+    return (Decimal(minutes) * HOURS_PER_MINUTE).quantize(Decimal("0.01"))
+
+
+def _day_start(d):
+    return timezone.make_aware(datetime.combine(d, time.min))
+
+
+def _month_range(month):
+    return _day_start(month), _day_start(next_month(month))
+
+
+def _add_to_timesheet(staff_id, month, shifts, minutes, now):
+    changes = {"shifts": F("shifts") + shifts, "worked_minutes": F("worked_minutes") + minutes, "updated_at": now}
+    if StaffMonthlyTimesheet.objects.filter(staff_id=staff_id, month=month).update(**changes):
+        return
+    sheet, created = StaffMonthlyTimesheet.objects.get_or_create(
+        staff_id=staff_id, month=month, defaults={"shifts": shifts, "worked_minutes": minutes},
+    )
+    if not created:
+        StaffMonthlyTimesheet.objects.filter(pk=sheet.pk).update(**changes)
+
+
+# -------------------- CHẤM CÔNG --------------------
+def _last_event(staff_id):
+    return ClockEvent.objects.filter(staff_id=staff_id).order_by("-at", "-id").first()
+
+
+@transaction.atomic
+def clock_in(staff, shift=None, at=None):
+    at = at or timezone.now()
+    # khoá hồ sơ -> 2 thiết bị bấm cùng lúc không tạo 2 lượt vào
+    StaffProfile.objects.select_for_update().filter(pk=staff.pk).exists()
+    last = _last_event(staff.pk)
+    if last is not None and last.kind == ClockEvent.Kind.IN:
+        raise ClockError("Nhân sự đang trong ca, cần ra ca trước.")
+    if last is not None and at < last.at:
+        raise ClockError("Thời điểm vào ca phải sau lượt chấm công trước.")
+    if shift is not None:
+        if shift.staff_id != staff.pk:
+            raise ClockError("Ca làm không thuộc nhân sự này.")
+        Shift.objects.filter(pk=shift.pk).update(status=Shift.Status.IN_PROGRESS)
+    return ClockEvent.objects.create(staff=staff, shift=shift, kind=ClockEvent.Kind.IN, at=at)
+
+
+@transaction.atomic
+def clock_out(staff, at=None):
+    """Ghi lượt ra ca và cộng số phút (tính từ lượt vào tương ứng) vào tổng công tháng."""
+    at = at or timezone.now()
+    StaffProfile.objects.select_for_update().filter(pk=staff.pk).exists()
+    last = _last_event(staff.pk)
+    if last is None or last.kind != ClockEvent.Kind.IN:
+        raise ClockError("Nhân sự chưa vào ca.")
+    if at <= last.at:
+        raise ClockError("Thời điểm ra ca phải sau thời điểm vào ca.")
+
+    minutes = int((at - last.at).total_seconds() // 60)
+    event = ClockEvent.objects.create(
+        staff=staff, shift_id=last.shift_id, kind=ClockEvent.Kind.OUT, at=at, worked_minutes=minutes,
+    )
+    if last.shift_id:
+        Shift.objects.filter(pk=last.shift_id).update(status=Shift.Status.DONE)
+
+    # ca tính cho tháng của lượt vào (ca qua đêm cuối tháng vẫn thuộc tháng cũ)
+    month = month_start(last.at)
+    now = timezone.now()
+    _add_to_timesheet(staff.pk, month, 1, minutes, now)
+    hours = _hours(minutes)
+    changes = {"total_hours": F("total_hours") + hours, "updated_at": now}
+    if month == month_start(now):
+        changes.update(shifts_this_month=F("shifts_this_month") + 1, hours_this_month=F("hours_this_month") + hours)
+    StaffProfile.objects.filter(pk=staff.pk).update(**changes)
+    # update() không phát post_save -> tự tăng version cho ETag / cache danh sách
+    caching.bump(StaffProfile, StaffMonthlyTimesheet)
+    return event
+
+
+# -------------------- CHỐT THÁNG --------------------
+@transaction.atomic
+def close_month(month):
+    """
+    Chốt bảng công `month` và chuyển bộ đếm tháng của StaffProfile sang tháng kế tiếp.
+    Chạy lại an toàn: chỉ ghi closed_at cho bảng chưa chốt, bộ đếm luôn lấy lại từ bảng công.
+    Trả về số bảng công vừa chốt.
+    """
+    month = month_start(month)
+    following = next_month(month)
+    now = timezone.now()
+
+    # nhân sự không có lượt chấm công nào trong tháng vẫn có dòng 0 để báo cáo/tính lương
+    StaffMonthlyTimesheet.objects.bulk_create(
+        [StaffMonthlyTimesheet(staff_id=pk, month=month)
+         for pk in StaffProfile.objects.exclude(timesheets__month=month).values_list("pk", flat=True)],
+        ignore_conflicts=True,
+    )
+    closed = (
+        StaffMonthlyTimesheet.objects
+        .filter(month=month, closed_at__isnull=True)
+        .update(closed_at=now, updated_at=now)
+    )
+
+    # ca đã xếp nhưng không ai vào -> vắng
+    start, end = _month_range(month)
+    Shift.objects.filter(status=Shift.Status.SCHEDULED, end_at__gte=start, end_at__lt=min(end, now)).update(
+        status=Shift.Status.MISSED,
+    )
+
+    # bộ đếm "tháng này" = bảng công của tháng kế tiếp (lượt chấm công đã có sẵn, nếu chạy trễ)
+    if following == month_start(now):
+        sheet = StaffMonthlyTimesheet.objects.filter(staff_id=OuterRef("pk"), month=following)
+        StaffProfile.objects.update(
+            shifts_this_month=Coalesce(Subquery(sheet.values("shifts")[:1]), Value(0),
+                                       output_field=IntegerField()),
+            hours_this_month=Coalesce(
+                Subquery(sheet.annotate(
+                    # 60.0: tránh chia nguyên trên SQLite
+                    h=ExpressionWrapper(F("worked_minutes") / Value(60.0),
+                                        output_field=DecimalField(max_digits=7, decimal_places=2)),
+                ).values("h")[:1]),
+                Value(Decimal("0")),
+                output_field=DecimalField(max_digits=7, decimal_places=2),
+            ),
+            updated_at=now,
+        )
+    caching.bump(StaffProfile, StaffMonthlyTimesheet, Shift)
+    return closed
+
+
+# -------------------- HIỆU SUẤT --------------------
+ZERO = Decimal("0")
+METRIC_CHUNK_DAYS = 31
+PERFORMANCE_WINDOW_DAYS = 30
+# trọng số điểm hiệu suất: số đơn, doanh thu, tốc độ chế biến
+PERFORMANCE_WEIGHTS = {"orders": 40, "revenue": 30, "speed": 30}
+
+
+def _metric_rows(day_from, day_to):
+    """{(staff_id, ngày): số liệu} cho khoảng ngày – 2 query gom nhóm trên cột có index."""
+    from app_order.models import SIGNED_AMOUNT, Order, Payment
+
+    start, stop = _day_start(day_from), _day_start(day_to + timedelta(days=1))
+    rows = defaultdict(lambda: {"orders_served": 0, "prep_seconds": 0, "revenue": ZERO})
+    orders = (
+        Order.objects
+        .filter(completed_at__gte=start, completed_at__lt=stop, handled_by__isnull=False,
+                order_status=Order.OrderStatus.COMPLETED)
+        .annotate(day=TruncDate("completed_at"))
+        .values("handled_by", "day")
+        .annotate(n=Count("id"), prep=Sum(F("completed_at") - F("created_at")))
+    )
+    for r in orders:
+        row = rows[(r["handled_by"], r["day"])]
+        row["orders_served"] = r["n"]
+        row["prep_seconds"] = max(int(r["prep"].total_seconds()), 0) if r["prep"] else 0
+    payments = (
+        Payment.objects
+        .filter(paid_at__gte=start, paid_at__lt=stop, received_by__isnull=False)
+        .annotate(day=TruncDate("paid_at"))
+        .values("received_by", "day")
+        .annotate(s=Sum(SIGNED_AMOUNT))
+    )
+    for r in payments:
+        rows[(r["received_by"], r["day"])]["revenue"] = r["s"] or ZERO
+    return rows
+
+
+@transaction.atomic
+def compute_performance_metrics(day_from, day_to):
+    """Tính lại StaffPerformanceMetric cho [day_from, day_to]. Chạy lại bao nhiêu lần cũng ra cùng kết quả."""
+    written = 0
+    day = day_from
+    while day <= day_to:
+        end = min(day + timedelta(days=METRIC_CHUNK_DAYS - 1), day_to)
+        rows = _metric_rows(day, end)
+        StaffPerformanceMetric.objects.filter(day__gte=day, day__lte=end).delete()
+        StaffPerformanceMetric.objects.bulk_create(
+            [StaffPerformanceMetric(staff_id=staff_id, day=d, **values) for (staff_id, d), values in rows.items()],
+            batch_size=1000,
+        )
+        written += len(rows)
+        day = end + timedelta(days=1)
+    # bulk_create không phát post_save -> tự tăng version cho ETag
+    caching.bump(StaffPerformanceMetric)
+    return written
+
+
+def pending_metric_range(today=None):
+    """
+    Khoảng ngày cần tính ở lần chạy kế tiếp: từ ngày đã tính gần nhất (tính lại vì có thể
+    còn đơn hoàn tất sau lần chạy trước) tới hôm nay. Chưa tính lần nào -> từ đơn đầu tiên.
+    """
+    from app_order.models import Order
+
+    today = today or timezone.localdate()
+    last = StaffPerformanceMetric.objects.aggregate(d=Max("day"))["d"]
+    if last is None:
+        first = (
+            Order.objects.filter(completed_at__isnull=False)
+            .order_by("completed_at").values_list("completed_at", flat=True).first()
+        )
+        last = timezone.localtime(first).date() if first else today
+    return min(last, today), today
+
+
+def performance_summary(day_from, day_to):
+    """Tổng theo nhân sự trên cửa sổ ngày (1 query trên index (day, staff))."""
+    rows = (
+        StaffPerformanceMetric.objects
+        .filter(day__gte=day_from, day__lte=day_to)
+        .values("staff")
+        .annotate(orders_served=Sum("orders_served"), prep_seconds=Sum("prep_seconds"), revenue=Sum("revenue"))
+        .order_by("staff")
+    )
+    result = []
+    for r in rows:
+        served = r["orders_served"] or 0
+        result.append({
+            "staff": r["staff"],
+            "orders_served": served,
+            "avg_prep_seconds": round(r["prep_seconds"] / served) if served else None,
+            "revenue": r["revenue"] or ZERO,
+        })
+    return result
+
+
+def _scores(summary):
+    max_orders = max((r["orders_served"] for r in summary), default=0)
+    max_revenue = max((r["revenue"] for r in summary), default=ZERO)
+    preps = [r["avg_prep_seconds"] for r in summary if r["avg_prep_seconds"]]
+    team_prep = sum(preps) / len(preps) if preps else None
+
+    weights = PERFORMANCE_WEIGHTS
+    scores = {}
+    for r in summary:
+        score = 0.0
+        if max_orders:
+            score += weights["orders"] * r["orders_served"] / max_orders
+        if max_revenue:
+            score += weights["revenue"] * float(r["revenue"] / max_revenue)
+        if team_prep and r["avg_prep_seconds"]:
+            # nhanh hơn trung bình đội -> đủ điểm
+            score += weights["speed"] * min(1.0, team_prep / r["avg_prep_seconds"])
+        scores[r["staff"]] = max(0, min(100, round(score)))
+    return scores
+
+
+@transaction.atomic
+def refresh_performance(today=None, window_days=PERFORMANCE_WINDOW_DAYS):
+    """Ghi StaffProfile.performance từ số liệu window_days ngày gần nhất. Trả số hồ sơ thay đổi."""
+    today = today or timezone.localdate()
+    scores = _scores(performance_summary(today - timedelta(days=window_days - 1), today))
+    now = timezone.now()
+
+    changed = []
+    for profile in StaffProfile.objects.only("pk", "performance"):
+        score = scores.get(profile.pk, 0)
+        if profile.performance != score:
+            profile.performance = score
+            profile.updated_at = now
+            changed.append(profile)
+    if changed:
+        StaffProfile.objects.bulk_update(changed, ["performance", "updated_at"], batch_size=500)
+        caching.bump(StaffProfile)
+    return len(changed)
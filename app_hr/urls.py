@@ -1,11 +1,20 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import StaffProfileViewSet
+from .views import (
+    ClockEventViewSet, PayrollRunViewSet, PayslipViewSet, ShiftViewSet, StaffMonthlyTimesheetViewSet,
+    StaffPerformanceMetricViewSet, StaffProfileViewSet,
+)
 
 router = DefaultRouter()
 app_name = "app_hr"
 
 router.register(r"staff-profiles", StaffProfileViewSet, basename="hr-staff-profiles")
+router.register(r"shifts", ShiftViewSet, basename="hr-shifts")
+router.register(r"clock-events", ClockEventViewSet, basename="hr-clock-events")
+router.register(r"timesheets", StaffMonthlyTimesheetViewSet, basename="hr-timesheets")
+router.register(r"performance-metrics", StaffPerformanceMetricViewSet, basename="hr-performance-metrics")
+router.register(r"payroll-runs", PayrollRunViewSet, basename="hr-payroll-runs")
+router.register(r"payslips", PayslipViewSet, basename="hr-payslips")
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -1,19 +1,40 @@
 # app_hr/views.py
-from django.db.models import Q
+from datetime import timedelta
+
+import os
+
+from django.http import FileResponse
+from django.utils import timezone
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from drf_spectacular.utils import (
     extend_schema, extend_schema_view, OpenApiParameter, OpenApiTypes
 )
 
+from app_home.caching import ConditionalGetMixin
 from app_home.pagination import CustomPagination
+from app_home.filters import (
+    SparseFieldsMixin, OrderingMixin, DeclarativeFilterBackend, ChoiceFilter, DateFilter, DecimalFilter, IntegerFilter,
+    query_param,
+)
+from app_home.search import search_queryset
 from app_home.models import Department, Position
-from .models import StaffProfile, StaffStatus
-from .serializers import StaffProfileSerializer
+from . import payroll, services
+from .models import (
+    ClockEvent, PayrollRun, Payslip, Shift, StaffMonthlyTimesheet, StaffPerformanceMetric, StaffProfile, StaffStatus,
+)
+from .serializers import (
+    ClockEventSerializer, ClockInputSerializer, PayrollRunSerializer, PayslipSerializer, ShiftSerializer,
+    StaffMonthlyTimesheetSerializer, StaffPerformanceMetricSerializer, StaffPerformanceSummarySerializer,
+    StaffProfileSerializer, User,
+)
 
-class CommonViewSet(viewsets.ModelViewSet):
+class CommonViewSet(ConditionalGetMixin, SparseFieldsMixin, OrderingMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = CustomPagination
+    filter_backends = [DeclarativeFilterBackend]
 
 
 # -------------------- STAFF PROFILE --------------------
@@ -35,8 +56,13 @@ class CommonViewSet(viewsets.ModelViewSet):
                              description="Lọc start_date >= date_from (YYYY-MM-DD)"),
             OpenApiParameter("date_to", OpenApiTypes.DATE, OpenApiParameter.QUERY,
                              description="Lọc start_date <= date_to (YYYY-MM-DD)"),
+            OpenApiParameter("min_hours", OpenApiTypes.NUMBER, OpenApiParameter.QUERY,
+                             description="Lọc hours_this_month >= min_hours"),
+            OpenApiParameter("max_hours", OpenApiTypes.NUMBER, OpenApiParameter.QUERY,
+                             description="Lọc hours_this_month <= max_hours"),
             OpenApiParameter("ordering", OpenApiTypes.STR, OpenApiParameter.QUERY,
-                             description="Ví dụ: 'full_name', '-salary', 'department__name', 'position__name'"),
+                             description="Cho phép: 'full_name' (mặc định), 'salary', 'start_date', 'status', 'department', 'position', "
+                                         "'shifts_this_month', 'hours_this_month', 'total_hours'; '-' để giảm dần"),
         ],
     ),
     retrieve=extend_schema(summary="Chi tiết hồ sơ nhân sự"),
@@ -47,42 +73,317 @@ class CommonViewSet(viewsets.ModelViewSet):
 )
 class StaffProfileViewSet(CommonViewSet):
     serializer_class = StaffProfileSerializer
+    cache_tables = (StaffProfile, User, Department, Position,)
+    ordering_fields = {
+        "full_name": ("full_name",),
+        "salary": ("salary",),
+        "start_date": ("start_date",),
+        "status": ("status", "full_name"),
+        "department": ("department", "full_name"),
+        "position": ("position", "full_name"),
+        "shifts_this_month": ("shifts_this_month",),
+        "hours_this_month": ("hours_this_month",),
+        "total_hours": ("total_hours",),
+    }
+    default_ordering = ("full_name",)
+    query_filters = {
+        "status": ChoiceFilter("status", StaffStatus.choices),
+        "department": IntegerFilter("department_id"),
+        "position": IntegerFilter("position_id"),
+        "date_from": DateFilter("start_date", "gte"),
+        "date_to": DateFilter("start_date", "lte"),
+        "min_hours": DecimalFilter("hours_this_month", "gte"),
+        "max_hours": DecimalFilter("hours_this_month", "lte"),
+    }
 
     def get_queryset(self):
-        qs = (
-            StaffProfile.objects
-            .select_related("user", "department", "position")
-        )
+        # chỉ join user / department / position khi field *_detail tương ứng được trả về
+        qs = self.optimize_queryset(StaffProfile.objects.all())
 
-        # --- filters ---
+        # status / department / position / date_* -> query_filters (DeclarativeFilterBackend)
         params = self.request.query_params
         search = params.get("search")
-        status_val = params.get("status")
-        department_id = params.get("department")
-        position_id = params.get("position")
-        date_from = params.get("date_from")
-        date_to = params.get("date_to")
-        ordering = params.get("ordering", "full_name")
-
         if search:
-            qs = qs.filter(
-                Q(full_name__icontains=search) |
-                Q(email__icontains=search) |
-                Q(phone__icontains=search)
-            )
-        if status_val:
-            qs = qs.filter(status=status_val)
-        if department_id:
-            qs = qs.filter(department_id=department_id)
-        if position_id:
-            qs = qs.filter(position_id=position_id)
-        if date_from:
-            qs = qs.filter(start_date__gte=date_from)
-        if date_to:
-            qs = qs.filter(start_date__lte=date_to)
-
-        if "," in ordering:
-            fields = [f.strip() for f in ordering.split(",") if f.strip()]
-            return qs.order_by(*fields)
-
-        return qs.order_by(ordering)
+            qs = search_queryset(qs, search, rank="ordering" not in params)
+            if "ordering" not in params:
+                return qs
+
+        return self.order_queryset(qs)
+
+
+# -------------------- CA LÀM --------------------
+@extend_schema(tags=["app_hr"])
+@extend_schema_view(
+    list=extend_schema(
+        summary="Lịch ca làm",
+        parameters=[
+            OpenApiParameter("staff", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Lọc theo id nhân sự"),
+            OpenApiParameter("date_from", OpenApiTypes.DATE, OpenApiParameter.QUERY, description="Từ ngày (YYYY-MM-DD)"),
+            OpenApiParameter("date_to", OpenApiTypes.DATE, OpenApiParameter.QUERY, description="Đến ngày (YYYY-MM-DD)"),
+            OpenApiParameter("status", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                             description=f"Lọc theo trạng thái: {', '.join([s for s, _ in Shift.Status.choices])}"),
+            OpenApiParameter("ordering", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                             description="Cho phép: 'date' (mặc định), 'staff'; '-' để giảm dần"),
+        ],
+    ),
+    retrieve=extend_schema(summary="Chi tiết ca làm"),
+    create=extend_schema(summary="Xếp ca làm"),
+    update=extend_schema(summary="Cập nhật ca làm (PUT)"),
+    partial_update=extend_schema(summary="Cập nhật ca làm (PATCH)"),
+    destroy=extend_schema(summary="Xoá ca làm"),
+)
+class ShiftViewSet(CommonViewSet):
+    serializer_class = ShiftSerializer
+    cache_tables = (Shift, StaffProfile)
+    ordering_fields = {
+        "date": ("date", "start_at"),
+        "staff": ("staff", "date", "start_at"),
+    }
+    default_ordering = ("date",)
+    query_filters = {
+        "staff": IntegerFilter("staff_id"),
+        "date_from": DateFilter("date", "gte"),
+        "date_to": DateFilter("date", "lte"),
+        "status": ChoiceFilter("status", Shift.Status.choices),
+    }
+
+    def get_queryset(self):
+        return self.order_queryset(self.optimize_queryset(Shift.objects.all()))
+
+
+# -------------------- CHẤM CÔNG --------------------
+@extend_schema(tags=["app_hr"])
+@extend_schema_view(
+    list=extend_schema(
+        summary="Lịch sử chấm công",
+        parameters=[
+            OpenApiParameter("staff", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Lọc theo id nhân sự"),
+        ],
+    ),
+    retrieve=extend_schema(summary="Chi tiết lượt chấm công"),
+)
+class ClockEventViewSet(ConditionalGetMixin, SparseFieldsMixin, OrderingMixin, viewsets.ReadOnlyModelViewSet):
+    """Lượt chấm công chỉ sinh qua clock-in / clock-out, không sửa tay."""
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CustomPagination
+    filter_backends = [DeclarativeFilterBackend]
+    serializer_class = ClockEventSerializer
+    cache_tables = (ClockEvent,)
+    ordering_fields = {"at": ("at",)}
+    default_ordering = ("-at",)
+    query_filters = {
+        "staff": IntegerFilter("staff_id"),
+    }
+
+    def get_queryset(self):
+        return self.order_queryset(ClockEvent.objects.all())
+
+    def _clock(self, request, func):
+        data = ClockInputSerializer(data=request.data, context={"request": request})
+        data.is_valid(raise_exception=True)
+        kwargs = {"at": data.validated_data.get("at")}
+        if func is services.clock_in:
+            kwargs["shift"] = data.validated_data.get("shift")
+        try:
+            event = func(data.validated_data["staff"], **kwargs)
+        except services.ClockError as exc:
+            raise ValidationError({"detail": str(exc)})
+        return Response(ClockEventSerializer(event).data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(summary="Vào ca", request=ClockInputSerializer, responses=ClockEventSerializer)
+    @action(detail=False, methods=["post"], url_path="clock-in")
+    def clock_in(self, request):
+        return self._clock(request, services.clock_in)
+
+    @extend_schema(summary="Ra ca", description="Cộng số phút làm vào bảng công tháng và bộ đếm của hồ sơ nhân sự.",
+                   request=ClockInputSerializer, responses=ClockEventSerializer)
+    @action(detail=False, methods=["post"], url_path="clock-out")
+    def clock_out(self, request):
+        return self._clock(request, services.clock_out)
+
+
+# -------------------- BẢNG CÔNG THÁNG --------------------
+@extend_schema(tags=["app_hr"])
+@extend_schema_view(
+    list=extend_schema(
+        summary="Bảng công tháng",
+        parameters=[
+            OpenApiParameter("month", OpenApiTypes.DATE, OpenApiParameter.QUERY,
+                             description="Ngày đầu tháng (YYYY-MM-01)"),
+            OpenApiParameter("staff", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Lọc theo id nhân sự"),
+            OpenApiParameter("ordering", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                             description="Cho phép: 'month' (mặc định), 'staff'; '-' để giảm dần"),
+        ],
+    ),
+    retrieve=extend_schema(summary="Chi tiết bảng công tháng"),
+)
+class StaffMonthlyTimesheetViewSet(ConditionalGetMixin, SparseFieldsMixin, OrderingMixin, viewsets.ReadOnlyModelViewSet):
+    """Chỉ đọc: số liệu do services.clock_out / close_month cập nhật."""
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CustomPagination
+    filter_backends = [DeclarativeFilterBackend]
+    serializer_class = StaffMonthlyTimesheetSerializer
+    cache_tables = (StaffMonthlyTimesheet, StaffProfile)
+    ordering_fields = {
+        "month": ("month", "worked_minutes"),
+        "staff": ("staff", "month"),
+    }
+    default_ordering = ("-month",)
+    query_filters = {
+        "month": DateFilter("month"),
+        "staff": IntegerFilter("staff_id"),
+    }
+
+    def get_queryset(self):
+        return self.order_queryset(self.optimize_queryset(StaffMonthlyTimesheet.objects.all()))
+
+
+# -------------------- HIỆU SUẤT --------------------
+@extend_schema(tags=["app_hr"])
+@extend_schema_view(
+    list=extend_schema(
+        summary="Số liệu phục vụ theo ngày",
+        parameters=[
+            OpenApiParameter("date_from", OpenApiTypes.DATE, OpenApiParameter.QUERY, description="Từ ngày (YYYY-MM-DD)"),
+            OpenApiParameter("date_to", OpenApiTypes.DATE, OpenApiParameter.QUERY, description="Đến ngày (YYYY-MM-DD)"),
+            OpenApiParameter("staff", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Lọc theo id nhân sự"),
+            OpenApiParameter("ordering", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                             description="Cho phép: 'day' (mặc định), 'staff'; '-' để giảm dần"),
+        ],
+    ),
+    retrieve=extend_schema(summary="Chi tiết số liệu phục vụ"),
+)
+class StaffPerformanceMetricViewSet(ConditionalGetMixin, SparseFieldsMixin, OrderingMixin, viewsets.ReadOnlyModelViewSet):
+    """Chỉ đọc: số liệu do lệnh compute_staff_performance tính."""
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CustomPagination
+    filter_backends = [DeclarativeFilterBackend]
+    serializer_class = StaffPerformanceMetricSerializer
+    cache_tables = (StaffPerformanceMetric, StaffProfile)
+    ordering_fields = {
+        "day": ("day", "staff"),
+        "staff": ("staff", "day"),
+    }
+    default_ordering = ("-day",)
+    query_filters = {
+        "date_from": DateFilter("day", "gte"),
+        "date_to": DateFilter("day", "lte"),
+        "staff": IntegerFilter("staff_id"),
+    }
+
+    def get_queryset(self):
+        return self.order_queryset(self.optimize_queryset(StaffPerformanceMetric.objects.all()))
+
+    @extend_schema(
+        summary="Tổng hợp hiệu suất theo nhân sự",
+        parameters=[
+            OpenApiParameter("date_from", OpenApiTypes.DATE, OpenApiParameter.QUERY,
+                             description=f"Từ ngày (mặc định: {services.PERFORMANCE_WINDOW_DAYS} ngày gần nhất)"),
+            OpenApiParameter("date_to", OpenApiTypes.DATE, OpenApiParameter.QUERY, description="Đến ngày (mặc định: hôm nay)"),
+        ],
+        responses=StaffPerformanceSummarySerializer(many=True),
+    )
+    @action(detail=False, methods=["get"], url_path="summary")
+    def summary(self, request):
+        params = request.query_params
+        date_to = query_param(params, "date_to", self.query_filters["date_to"], timezone.localdate())
+        date_from = query_param(params, "date_from", self.query_filters["date_from"],
+                                date_to - timedelta(days=services.PERFORMANCE_WINDOW_DAYS - 1))
+        if date_from > date_to:
+            raise ValidationError({"date_from": "Phải <= date_to"})
+        rows = services.performance_summary(date_from, date_to)
+        return Response({
+            "date_from": date_from,
+            "date_to": date_to,
+            "results": StaffPerformanceSummarySerializer(rows, many=True).data,
+        })
+
+
+# -------------------- BẢNG LƯƠNG --------------------
+def _download(fieldfile):
+    if not fieldfile:
+        raise NotFound("File chưa được tạo, kỳ lương đang xử lý.")
+    return FileResponse(fieldfile.open("rb"), as_attachment=True, filename=os.path.basename(fieldfile.name))
+
+
+@extend_schema(tags=["app_hr"])
+@extend_schema_view(
+    list=extend_schema(
+        summary="Danh sách kỳ lương",
+        parameters=[
+            OpenApiParameter("status", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                             description=f"Lọc theo trạng thái: {', '.join([s for s, _ in PayrollRun.Status.choices])}"),
+        ],
+    ),
+    retrieve=extend_schema(summary="Chi tiết / tiến độ kỳ lương"),
+    create=extend_schema(
+        summary="Tạo kỳ lương",
+        description="Chỉ xếp hàng kỳ lương (202); lệnh process_payroll_runs tính lương và xuất PDF/CSV. "
+                    "Tháng đã có kỳ lương -> trả về kỳ đó (200).",
+    ),
+)
+class PayrollRunViewSet(ConditionalGetMixin, SparseFieldsMixin, OrderingMixin, viewsets.ModelViewSet):
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = CustomPagination
+    filter_backends = [DeclarativeFilterBackend]
+    http_method_names = ["get", "post", "head", "options"]
+    serializer_class = PayrollRunSerializer
+    cache_tables = (PayrollRun,)
+    ordering_fields = {"month": ("month",)}
+    default_ordering = ("-month",)
+    query_filters = {
+        "status": ChoiceFilter("status", PayrollRun.Status.choices),
+    }
+
+    def get_queryset(self):
+        return self.order_queryset(PayrollRun.objects.all())
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            run, created = payroll.create_run(serializer.validated_data["month"], created_by_id=request.user.id)
+        except ValueError as exc:
+            raise ValidationError({"month": str(exc)})
+        return Response(self.get_serializer(run).data,
+                        status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK)
+
+    @extend_schema(summary="Tải bảng lương CSV", responses={(200, "text/csv"): OpenApiTypes.BINARY})
+    @action(detail=True, methods=["get"], url_path="csv")
+    def csv(self, request, pk=None):
+        return _download(self.get_object().csv_file)
+
+
+@extend_schema(tags=["app_hr"])
+@extend_schema_view(
+    list=extend_schema(
+        summary="Phiếu lương",
+        parameters=[
+            OpenApiParameter("run", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Lọc theo id kỳ lương"),
+            OpenApiParameter("staff", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Lọc theo id nhân sự"),
+        ],
+    ),
+    retrieve=extend_schema(summary="Chi tiết phiếu lương"),
+)
+class PayslipViewSet(ConditionalGetMixin, SparseFieldsMixin, OrderingMixin, viewsets.ReadOnlyModelViewSet):
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = CustomPagination
+    filter_backends = [DeclarativeFilterBackend]
+    serializer_class = PayslipSerializer
+    cache_tables = (Payslip, PayrollRun)
+    ordering_fields = {
+        "staff": ("staff", "run"),
+    }
+    default_ordering = ("staff",)
+    query_filters = {
+        "staff": IntegerFilter("staff_id"),
+        "run": IntegerFilter("run_id"),
+    }
+
+    def get_queryset(self):
+        return self.order_queryset(self.optimize_queryset(Payslip.objects.all()))
+
+    @extend_schema(summary="Tải phiếu lương PDF", responses={(200, "application/pdf"): OpenApiTypes.BINARY})
+    @action(detail=True, methods=["get"], url_path="pdf")
+    def pdf(self, request, pk=None):
+        return _download(self.get_object().document)
@@ -1,6 +1,6 @@
 # app_inventory/admin.py
 from django.contrib import admin
-from .models import Supplier, Ingredient, InventoryLot
+from .models import Supplier, Ingredient, InventoryLot, LotConsumption, InventoryValuationSnapshot
 from django import forms
 
 
@@ -41,6 +41,10 @@ class IngredientAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # annotate tồn kho 1 lần cho cả trang thay vì aggregate theo từng dòng
+        return super().get_queryset(request).select_related("category", "unit").with_stock()
+
     def current_stock_display(self, obj):
         return obj.current_stock
     current_stock_display.short_description = "Tồn kho hiện tại"
@@ -60,4 +64,23 @@ class InventoryLotForm(forms.ModelForm):
 class InventoryLotAdmin(admin.ModelAdmin):
     form = InventoryLotForm
     list_display = ("ingredient","supplier","quantity_received","quantity_remaining",
-                    "unit_price","received_date","expiry_date")
\ No newline at end of file
+                    "unit_price","received_date","expiry_date")
+
+
+@admin.register(LotConsumption)
+class LotConsumptionAdmin(admin.ModelAdmin):
+    list_display = ("ingredient", "lot", "order", "quantity", "unit_price", "total_cost", "consumed_at")
+    list_filter = ("consumed_at",)
+    search_fields = ("ingredient__name", "order__order_number")
+    ordering = ("-consumed_at",)
+    list_select_related = ("ingredient", "lot__ingredient", "order")
+    raw_id_fields = ("lot", "order")
+
+
+@admin.register(InventoryValuationSnapshot)
+class InventoryValuationSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("period_end", "ingredient", "category", "quantity", "value")
+    list_filter = ("period_end", "category")
+    search_fields = ("ingredient__name",)
+    ordering = ("-period_end", "ingredient__name")
+    list_select_related = ("ingredient", "category")
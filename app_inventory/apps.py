@@ -4,3 +4,22 @@ from django.apps import AppConfig
 class AppInventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app_inventory'
+
+    def ready(self):
+        from app_home import caching, search
+        from app_home.models import IngredientCategory
+        from .models import Supplier, Ingredient, InventoryLot
+        from .signals import stock_consumed
+
+        search.register(Supplier, {"name": 3, "contact_name": 2, "phone": 1, "email": 1}, contains=("phone", "email"))
+        search.register(
+            Ingredient, {"name": 3, "category__name": 1},
+            depends_on={IngredientCategory: "category"},
+        )
+
+        caching.track(Supplier, Ingredient, InventoryLot)
+        # xuất kho FIFO dùng bulk_update (không có post_save)
+        stock_consumed.connect(
+            lambda sender, **kwargs: caching.bump(InventoryLot),
+            weak=False, dispatch_uid="table_version_stock_consumed",
+        )
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from app_inventory.services import take_valuation_snapshot
+
+
+class Command(BaseCommand):
+    help = "Chốt giá trị tồn kho cuối kỳ (mặc định: ngày cuối tháng trước). Chạy qua cron đầu mỗi tháng."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Ngày chốt YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        if options["date"]:
+            period_end = parse_date(options["date"])
+            if period_end is None:
+                raise CommandError("--date phải có dạng YYYY-MM-DD")
+        else:
+            period_end = timezone.localdate().replace(day=1) - timedelta(days=1)
+
+        rows = take_valuation_snapshot(period_end)
+        total = sum(r.value for r in rows)
+        self.stdout.write(self.style.SUCCESS(
+            f"Đã chốt {len(rows)} nguyên liệu tại {period_end}, tổng giá trị {total}"
+        ))
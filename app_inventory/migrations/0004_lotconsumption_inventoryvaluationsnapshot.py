@@ -0,0 +1,54 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:03
+
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_home', '0003_alter_unit_options_alter_unit_code'),
+        ('app_inventory', '0003_alter_ingredient_options_alter_inventorylot_options_and_more'),
+        ('app_order', '0002_alter_order_options_alter_orderitem_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryValuationSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_end', models.DateField(verbose_name='Ngày chốt')),
+                ('quantity', models.DecimalField(decimal_places=3, default=0, max_digits=14, verbose_name='Số lượng tồn')),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Giá trị tồn')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Ngày tạo')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='valuation_snapshots', to='app_home.ingredientcategory', verbose_name='Danh mục')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuation_snapshots', to='app_inventory.ingredient', verbose_name='Nguyên liệu')),
+            ],
+            options={
+                'verbose_name': 'Chốt giá trị tồn kho',
+                'verbose_name_plural': 'Chốt giá trị tồn kho',
+                'indexes': [models.Index(fields=['period_end'], name='app_invento_period__1f8bf3_idx')],
+                'constraints': [models.UniqueConstraint(fields=('period_end', 'ingredient'), name='uniq_valuation_period_ingredient')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LotConsumption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=3, max_digits=12, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Số lượng xuất')),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Đơn giá vốn')),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Giá vốn')),
+                ('consumed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Thời điểm xuất')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consumptions', to='app_inventory.ingredient', verbose_name='Nguyên liệu')),
+                ('lot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consumptions', to='app_inventory.inventorylot', verbose_name='Lô nhập')),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lot_consumptions', to='app_order.order', verbose_name='Đơn hàng')),
+            ],
+            options={
+                'verbose_name': 'Xuất kho theo lô',
+                'verbose_name_plural': 'Xuất kho theo lô',
+                'indexes': [models.Index(fields=['consumed_at'], name='app_invento_consume_286d5a_idx'), models.Index(fields=['ingredient', 'consumed_at'], name='app_invento_ingredi_7ffbde_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_home', '0005_ordering_indexes'),
+        ('app_inventory', '0004_lotconsumption_inventoryvaluationsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['category', 'name'], name='app_invento_categor_b9a677_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['status'], name='app_invento_status_095957_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['last_updated'], name='app_invento_last_up_ab5566_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorylot',
+            index=models.Index(fields=['ingredient', 'received_date'], name='app_invento_ingredi_7f96c3_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_home', '0005_ordering_indexes'),
+        ('app_inventory', '0005_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['category', 'is_active', 'status'], name='app_invento_categor_124efa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorylot',
+            index=models.Index(fields=['ingredient', 'expiry_date'], name='app_invento_ingredi_afd358_idx'),
+        ),
+    ]
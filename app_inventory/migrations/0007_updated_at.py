@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_inventory', '0006_filter_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventorylot',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Cập nhật lúc'),
+        ),
+        migrations.AddField(
+            model_name='supplier',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Cập nhật lúc'),
+        ),
+    ]
@@ -1,4 +1,7 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from app_home.models import Unit, IngredientCategory
@@ -10,6 +13,7 @@ class Supplier(models.Model):
     email = models.EmailField("Email", blank=True, default="")
     address = models.CharField("Địa chỉ", max_length=255, blank=True, default="")
     note = models.TextField("Ghi chú", blank=True, default="")
+    updated_at = models.DateTimeField("Cập nhật lúc", auto_now=True, db_index=True)
 
     class Meta:
         verbose_name = "Nhà cung cấp"
@@ -19,6 +23,32 @@ class Supplier(models.Model):
         return self.name
 
 
+def stock_total_expression(outer="pk"):
+    """
+    Σ quantity_remaining các lô của nguyên liệu `outer` (OuterRef) – 1 subquery.
+    Dùng được cả ở queryset Ingredient ("pk") lẫn queryset có FK tới Ingredient ("ingredient").
+    """
+    lots = (
+        InventoryLot.objects
+        .filter(ingredient=models.OuterRef(outer))
+        .order_by()
+        .values("ingredient")
+        .annotate(total=models.Sum("quantity_remaining"))
+        .values("total")
+    )
+    return Coalesce(
+        models.Subquery(lots),
+        models.Value(Decimal("0")),
+        output_field=models.DecimalField(max_digits=14, decimal_places=3),
+    )
+
+
+class IngredientQuerySet(models.QuerySet):
+    def with_stock(self):
+        """Gắn stock_total = Σ quantity_remaining của các lô (không query theo từng dòng)."""
+        return self.annotate(stock_total=stock_total_expression())
+
+
 class Ingredient(models.Model):
     """
     Nguyên liệu master (ví dụ: Thịt bò, Gạo tẻ, Rau xanh, Nước mắm, Cà phê).
@@ -54,7 +84,15 @@ class Ingredient(models.Model):
     status = models.CharField("Tình trạng", max_length=20, choices=Status.choices, default=Status.IN_STOCK)
     last_updated = models.DateField("Cập nhật lần cuối", default=timezone.now)
 
+    objects = IngredientQuerySet.as_manager()
+
     class Meta:
+        indexes = [
+            models.Index(fields=["category", "name"]),
+            models.Index(fields=["category", "is_active", "status"]),
+            models.Index(fields=["status"]),
+            models.Index(fields=["last_updated"]),
+        ]
         verbose_name = "Nguyên liệu"
         verbose_name_plural = "Nguyên liệu"
 
@@ -63,6 +101,9 @@ class Ingredient(models.Model):
 
     @property
     def current_stock(self):
+        # Đã annotate bằng Ingredient.objects.with_stock() -> không query thêm
+        if hasattr(self, "stock_total"):
+            return self.stock_total
         # Tổng tồn = tổng (quantity_remaining) của các lô
         agg = self.lots.aggregate(total=models.Sum("quantity_remaining"))
         return agg["total"] or 0
@@ -91,11 +132,14 @@ class InventoryLot(models.Model):
     unit_price = models.DecimalField("Đơn giá", max_digits=14, decimal_places=2)  # giá/đơn vị
     received_date = models.DateField("Ngày nhập", default=timezone.now)
     expiry_date = models.DateField("Hạn dùng", null=True, blank=True)
+    updated_at = models.DateTimeField("Cập nhật lúc", auto_now=True, db_index=True)
 
     class Meta:
         indexes = [
             models.Index(fields=["expiry_date"]),
             models.Index(fields=["received_date"]),
+            models.Index(fields=["ingredient", "received_date"]),
+            models.Index(fields=["ingredient", "expiry_date"]),
         ]
         verbose_name = "Lô nhập kho"
         verbose_name_plural = "Lô nhập kho"
@@ -108,3 +152,65 @@ class InventoryLot(models.Model):
         if self._state.adding and not self.quantity_remaining:
             self.quantity_remaining = self.quantity_received
         super().save(*args, **kwargs)
+
+
+class LotConsumption(models.Model):
+    """
+    Nhật ký xuất kho theo lô (FIFO) – mỗi dòng là 1 phần số lượng lấy ra từ 1 lô.
+    Giá vốn được snapshot tại thời điểm xuất để tính COGS theo kỳ mà không cần replay.
+    """
+    lot = models.ForeignKey(
+        InventoryLot, on_delete=models.CASCADE, related_name="consumptions", verbose_name="Lô nhập"
+    )
+    # denormalize để group theo nguyên liệu / danh mục không phải join qua lô
+    ingredient = models.ForeignKey(
+        Ingredient, on_delete=models.CASCADE, related_name="consumptions", verbose_name="Nguyên liệu"
+    )
+    order = models.ForeignKey(
+        "app_order.Order", on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="lot_consumptions", verbose_name="Đơn hàng"
+    )
+    quantity = models.DecimalField("Số lượng xuất", max_digits=12, decimal_places=3,
+                                   validators=[MinValueValidator(0)])
+    unit_price = models.DecimalField("Đơn giá vốn", max_digits=14, decimal_places=2)
+    total_cost = models.DecimalField("Giá vốn", max_digits=16, decimal_places=2, default=0)
+    consumed_at = models.DateTimeField("Thời điểm xuất", default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["consumed_at"]),
+            models.Index(fields=["ingredient", "consumed_at"]),
+        ]
+        verbose_name = "Xuất kho theo lô"
+        verbose_name_plural = "Xuất kho theo lô"
+
+    def __str__(self):
+        return f"{self.ingredient_id} - {self.quantity} @ {self.unit_price}"
+
+
+class InventoryValuationSnapshot(models.Model):
+    """
+    Chốt giá trị tồn kho cuối kỳ (thường là cuối tháng) theo nguyên liệu.
+    Dùng làm mốc để tính tồn kho lịch sử: mốc gần nhất + nhập - xuất trong khoảng.
+    """
+    period_end = models.DateField("Ngày chốt")
+    ingredient = models.ForeignKey(
+        Ingredient, on_delete=models.CASCADE, related_name="valuation_snapshots", verbose_name="Nguyên liệu"
+    )
+    category = models.ForeignKey(
+        IngredientCategory, on_delete=models.PROTECT, related_name="valuation_snapshots", verbose_name="Danh mục"
+    )
+    quantity = models.DecimalField("Số lượng tồn", max_digits=14, decimal_places=3, default=0)
+    value = models.DecimalField("Giá trị tồn", max_digits=16, decimal_places=2, default=0)
+    created_at = models.DateTimeField("Ngày tạo", auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["period_end", "ingredient"], name="uniq_valuation_period_ingredient"),
+        ]
+        indexes = [models.Index(fields=["period_end"])]
+        verbose_name = "Chốt giá trị tồn kho"
+        verbose_name_plural = "Chốt giá trị tồn kho"
+
+    def __str__(self):
+        return f"{self.period_end} - {self.ingredient_id}: {self.value}"
@@ -1,11 +1,16 @@
 # app_inventory/serializers.py
+from django.db.models import Prefetch
 from rest_framework import serializers
-from .models import Supplier, Ingredient, InventoryLot
+from .models import Supplier, Ingredient, InventoryLot, stock_total_expression
 from app_home.models import Unit, IngredientCategory
-from app_home.serializers import UnitSerializer, IngredientCategorySerializer
+from app_home.rows import Computed, Nested, RowBuilder, decimal_string
+from app_home.serializers import (
+    DynamicFieldsMixin, UnitSerializer, IngredientCategorySerializer,
+    UnitRows, IngredientCategoryRows,
+)
 
 
-class SupplierSerializer(serializers.ModelSerializer):
+class SupplierSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Supplier
         fields = [
@@ -27,7 +32,7 @@ class SupplierSerializer(serializers.ModelSerializer):
         }
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     category = serializers.PrimaryKeyRelatedField(
         queryset=IngredientCategory.objects.all()
     )
@@ -66,8 +71,17 @@ class IngredientSerializer(serializers.ModelSerializer):
             "last_updated": {"help_text": "Ngày cập nhật gần nhất"},
         }
 
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        related = [name for name in ("category", "unit") if f"{name}_detail" in fields]
+        if related:
+            queryset = queryset.select_related(*related)
+        if "current_stock" in fields:
+            queryset = queryset.with_stock()
+        return queryset
 
-class InventoryLotSerializer(serializers.ModelSerializer):
+
+class InventoryLotSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     ingredient = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
     supplier = serializers.PrimaryKeyRelatedField(
         queryset=Supplier.objects.all(), allow_null=True, required=False
@@ -96,9 +110,57 @@ class InventoryLotSerializer(serializers.ModelSerializer):
             "expiry_date": {"help_text": "Hạn dùng (nếu có)"},
         }
 
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        if "ingredient_detail" in fields:
+            # prefetch (không select_related) để nguyên liệu lồng cũng được annotate tồn kho
+            ingredients = IngredientSerializer.optimize_queryset(
+                Ingredient.objects.all(), set(IngredientSerializer.Meta.fields)
+            )
+            queryset = queryset.prefetch_related(Prefetch("ingredient", queryset=ingredients))
+        if "supplier_detail" in fields:
+            queryset = queryset.select_related("supplier")
+        return queryset
+
     def validate(self, attrs):
         qty_recv = attrs.get("quantity_received", getattr(self.instance, "quantity_received", None))
         qty_rem = attrs.get("quantity_remaining", getattr(self.instance, "quantity_remaining", None))
         if qty_recv is not None and qty_rem is not None and qty_rem > qty_recv:
             raise serializers.ValidationError({"quantity_remaining": "Không được lớn hơn quantity_received"})
         return attrs
+
+
+# -------------------- ĐỌC NHANH (.values) --------------------
+class SupplierRows(RowBuilder):
+    model = Supplier
+    fields = ("id", "name", "contact_name", "phone", "email", "address", "note")
+
+
+class IngredientRows(RowBuilder):
+    model = Ingredient
+    fields = (
+        "id",
+        "name",
+        ("category", "category_id"), ("category_detail", Nested(IngredientCategoryRows, "category")),
+        ("unit", "unit_id"), ("unit_detail", Nested(UnitRows, "unit")),
+        "min_stock", "max_stock",
+        "reference_unit_price",
+        "is_active",
+        "status",
+        "last_updated",
+        ("current_stock", Computed(stock_total_expression, decimal_string(3, 12))),
+    )
+
+
+class InventoryLotRows(RowBuilder):
+    model = InventoryLot
+    fields = (
+        "id",
+        ("ingredient", "ingredient_id"), ("ingredient_detail", Nested(IngredientRows, "ingredient")),
+        ("supplier", "supplier_id"), ("supplier_detail", Nested(SupplierRows, "supplier")),
+        "quantity_received",
+        "quantity_remaining",
+        "unit_price",
+        "received_date",
+        "expiry_date",
+    )
@@ -0,0 +1,383 @@
+# app_inventory/services.py
+"""
+Nghiệp vụ kho dùng chung: xuất kho FIFO theo lô và định giá tồn kho / giá vốn (COGS).
+Tất cả báo cáo đều là aggregate theo nhóm trên các cột ngày đã có index,
+không duyệt từng lô trong Python.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Max, Sum
+from django.db.models.functions import TruncDay, TruncMonth
+from django.utils import timezone
+
+from .models import Ingredient, InventoryLot, InventoryValuationSnapshot, LotConsumption
+from .signals import stock_consumed
+
+ZERO = Decimal("0")
+CENT = Decimal("0.01")
+
+LOT_VALUE = ExpressionWrapper(
+    F("quantity_remaining") * F("unit_price"),
+    output_field=DecimalField(max_digits=28, decimal_places=5),
+)
+RECEIVED_VALUE = ExpressionWrapper(
+    F("quantity_received") * F("unit_price"),
+    output_field=DecimalField(max_digits=28, decimal_places=5),
+)
+PERIOD_TRUNC = {"day": TruncDay, "month": TruncMonth}
+
+
+class InsufficientStock(ValueError):
+    """Không đủ tồn kho để xuất thêm."""
+
+
+def _day_start(d):
+    return timezone.make_aware(datetime.combine(d, time.min))
+
+
+# -------------------- XUẤT KHO FIFO --------------------
+@transaction.atomic
+def consume_fifo(needs, order=None, consumed_at=None):
+    """
+    Trừ tồn theo FIFO (lô nhập trước xuất trước) cho dict {ingredient_id: số lượng}.
+    Ghi LotConsumption với giá vốn của từng lô, cập nhật lô bằng 1 bulk_update.
+    Việc đủ/thiếu hàng phải được kiểm tra trước (xem OrderSerializer._check_stock_for_items).
+    """
+    remaining = {ing_id: Decimal(qty) for ing_id, qty in (needs or {}).items() if qty and Decimal(qty) > 0}
+    if not remaining:
+        return []
+    consumed_at = consumed_at or timezone.now()
+
+    lots = (
+        InventoryLot.objects
+        .select_for_update()
+        .filter(ingredient_id__in=remaining.keys(), quantity_remaining__gt=0)
+        .order_by("ingredient_id", "received_date", "id")
+    )
+    touched, rows = [], []
+    for lot in lots:
+        want = remaining.get(lot.ingredient_id, ZERO)
+        if want <= 0:
+            continue
+        take = min(want, lot.quantity_remaining)
+        lot.quantity_remaining -= take
+        lot.updated_at = consumed_at
+        remaining[lot.ingredient_id] = want - take
+        touched.append(lot)
+        rows.append(LotConsumption(
+            lot=lot,
+            ingredient_id=lot.ingredient_id,
+            order=order,
+            quantity=take,
+            unit_price=lot.unit_price,
+            total_cost=(take * lot.unit_price).quantize(CENT),
+            consumed_at=consumed_at,
+        ))
+
+    if touched:
+        InventoryLot.objects.bulk_update(touched, ["quantity_remaining", "updated_at"])
+        LotConsumption.objects.bulk_create(rows)
+        # bulk_update không phát post_save -> báo cho các cache phụ thuộc tồn kho
+        stock_consumed.send(sender=InventoryLot, ingredient_ids=list(remaining.keys()))
+    return rows
+
+
+def ensure_available(needs):
+    """Khoá các lô còn hàng của nguyên liệu cần xuất, thiếu thì raise InsufficientStock."""
+    needs = {ing_id: Decimal(qty) for ing_id, qty in (needs or {}).items() if qty and Decimal(qty) > 0}
+    if not needs:
+        return
+    have = defaultdict(Decimal)
+    for ing_id, qty in (
+        InventoryLot.objects.select_for_update()
+        .filter(ingredient_id__in=needs.keys(), quantity_remaining__gt=0)
+        .values_list("ingredient_id", "quantity_remaining")
+    ):
+        have[ing_id] += qty
+    lack = [(ing_id, need) for ing_id, need in needs.items() if need > have[ing_id]]
+    if lack:
+        names = dict(Ingredient.objects.filter(pk__in=[i for i, _ in lack]).values_list("id", "name"))
+        raise InsufficientStock("Thiếu nguyên liệu: " + "; ".join(
+            f"{names.get(ing_id, ing_id)}: cần {need}, còn {have[ing_id]}" for ing_id, need in lack
+        ))
+
+
+def consumed_by_order(order_id):
+    """{ingredient_id: tổng lượng đã xuất cho đơn} – 1 query group-by."""
+    return {
+        ing_id: qty
+        for ing_id, qty in LotConsumption.objects.filter(order_id=order_id).order_by()
+        .values("ingredient_id").annotate(q=Sum("quantity")).values_list("ingredient_id", "q")
+    }
+
+
+@transaction.atomic
+def return_stock(returns, order_id):
+    """
+    Trả lại kho lượng đã xuất cho đơn ({ingredient_id: số lượng}): lấy từ các dòng LotConsumption
+    của đơn, mới nhất trước (ngược FIFO), cộng lại vào đúng lô đã xuất và giảm / xoá dòng xuất kho
+    -> tồn, giá trị tồn và COGS khớp như chưa từng xuất phần đó. Không trả quá lượng đã xuất.
+    """
+    remaining = {ing_id: Decimal(qty) for ing_id, qty in (returns or {}).items() if qty and Decimal(qty) > 0}
+    if not remaining:
+        return
+    now = timezone.now()
+    rows = (
+        LotConsumption.objects.select_for_update()
+        .filter(order_id=order_id, ingredient_id__in=remaining.keys())
+        .order_by("-consumed_at", "-id")
+    )
+    lot_back, changed, emptied = defaultdict(Decimal), [], []
+    for row in rows:
+        want = remaining.get(row.ingredient_id, ZERO)
+        if want <= 0:
+            continue
+        take = min(want, row.quantity)
+        remaining[row.ingredient_id] = want - take
+        lot_back[row.lot_id] += take
+        row.quantity -= take
+        if row.quantity > 0:
+            row.total_cost = (row.quantity * row.unit_price).quantize(CENT)
+            changed.append(row)
+        else:
+            emptied.append(row.pk)
+    if not lot_back:
+        return
+
+    lots = list(InventoryLot.objects.select_for_update().filter(pk__in=lot_back.keys()))
+    for lot in lots:
+        lot.quantity_remaining += lot_back[lot.pk]
+        lot.updated_at = now
+    InventoryLot.objects.bulk_update(lots, ["quantity_remaining", "updated_at"])
+    LotConsumption.objects.bulk_update(changed, ["quantity", "total_cost"])
+    LotConsumption.objects.filter(pk__in=emptied).delete()
+    stock_consumed.send(sender=InventoryLot, ingredient_ids=list(remaining.keys()))
+
+
+@transaction.atomic
+def move_consumption(moves, from_order_id, to_order_id):
+    """
+    Chuyển nhật ký xuất kho ({ingredient_id: số lượng}) từ đơn này sang đơn khác khi tách món:
+    dòng chuyển trọn -> đổi order; chuyển 1 phần -> giảm dòng gốc + tạo dòng mới cùng lô / giá vốn.
+    Tồn lô không đổi. Không chuyển quá lượng đơn nguồn đã xuất.
+    """
+    remaining = {ing_id: Decimal(qty) for ing_id, qty in (moves or {}).items() if qty and Decimal(qty) > 0}
+    if not remaining:
+        return
+    rows = (
+        LotConsumption.objects.select_for_update()
+        .filter(order_id=from_order_id, ingredient_id__in=remaining.keys())
+        .order_by("-consumed_at", "-id")
+    )
+    whole, changed, created = [], [], []
+    for row in rows:
+        want = remaining.get(row.ingredient_id, ZERO)
+        if want <= 0:
+            continue
+        take = min(want, row.quantity)
+        remaining[row.ingredient_id] = want - take
+        if take == row.quantity:
+            whole.append(row.pk)
+            continue
+        row.quantity -= take
+        row.total_cost = (row.quantity * row.unit_price).quantize(CENT)
+        changed.append(row)
+        created.append(LotConsumption(
+            lot_id=row.lot_id, ingredient_id=row.ingredient_id, order_id=to_order_id, quantity=take,
+            unit_price=row.unit_price, total_cost=(take * row.unit_price).quantize(CENT),
+            consumed_at=row.consumed_at,
+        ))
+    LotConsumption.objects.filter(pk__in=whole).update(order_id=to_order_id)
+    LotConsumption.objects.bulk_update(changed, ["quantity", "total_cost"])
+    LotConsumption.objects.bulk_create(created)
+
+
+def restore_order_stock(order_id):
+    """Trả lại toàn bộ nguyên liệu đã xuất cho đơn (hủy / xoá đơn)."""
+    return_stock(consumed_by_order(order_id), order_id)
+
+
+# -------------------- ĐỊNH GIÁ TỒN KHO --------------------
+def _ingredient_index():
+    """id -> (tên, category_id, tên danh mục); 1 query, dùng để gắn nhãn kết quả."""
+    return {
+        row[0]: row[1:]
+        for row in Ingredient.objects.values_list("id", "name", "category_id", "category__name")
+    }
+
+
+def _group(per_ingredient, group_by):
+    """Gom dict {ingredient_id: (qty, value)} thành danh sách theo nguyên liệu hoặc danh mục."""
+    index = _ingredient_index()
+    if group_by == "category":
+        totals = defaultdict(lambda: [ZERO, ZERO])
+        names = {}
+        for ing_id, (qty, value) in per_ingredient.items():
+            _, cat_id, cat_name = index.get(ing_id, ("", None, ""))
+            totals[cat_id][0] += qty
+            totals[cat_id][1] += value
+            names[cat_id] = cat_name
+        rows = [
+            {"category": cat_id, "category_name": names[cat_id],
+             "quantity": qty, "value": value.quantize(CENT)}
+            for cat_id, (qty, value) in totals.items()
+        ]
+        return sorted(rows, key=lambda r: r["category_name"] or "")
+
+    rows = []
+    for ing_id, (qty, value) in per_ingredient.items():
+        name, cat_id, cat_name = index.get(ing_id, ("", None, ""))
+        rows.append({
+            "ingredient": ing_id, "ingredient_name": name,
+            "category": cat_id, "category_name": cat_name,
+            "quantity": qty, "value": value.quantize(CENT),
+        })
+    return sorted(rows, key=lambda r: r["ingredient_name"] or "")
+
+
+def _live_on_hand(category_id=None):
+    qs = InventoryLot.objects.filter(quantity_remaining__gt=0)
+    if category_id:
+        qs = qs.filter(ingredient__category_id=category_id)
+    agg = (
+        qs.values("ingredient_id")
+        .annotate(quantity=Sum("quantity_remaining"), value=Sum(LOT_VALUE))
+        .order_by()
+    )
+    return {r["ingredient_id"]: (r["quantity"] or ZERO, r["value"] or ZERO) for r in agg}
+
+
+def _net_movements(after, upto, category_id=None):
+    """
+    Biến động (nhập - xuất) theo nguyên liệu trong khoảng ngày (after, upto].
+    after=None nghĩa là từ đầu. 2 query group-by trên received_date / consumed_at.
+    """
+    receipts = InventoryLot.objects.filter(received_date__lte=upto)
+    usages = LotConsumption.objects.filter(consumed_at__lt=_day_start(upto + timedelta(days=1)))
+    if after is not None:
+        receipts = receipts.filter(received_date__gt=after)
+        usages = usages.filter(consumed_at__gte=_day_start(after + timedelta(days=1)))
+    if category_id:
+        receipts = receipts.filter(ingredient__category_id=category_id)
+        usages = usages.filter(ingredient__category_id=category_id)
+
+    net = defaultdict(lambda: [ZERO, ZERO])
+    for r in receipts.values("ingredient_id").annotate(q=Sum("quantity_received"), v=Sum(RECEIVED_VALUE)).order_by():
+        net[r["ingredient_id"]][0] += r["q"] or ZERO
+        net[r["ingredient_id"]][1] += r["v"] or ZERO
+    for r in usages.values("ingredient_id").annotate(q=Sum("quantity"), v=Sum("total_cost")).order_by():
+        net[r["ingredient_id"]][0] -= r["q"] or ZERO
+        net[r["ingredient_id"]][1] -= r["v"] or ZERO
+    return net
+
+
+def on_hand_valuation(group_by="ingredient", category_id=None):
+    """Giá trị tồn hiện tại = Σ quantity_remaining × unit_price theo lô."""
+    return _group(_live_on_hand(category_id), group_by)
+
+
+def valuation_as_of(as_of, group_by="ingredient", category_id=None):
+    """
+    Giá trị tồn tại cuối ngày `as_of`.
+    - Có mốc chốt <= as_of: lấy mốc đó + biến động (mốc, as_of].
+    - Không có mốc: lùi từ tồn hiện tại - biến động (as_of, hôm nay].
+    Trả về (rows, nguồn tính).
+    """
+    snap_date = (
+        InventoryValuationSnapshot.objects
+        .filter(period_end__lte=as_of)
+        .aggregate(m=Max("period_end"))["m"]
+    )
+    if snap_date is not None:
+        base = InventoryValuationSnapshot.objects.filter(period_end=snap_date)
+        if category_id:
+            base = base.filter(category_id=category_id)
+        per_ing = {ing_id: [qty, value] for ing_id, qty, value in
+                   base.values_list("ingredient_id", "quantity", "value")}
+        if snap_date < as_of:
+            for ing_id, (dq, dv) in _net_movements(snap_date, as_of, category_id).items():
+                cur = per_ing.setdefault(ing_id, [ZERO, ZERO])
+                cur[0] += dq
+                cur[1] += dv
+        source = f"snapshot:{snap_date.isoformat()}"
+    else:
+        per_ing = {k: list(v) for k, v in _live_on_hand(category_id).items()}
+        today = timezone.localdate()
+        if as_of < today:
+            for ing_id, (dq, dv) in _net_movements(as_of, today, category_id).items():
+                cur = per_ing.setdefault(ing_id, [ZERO, ZERO])
+                cur[0] -= dq
+                cur[1] -= dv
+        source = "live"
+
+    per_ing = {k: (q, v) for k, (q, v) in per_ing.items() if q or v}
+    return _group(per_ing, group_by), source
+
+
+@transaction.atomic
+def take_valuation_snapshot(period_end):
+    """
+    Chốt tồn kho cuối kỳ. Tính bằng cách lùi từ tồn hiện tại nên chạy lại nhiều lần
+    cho cùng 1 kỳ vẫn cho cùng kết quả (upsert theo (period_end, ingredient)).
+    """
+    today = timezone.localdate()
+    per_ing = {k: list(v) for k, v in _live_on_hand().items()}
+    if period_end < today:
+        for ing_id, (dq, dv) in _net_movements(period_end, today).items():
+            cur = per_ing.setdefault(ing_id, [ZERO, ZERO])
+            cur[0] -= dq
+            cur[1] -= dv
+
+    index = _ingredient_index()
+    rows = [
+        InventoryValuationSnapshot(
+            period_end=period_end,
+            ingredient_id=ing_id,
+            category_id=index[ing_id][1],
+            quantity=qty,
+            value=value.quantize(CENT),
+        )
+        for ing_id, (qty, value) in per_ing.items()
+        if ing_id in index and (qty or value)
+    ]
+    InventoryValuationSnapshot.objects.filter(period_end=period_end).delete()
+    InventoryValuationSnapshot.objects.bulk_create(rows)
+    return rows
+
+
+# -------------------- GIÁ VỐN (COGS) --------------------
+def cogs_by_period(date_from, date_to, period="day", group_by=None):
+    """
+    Giá vốn hàng bán theo kỳ (ngày/tháng) từ LotConsumption, 1 query group-by
+    trên index (consumed_at) hoặc (ingredient, consumed_at).
+    """
+    trunc = PERIOD_TRUNC.get(period, TruncDay)
+    qs = LotConsumption.objects.filter(
+        consumed_at__gte=_day_start(date_from),
+        consumed_at__lt=_day_start(date_to + timedelta(days=1)),
+    )
+    keys = ["period"]
+    if group_by == "ingredient":
+        keys += ["ingredient_id", "ingredient__name"]
+    elif group_by == "category":
+        keys += ["ingredient__category_id", "ingredient__category__name"]
+
+    agg = (
+        qs.annotate(period=trunc("consumed_at"))
+        .values(*keys)
+        .annotate(quantity=Sum("quantity"), cost=Sum("total_cost"))
+        .order_by(*keys)
+    )
+    rename = {
+        "ingredient_id": "ingredient", "ingredient__name": "ingredient_name",
+        "ingredient__category_id": "category", "ingredient__category__name": "category_name",
+    }
+    rows = []
+    for r in agg:
+        row = {rename.get(k, k): v for k, v in r.items()}
+        row["period"] = r["period"].date().isoformat() if r["period"] else None
+        rows.append(row)
+    return rows
@@ -0,0 +1,6 @@
+# app_inventory/signals.py
+from django.dispatch import Signal
+
+# Phát sau khi xuất kho bằng bulk_update (không có post_save cho từng lô).
+# kwargs: ingredient_ids
+stock_consumed = Signal()
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import SupplierViewSet, IngredientViewSet, InventoryLotViewSet
+from .views import SupplierViewSet, IngredientViewSet, InventoryLotViewSet, InventoryValuationViewSet
 
 router = DefaultRouter()
 app_name = "app_inventory"
@@ -8,6 +8,7 @@ app_name = "app_inventory"
 router.register(r"suppliers", SupplierViewSet, basename="inventory-suppliers")
 router.register(r"ingredients", IngredientViewSet, basename="inventory-ingredients")
 router.register(r"lots", InventoryLotViewSet, basename="inventory-lots")
+router.register(r"valuation", InventoryValuationViewSet, basename="inventory-valuation")
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -1,17 +1,32 @@
 # app_inventory/views.py
-from django.db.models import Q
-from rest_framework import viewsets, permissions
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from drf_spectacular.utils import (
     extend_schema, extend_schema_view, OpenApiParameter, OpenApiTypes
 )
 
+from app_home.caching import ConditionalGetMixin
 from app_home.pagination import CustomPagination
-from .models import Supplier, Ingredient, InventoryLot
-from .serializers import SupplierSerializer, IngredientSerializer, InventoryLotSerializer
+from app_home.filters import (
+    SparseFieldsMixin, OrderingMixin, DeclarativeFilterBackend, BooleanFilter, ChoiceFilter, DateFilter, IntegerFilter,
+    query_param,
+)
+from app_home.rows import FastListMixin
+from app_home.search import search_queryset
+from app_home.models import IngredientCategory, Unit
+from .models import Supplier, Ingredient, InventoryLot, InventoryValuationSnapshot
+from .serializers import SupplierSerializer, IngredientSerializer, InventoryLotSerializer, InventoryLotRows
+from . import services
 
-class CommonViewSet(viewsets.ModelViewSet):
+class CommonViewSet(ConditionalGetMixin, FastListMixin, SparseFieldsMixin, OrderingMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = CustomPagination
+    filter_backends = [DeclarativeFilterBackend]
 
 
 # -------------------- SUPPLIER --------------------
@@ -23,7 +38,7 @@ class CommonViewSet(viewsets.ModelViewSet):
             OpenApiParameter("search", OpenApiTypes.STR, OpenApiParameter.QUERY,
                              description="Tìm theo tên NCC / người liên hệ / SĐT / email"),
             OpenApiParameter("ordering", OpenApiTypes.STR, OpenApiParameter.QUERY,
-                             description="Ví dụ: 'name', '-name'"),
+                             description="Cho phép: 'name' ('-name' để giảm dần)"),
         ],
     ),
     retrieve=extend_schema(summary="Chi tiết nhà cung cấp"),
@@ -34,20 +49,19 @@ class CommonViewSet(viewsets.ModelViewSet):
 )
 class SupplierViewSet(CommonViewSet):
     serializer_class = SupplierSerializer
+    cache_tables = (Supplier,)
+    ordering_fields = {"name": ("name",)}
+    default_ordering = ("name",)
 
     def get_queryset(self):
         qs = Supplier.objects.all()
         params = self.request.query_params
         search = params.get("search")
-        ordering = params.get("ordering", "name")
         if search:
-            qs = qs.filter(
-                Q(name__icontains=search) |
-                Q(contact_name__icontains=search) |
-                Q(phone__icontains=search) |
-                Q(email__icontains=search)
-            )
-        return qs.order_by(ordering)
+            qs = search_queryset(qs, search, rank="ordering" not in params)
+            if "ordering" not in params:
+                return qs
+        return self.order_queryset(qs)
 
 
 # -------------------- INGREDIENT --------------------
@@ -67,7 +81,7 @@ class SupplierViewSet(CommonViewSet):
             OpenApiParameter("search", OpenApiTypes.STR, OpenApiParameter.QUERY,
                              description="Tìm theo tên/ tên danh mục"),
             OpenApiParameter("ordering", OpenApiTypes.STR, OpenApiParameter.QUERY,
-                             description="Ví dụ: 'name', 'last_updated', '-status'"),
+                             description="Cho phép: 'name' (mặc định), 'category', 'status', 'last_updated'"),
         ],
     ),
     retrieve=extend_schema(summary="Chi tiết nguyên liệu"),
@@ -78,33 +92,33 @@ class SupplierViewSet(CommonViewSet):
 )
 class IngredientViewSet(CommonViewSet):
     serializer_class = IngredientSerializer
+    # current_stock lấy từ lô -> ghi lô cũng làm đổi ETag
+    cache_tables = (Ingredient, IngredientCategory, Unit, InventoryLot)
+    ordering_fields = {
+        "name": ("name",),
+        "category": ("category", "name"),
+        "status": ("status",),
+        "last_updated": ("last_updated",),
+    }
+    default_ordering = ("name",)
+    # thứ tự khai báo = thứ tự cột index (category, is_active, status)
+    query_filters = {
+        "category": IntegerFilter("category_id"),
+        "is_active": BooleanFilter("is_active"),
+        "status": ChoiceFilter("status", Ingredient.Status.choices),
+        "unit": IntegerFilter("unit_id"),
+    }
 
     def get_queryset(self):
-        qs = Ingredient.objects.select_related("category", "unit")
+        qs = self.optimize_queryset(Ingredient.objects.all())
         params = self.request.query_params
-        category_id = params.get("category")
-        unit_id = params.get("unit")
-        status_val = params.get("status")
-        is_active = params.get("is_active")
         search = params.get("search")
-        ordering = params.get("ordering", "name")
-
-        if category_id:
-            qs = qs.filter(category_id=category_id)
-        if unit_id:
-            qs = qs.filter(unit_id=unit_id)
-        if status_val:
-            qs = qs.filter(status=status_val)
-        if is_active is not None:
-            val = str(is_active).lower() in ("1", "true", "t", "yes", "y")
-            qs = qs.filter(is_active=val)
         if search:
-            qs = qs.filter(Q(name__icontains=search) | Q(category__name__icontains=search))
+            qs = search_queryset(qs, search, rank="ordering" not in params)
+            if "ordering" not in params:
+                return qs
 
-        if "," in ordering:
-            fields = [f.strip() for f in ordering.split(",") if f.strip()]
-            return qs.order_by(*fields)
-        return qs.order_by(ordering)
+        return self.order_queryset(qs)
 
 
 # -------------------- INVENTORY LOT --------------------
@@ -126,7 +140,7 @@ class IngredientViewSet(CommonViewSet):
             OpenApiParameter("expiry_to", OpenApiTypes.DATE, OpenApiParameter.QUERY,
                              description="Lọc expiry_date <= ngày"),
             OpenApiParameter("ordering", OpenApiTypes.STR, OpenApiParameter.QUERY,
-                             description="Ví dụ: 'expiry_date', 'received_date', '-quantity_remaining'"),
+                             description="Cho phép: 'expiry_date' (mặc định), 'received_date', 'ingredient'"),
         ],
     ),
     retrieve=extend_schema(summary="Chi tiết lô hàng"),
@@ -137,32 +151,147 @@ class IngredientViewSet(CommonViewSet):
 )
 class InventoryLotViewSet(CommonViewSet):
     serializer_class = InventoryLotSerializer
+    cache_tables = (InventoryLot, Ingredient, Supplier, IngredientCategory, Unit,)
+    # list đọc bằng .values_list (giống hệt InventoryLotSerializer); None -> serializer
+    row_builder = InventoryLotRows
+    ordering_fields = {
+        "expiry_date": ("expiry_date", "received_date"),
+        "received_date": ("received_date",),
+        "ingredient": ("ingredient", "received_date"),
+    }
+    default_ordering = ("expiry_date",)
+    # index (ingredient, expiry_date) phủ tổ hợp hay dùng nhất: lô của 1 nguyên liệu sắp hết hạn
+    query_filters = {
+        "ingredient": IntegerFilter("ingredient_id"),
+        "expiry_from": DateFilter("expiry_date", "gte"),
+        "expiry_to": DateFilter("expiry_date", "lte"),
+        "supplier": IntegerFilter("supplier_id"),
+        "received_from": DateFilter("received_date", "gte"),
+        "received_to": DateFilter("received_date", "lte"),
+    }
 
     def get_queryset(self):
-        qs = InventoryLot.objects.select_related("ingredient", "supplier")
-        params = self.request.query_params
-        ingredient_id = params.get("ingredient")
-        supplier_id = params.get("supplier")
-        received_from = params.get("received_from")
-        received_to = params.get("received_to")
-        expiry_from = params.get("expiry_from")
-        expiry_to = params.get("expiry_to")
-        ordering = params.get("ordering", "expiry_date,received_date")
-
-        if ingredient_id:
-            qs = qs.filter(ingredient_id=ingredient_id)
-        if supplier_id:
-            qs = qs.filter(supplier_id=supplier_id)
-        if received_from:
-            qs = qs.filter(received_date__gte=received_from)
-        if received_to:
-            qs = qs.filter(received_date__lte=received_to)
-        if expiry_from:
-            qs = qs.filter(expiry_date__gte=expiry_from)
-        if expiry_to:
-            qs = qs.filter(expiry_date__lte=expiry_to)
-
-        if "," in ordering:
-            fields = [f.strip() for f in ordering.split(",") if f.strip()]
-            return qs.order_by(*fields)
-        return qs.order_by(ordering)
+        qs = self.optimize_queryset(InventoryLot.objects.all())
+        return self.order_queryset(qs)
+
+
+# -------------------- VALUATION (định giá tồn kho / COGS) --------------------
+# tham số của các action báo cáo (không phải queryset) – parse qua cùng QueryFilter -> sai kiểu trả 400
+GROUP_FILTER = ChoiceFilter(None, (("ingredient", "Nguyên liệu"), ("category", "Danh mục")))
+PERIOD_FILTER = ChoiceFilter(None, (("day", "Ngày"), ("month", "Tháng")))
+CATEGORY_FILTER = IntegerFilter("category_id")
+DATE_FILTER = DateFilter(None)
+
+GROUP_PARAM = OpenApiParameter("group_by", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                               description="ingredient (mặc định) / category")
+CATEGORY_PARAM = OpenApiParameter("category", OpenApiTypes.INT, OpenApiParameter.QUERY,
+                                  description="Lọc theo id danh mục nguyên liệu")
+
+
+@extend_schema(tags=["app_inventory"])
+class InventoryValuationViewSet(viewsets.ViewSet):
+    """
+    Báo cáo giá trị tồn kho (theo lô) và giá vốn hàng bán (FIFO).
+    Mọi số liệu đều tính bằng aggregate group-by, không duyệt từng lô.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(summary="Giá trị tồn kho hiện tại", parameters=[GROUP_PARAM, CATEGORY_PARAM],
+                   responses=OpenApiTypes.OBJECT)
+    @action(detail=False, methods=["get"], url_path="on-hand")
+    def on_hand(self, request):
+        params = request.query_params
+        group_by = query_param(params, "group_by", GROUP_FILTER, "ingredient")
+        category_id = query_param(params, "category", CATEGORY_FILTER)
+        rows = services.on_hand_valuation(group_by=group_by, category_id=category_id)
+        return Response({
+            "group_by": group_by,
+            "total_value": sum((r["value"] for r in rows), services.ZERO),
+            "results": rows,
+        })
+
+    @extend_schema(
+        summary="Giá trị tồn kho tại 1 ngày trong quá khứ",
+        description="Dùng mốc chốt cuối kỳ gần nhất rồi cộng biến động nhập/xuất, không replay toàn bộ lịch sử.",
+        parameters=[
+            OpenApiParameter("date", OpenApiTypes.DATE, OpenApiParameter.QUERY, required=True,
+                             description="Ngày cần định giá (YYYY-MM-DD)"),
+            GROUP_PARAM, CATEGORY_PARAM,
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(detail=False, methods=["get"], url_path="as-of")
+    def as_of(self, request):
+        params = request.query_params
+        as_of = query_param(params, "date", DATE_FILTER)
+        if as_of is None:
+            raise ValidationError({"date": "Bắt buộc"})
+        group_by = query_param(params, "group_by", GROUP_FILTER, "ingredient")
+        category_id = query_param(params, "category", CATEGORY_FILTER)
+        rows, source = services.valuation_as_of(as_of, group_by=group_by, category_id=category_id)
+        return Response({
+            "date": as_of,
+            "source": source,
+            "group_by": group_by,
+            "total_value": sum((r["value"] for r in rows), services.ZERO),
+            "results": rows,
+        })
+
+    @extend_schema(
+        summary="Giá vốn hàng bán (COGS) theo kỳ",
+        parameters=[
+            OpenApiParameter("date_from", OpenApiTypes.DATE, OpenApiParameter.QUERY,
+                             description="Từ ngày (mặc định: đầu tháng hiện tại)"),
+            OpenApiParameter("date_to", OpenApiTypes.DATE, OpenApiParameter.QUERY,
+                             description="Đến ngày (mặc định: hôm nay)"),
+            OpenApiParameter("period", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                             description="day (mặc định) / month"),
+            OpenApiParameter("group_by", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                             description="(trống) / ingredient / category"),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(detail=False, methods=["get"], url_path="cogs")
+    def cogs(self, request):
+        params = request.query_params
+        today = timezone.localdate()
+        date_from = query_param(params, "date_from", DATE_FILTER, today.replace(day=1))
+        date_to = query_param(params, "date_to", DATE_FILTER, today)
+        if date_from > date_to:
+            raise ValidationError({"date_from": "Phải <= date_to"})
+        period = query_param(params, "period", PERIOD_FILTER, "day")
+        group_by = query_param(params, "group_by", GROUP_FILTER)
+
+        rows = services.cogs_by_period(date_from, date_to, period=period, group_by=group_by)
+        return Response({
+            "date_from": date_from,
+            "date_to": date_to,
+            "period": period,
+            "total_cost": sum((r["cost"] or 0 for r in rows), services.ZERO),
+            "results": rows,
+        })
+
+    @extend_schema(
+        summary="Chốt giá trị tồn kho cuối kỳ",
+        description="Body: {\"period_end\": \"YYYY-MM-DD\"} (mặc định: ngày cuối tháng trước). Chạy lại sẽ ghi đè mốc cũ.",
+        request=OpenApiTypes.OBJECT,
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(detail=False, methods=["get", "post"], url_path="snapshots")
+    def snapshots(self, request):
+        if request.method == "GET":
+            periods = (
+                InventoryValuationSnapshot.objects
+                .values_list("period_end", flat=True)
+                .distinct()
+                .order_by("-period_end")
+            )
+            return Response({"results": list(periods)})
+
+        period_end = query_param(request.data, "period_end", DATE_FILTER,
+                                 timezone.localdate().replace(day=1) - timedelta(days=1))
+        rows = services.take_valuation_snapshot(period_end)
+        return Response(
+            {"period_end": period_end, "ingredients": len(rows)},
+            status=status.HTTP_201_CREATED,
+        )
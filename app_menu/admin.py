@@ -1,6 +1,6 @@
 # app_menu/admin.py
 from django.contrib import admin
-from .models import MenuItem, RecipeItem
+from .models import AvailabilityWindow, MenuItem, MenuSnapshot, RecipeItem
 
 
 class RecipeItemInline(admin.TabularInline):
@@ -9,6 +9,13 @@ class RecipeItemInline(admin.TabularInline):
     autocomplete_fields = ("ingredient",)
 
 
+class AvailabilityWindowInline(admin.TabularInline):
+    model = AvailabilityWindow
+    fk_name = "menu_item"
+    fields = ("name", "weekdays", "start_time", "end_time")
+    extra = 0
+
+
 @admin.register(MenuItem)
 class MenuItemAdmin(admin.ModelAdmin):
     list_display = ("name", "category", "price", "available")
@@ -16,7 +23,7 @@ class MenuItemAdmin(admin.ModelAdmin):
     search_fields = ("name", "description")
     ordering = ("category", "name")
     list_editable = ("price", "available")
-    inlines = [RecipeItemInline]
+    inlines = [RecipeItemInline, AvailabilityWindowInline]
 
 
 @admin.register(RecipeItem)
@@ -24,3 +31,27 @@ class RecipeItemAdmin(admin.ModelAdmin):
     list_display = ("menu_item", "ingredient", "quantity")
     search_fields = ("menu_item__name", "ingredient__name")
     list_filter = ("menu_item", "ingredient")
+
+
+@admin.register(AvailabilityWindow)
+class AvailabilityWindowAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "name", "menu_item", "category", "weekdays", "start_time", "end_time")
+    list_filter = ("category",)
+    search_fields = ("name", "menu_item__name", "category__name")
+    autocomplete_fields = ("menu_item",)
+
+
+@admin.register(MenuSnapshot)
+class MenuSnapshotAdmin(admin.ModelAdmin):
+    """Chỉ xem; phát hành qua API /menu-snapshots/publish/ hoặc lệnh publish_menu."""
+    list_display = ("version", "published_at", "published_by", "category_count", "item_count", "size", "raw_size")
+    exclude = ("document",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer("document")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
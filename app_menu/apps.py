@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class AppMenuConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app_menu'
+
+    def ready(self):
+        from app_home import caching, search
+        from .models import AvailabilityWindow, MenuItem, MenuSnapshot, RecipeItem
+        from .signals import connect_signals
+
+        connect_signals()
+        search.register(MenuItem, {"name": 3, "description": 1})
+        caching.track(MenuItem, RecipeItem, AvailabilityWindow, MenuSnapshot)
@@ -0,0 +1,63 @@
+# app_menu/async_views.py
+"""
+Tình trạng món (còn bán được bao nhiêu phần) cho POS / app gọi món, chạy dưới ASGI.
+
+GET /api/app-menu/availability/?category=<id>
+Số phần tối đa = min(tồn nguyên liệu / định lượng) theo công thức; món không có
+công thức -> null (không giới hạn). 3 query async (tồn theo nguyên liệu, công thức, món).
+sellable còn xét khung giờ bán (app_menu.schedule, tra cache theo ô thời gian).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.db.models import Sum
+from django.views.decorators.http import require_GET
+
+from app_home.aio import async_login_required, json_response
+from app_inventory.models import InventoryLot
+
+from .models import MenuItem, RecipeItem
+from .schedule import sellable_ids
+
+
+async def _stock_by_ingredient():
+    return {
+        ingredient_id: total or Decimal("0")
+        async for ingredient_id, total in InventoryLot.objects.filter(quantity_remaining__gt=0)
+        .values("ingredient_id").annotate(total=Sum("quantity_remaining"))
+        .values_list("ingredient_id", "total")
+    }
+
+
+async def _recipes(menu_ids):
+    recipes = defaultdict(list)
+    async for menu_item_id, ingredient_id, quantity in RecipeItem.objects.filter(menu_item_id__in=menu_ids) \
+            .values_list("menu_item_id", "ingredient_id", "quantity"):
+        recipes[menu_item_id].append((ingredient_id, quantity))
+    return recipes
+
+
+def max_servings(recipe, stock):
+    portions = [int(stock.get(ingredient_id, 0) // quantity) for ingredient_id, quantity in recipe if quantity > 0]
+    return min(portions) if portions else None
+
+
+@require_GET
+@async_login_required
+async def menu_availability(request):
+    items = MenuItem.objects.order_by("category_id", "name")
+    category = request.GET.get("category")
+    if category and category.isdigit():
+        items = items.filter(category_id=category)
+    rows = [row async for row in items.values("id", "name", "category_id", "price", "available")]
+
+    stock = await _stock_by_ingredient()
+    recipes = await _recipes([row["id"] for row in rows])
+    in_schedule = set(await sync_to_async(sellable_ids)())
+    for row in rows:
+        servings = max_servings(recipes.get(row["id"], ()), stock)
+        row["max_servings"] = servings
+        row["in_schedule"] = row["id"] in in_schedule
+        row["sellable"] = row["in_schedule"] and (servings is None or servings > 0)
+    return json_response(rows)
@@ -0,0 +1,112 @@
+# app_menu/costing.py
+"""
+Tính giá vốn / biên lợi nhuận cho toàn bộ menu trong 1 lượt:
+- 1 query giá nhập bình quân gia quyền theo lô còn hàng (fallback reference_unit_price),
+- 1 query định lượng (RecipeItem),
+- 1 query món (giá bán).
+Kết quả được cache tới khi giá hoặc công thức thay đổi (xem app_menu/signals.py).
+"""
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Sum
+
+from app_inventory.models import Ingredient
+from .models import MenuItem, RecipeItem
+
+CACHE_VERSION_KEY = "menu_costs:version"
+CACHE_KEY = "menu_costs:{version}"
+CACHE_TIMEOUT = 60 * 60
+
+ZERO = Decimal("0")
+CENT = Decimal("0.01")
+PRICE_PLACES = Decimal("0.0001")
+
+
+def _current_unit_costs():
+    """ingredient_id -> (đơn giá vốn hiện tại, nguồn giá) – 1 query."""
+    in_stock = Q(lots__quantity_remaining__gt=0)
+    rows = (
+        Ingredient.objects
+        .annotate(
+            stock_qty=Sum("lots__quantity_remaining", filter=in_stock),
+            stock_value=Sum(
+                ExpressionWrapper(
+                    F("lots__quantity_remaining") * F("lots__unit_price"),
+                    output_field=DecimalField(max_digits=28, decimal_places=5),
+                ),
+                filter=in_stock,
+            ),
+        )
+        .values_list("id", "reference_unit_price", "stock_qty", "stock_value")
+    )
+    costs = {}
+    for ing_id, ref_price, qty, value in rows:
+        if qty:
+            costs[ing_id] = ((value / qty).quantize(PRICE_PLACES), "lots")
+        elif ref_price is not None:
+            costs[ing_id] = (ref_price, "reference")
+    return costs
+
+
+def compute_menu_costs():
+    """Tính cost/margin cho mọi món, trả về dict menu_item_id -> row."""
+    unit_costs = _current_unit_costs()
+
+    recipes = defaultdict(list)
+    for menu_item_id, ingredient_id, quantity in RecipeItem.objects.values_list(
+        "menu_item_id", "ingredient_id", "quantity"
+    ):
+        recipes[menu_item_id].append((ingredient_id, quantity))
+
+    result = {}
+    for item_id, name, category_id, price, available in MenuItem.objects.values_list(
+        "id", "name", "category_id", "price", "available"
+    ):
+        cost = ZERO
+        missing = []
+        for ingredient_id, quantity in recipes.get(item_id, ()):
+            unit_cost = unit_costs.get(ingredient_id)
+            if unit_cost is None:
+                missing.append(ingredient_id)
+                continue
+            cost += (quantity or ZERO) * unit_cost[0]
+
+        cost = cost.quantize(CENT)
+        margin = (price - cost).quantize(CENT)
+        result[item_id] = {
+            "menu_item": item_id,
+            "name": name,
+            "category": category_id,
+            "available": available,
+            "price": price,
+            "cost": cost,
+            "margin": margin,
+            "margin_percent": (margin * 100 / price).quantize(CENT) if price else None,
+            "food_cost_percent": (cost * 100 / price).quantize(CENT) if price else None,
+            "ingredient_count": len(recipes.get(item_id, ())),
+            "missing_price_ingredients": missing,
+        }
+    return result
+
+
+def get_menu_costs():
+    """Bản cache của compute_menu_costs(); key gắn version để invalidate tức thì."""
+    version = cache.get_or_set(CACHE_VERSION_KEY, time.time_ns, None)
+    key = CACHE_KEY.format(version=version)
+    data = cache.get(key)
+    if data is None:
+        data = compute_menu_costs()
+        cache.set(key, data, CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_menu_costs(**kwargs):
+    """Receiver cho signal: đổi version để lần đọc sau tính lại."""
+    try:
+        cache.incr(CACHE_VERSION_KEY)
+    except ValueError:
+        # key đã bị evict -> dùng version mới, không đụng lại các bản cache cũ
+        cache.set(CACHE_VERSION_KEY, time.time_ns(), None)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from app_menu.snapshots import publish
+
+
+class Command(BaseCommand):
+    help = "Phát hành menu đang bán thành MenuSnapshot (bỏ qua nếu không đổi so với bản mới nhất)."
+
+    def handle(self, *args, **options):
+        snapshot, created = publish()
+        if created:
+            self.stdout.write(self.style.SUCCESS(
+                f"Đã phát hành {snapshot}: {snapshot.item_count} món, {snapshot.size} byte (gzip)"
+            ))
+        else:
+            self.stdout.write(f"Menu không đổi so với {snapshot}")
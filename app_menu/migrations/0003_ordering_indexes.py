@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_home', '0005_ordering_indexes'),
+        ('app_menu', '0002_alter_menuitem_options_alter_recipeitem_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['category', 'name'], name='app_menu_me_categor_6d5ed3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['price'], name='app_menu_me_price_a10092_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:59
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_home', '0006_tableversion'),
+        ('app_menu', '0005_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvailabilityWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, default='', max_length=100, verbose_name='Tên khung giờ')),
+                ('weekdays', models.PositiveSmallIntegerField(default=127, help_text='Bit 0 = Thứ 2 ... bit 6 = Chủ nhật; 127 = cả tuần', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(127)], verbose_name='Ngày trong tuần')),
+                ('start_time', models.TimeField(verbose_name='Từ giờ')),
+                ('end_time', models.TimeField(help_text='Nhỏ hơn hoặc bằng giờ bắt đầu -> qua nửa đêm', verbose_name='Đến giờ')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='availability_windows', to='app_home.menucategory', verbose_name='Danh mục')),
+                ('menu_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='availability_windows', to='app_menu.menuitem', verbose_name='Món')),
+            ],
+            options={
+                'verbose_name': 'Khung giờ bán',
+                'verbose_name_plural': 'Khung giờ bán',
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('category__isnull', True), ('menu_item__isnull', False)), models.Q(('category__isnull', False), ('menu_item__isnull', True)), _connector='OR'), name='availability_window_one_target')],
+            },
+        ),
+    ]
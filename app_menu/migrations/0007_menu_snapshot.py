@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-19 15:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_menu', '0006_availability_windows'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(unique=True, verbose_name='Phiên bản')),
+                ('checksum', models.CharField(max_length=64, verbose_name='SHA-256 nội dung')),
+                ('document', models.BinaryField(verbose_name='Tài liệu (gzip)')),
+                ('size', models.PositiveIntegerField(default=0, verbose_name='Dung lượng nén (byte)')),
+                ('raw_size', models.PositiveIntegerField(default=0, verbose_name='Dung lượng gốc (byte)')),
+                ('category_count', models.PositiveIntegerField(default=0, verbose_name='Số danh mục')),
+                ('item_count', models.PositiveIntegerField(default=0, verbose_name='Số món')),
+                ('published_at', models.DateTimeField(auto_now_add=True, verbose_name='Phát hành lúc')),
+                ('published_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Người phát hành')),
+            ],
+            options={
+                'verbose_name': 'Bản phát hành menu',
+                'verbose_name_plural': 'Bản phát hành menu',
+                'ordering': ('-version',),
+            },
+        ),
+    ]
@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.db import models
-from django.core.validators import MinValueValidator
+from django.db.models import Q
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from app_home.images import refresh_variants
 from app_home.models import MenuCategory
 # Giữ nguyên import Ingredient từ app_inventory nếu dự án bạn đang để Ingredient trong app_inventory.
 # Nếu Ingredient nằm ở app_inventory như phía trên, RecipeItem bên dưới không cần import Ingredient trực tiếp.
@@ -12,14 +16,24 @@ class MenuItem(models.Model):
     description = models.TextField("Mô tả", blank=True, default="")
     available = models.BooleanField("Còn bán", default=True)
     image = models.ImageField("Ảnh minh họa", upload_to="menu/", null=True, blank=True)
+    image_variants = models.JSONField("Ảnh thu nhỏ", default=dict, blank=True, editable=False)
+    updated_at = models.DateTimeField("Cập nhật lúc", auto_now=True, db_index=True)
 
     class Meta:
+        indexes = [
+            models.Index(fields=["category", "name"]),
+            models.Index(fields=["price"]),
+        ]
         verbose_name = "Món trên menu"
         verbose_name_plural = "Món trên menu"
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        kwargs["update_fields"] = refresh_variants(self, "image", "image_variants", kwargs.get("update_fields"))
+        super().save(*args, **kwargs)
+
 class RecipeItem(models.Model):
     """
     Định lượng nguyên liệu cho 1 phần menu item (BOM).
@@ -39,3 +53,75 @@ class RecipeItem(models.Model):
 
     def __str__(self):
         return f"{self.menu_item} - {self.ingredient} ({self.quantity})"
+
+
+class AvailabilityWindow(models.Model):
+    """
+    Khung giờ bán (bữa sáng, bữa trưa...) của 1 món hoặc cả danh mục.
+    Món có khung giờ riêng -> chỉ theo khung của món; không có -> theo khung của danh mục;
+    cả 2 đều không có -> bán cả ngày. MenuItem.available=False vẫn ẩn món bất kể khung giờ.
+    Được biên dịch thành chỉ mục khoảng thời gian trong tuần ở app_menu/schedule.py.
+    """
+    SLOT_MINUTES = 15
+    ALL_WEEK = 0b1111111
+
+    menu_item = models.ForeignKey(MenuItem, on_delete=models.CASCADE, null=True, blank=True,
+                                  related_name="availability_windows", verbose_name="Món")
+    category = models.ForeignKey(MenuCategory, on_delete=models.CASCADE, null=True, blank=True,
+                                 related_name="availability_windows", verbose_name="Danh mục")
+    name = models.CharField("Tên khung giờ", max_length=100, blank=True, default="")  # "Bữa sáng"
+    # bit 0 = Thứ 2 ... bit 6 = Chủ nhật
+    weekdays = models.PositiveSmallIntegerField("Ngày trong tuần", default=ALL_WEEK,
+                                                validators=[MinValueValidator(1), MaxValueValidator(ALL_WEEK)],
+                                                help_text="Bit 0 = Thứ 2 ... bit 6 = Chủ nhật; 127 = cả tuần")
+    start_time = models.TimeField("Từ giờ")
+    end_time = models.TimeField("Đến giờ", help_text="Nhỏ hơn hoặc bằng giờ bắt đầu -> qua nửa đêm")
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(menu_item__isnull=False, category__isnull=True)
+                | Q(menu_item__isnull=True, category__isnull=False),
+                name="availability_window_one_target",
+            ),
+        ]
+        verbose_name = "Khung giờ bán"
+        verbose_name_plural = "Khung giờ bán"
+
+    def __str__(self):
+        target = self.menu_item or self.category
+        return f"{target}: {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+    def clean(self):
+        if (self.menu_item_id is None) == (self.category_id is None):
+            raise ValidationError("Chọn món hoặc danh mục (chỉ 1 trong 2).")
+        for field in ("start_time", "end_time"):
+            value = getattr(self, field)
+            if value and (value.minute % self.SLOT_MINUTES or value.second):
+                raise ValidationError({field: f"Giờ phải tròn {self.SLOT_MINUTES} phút (vd 06:00, 10:30)."})
+
+
+class MenuSnapshot(models.Model):
+    """
+    Bản phát hành menu cho client (app_menu/snapshots.py): toàn bộ menu đang bán trong 1 tài
+    liệu JSON nén gzip sẵn. Mỗi lần phát hành có nội dung khác bản trước -> version mới;
+    bản đã phát hành không đổi nên client cache theo version vô thời hạn.
+    """
+    version = models.PositiveIntegerField("Phiên bản", unique=True)
+    checksum = models.CharField("SHA-256 nội dung", max_length=64)
+    document = models.BinaryField("Tài liệu (gzip)", editable=False)
+    size = models.PositiveIntegerField("Dung lượng nén (byte)", default=0)
+    raw_size = models.PositiveIntegerField("Dung lượng gốc (byte)", default=0)
+    category_count = models.PositiveIntegerField("Số danh mục", default=0)
+    item_count = models.PositiveIntegerField("Số món", default=0)
+    published_at = models.DateTimeField("Phát hành lúc", auto_now_add=True)
+    published_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name="+", verbose_name="Người phát hành")
+
+    class Meta:
+        ordering = ("-version",)
+        verbose_name = "Bản phát hành menu"
+        verbose_name_plural = "Bản phát hành menu"
+
+    def __str__(self):
+        return f"Menu v{self.version}"
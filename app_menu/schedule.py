@@ -0,0 +1,110 @@
+# app_menu/schedule.py
+"""
+Món bán được theo khung giờ (AvailabilityWindow) cho cả menu.
+
+- compile_index(): 2 query (món còn bán, khung giờ) -> chỉ mục khoảng thời gian trong tuần:
+    always   : món không có khung giờ nào (bán cả ngày)
+    bounds   : các mốc (phút trong tuần, Thứ 2 00:00 = 0) sắp xếp tăng dần
+    segments : segments[i] = món bán được trong [bounds[i], bounds[i+1])
+  Tra 1 thời điểm = bisect trên bounds, không query.
+- sellable_ids(at): kết quả cache theo version bảng (MenuItem, AvailabilityWindow) và ô
+  thời gian SLOT_MINUTES phút. Giờ của khung luôn tròn SLOT_MINUTES (AvailabilityWindow.clean)
+  nên trong 1 ô tập món không đổi: trúng cache chỉ tốn 1 query đọc version.
+"""
+from bisect import bisect_right
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from app_home.caching import table_state
+from .models import AvailabilityWindow, MenuItem
+
+SLOT_MINUTES = AvailabilityWindow.SLOT_MINUTES
+DAY_MINUTES = 24 * 60
+WEEK_MINUTES = 7 * DAY_MINUTES
+CACHE_TIMEOUT = 24 * 3600
+TABLES = (MenuItem, AvailabilityWindow)
+
+
+def minute_of_week(at):
+    local = timezone.localtime(at)
+    return local.weekday() * DAY_MINUTES + local.hour * 60 + local.minute
+
+
+def _intervals(weekdays, start, end):
+    begin_of_day = start.hour * 60 + start.minute
+    # end <= start: qua nửa đêm (bằng nhau = cả 24 giờ)
+    length = (end.hour * 60 + end.minute - begin_of_day) % DAY_MINUTES or DAY_MINUTES
+    for day in range(7):
+        if not weekdays & (1 << day):
+            continue
+        begin = day * DAY_MINUTES + begin_of_day
+        finish = begin + length
+        if finish <= WEEK_MINUTES:
+            yield begin, finish
+        else:
+            # Chủ nhật qua nửa đêm -> sáng Thứ 2 đầu tuần
+            yield begin, WEEK_MINUTES
+            yield 0, finish - WEEK_MINUTES
+
+
+def compile_index():
+    own, by_category = defaultdict(list), defaultdict(list)
+    for item_id, category_id, weekdays, start, end in AvailabilityWindow.objects.values_list(
+        "menu_item_id", "category_id", "weekdays", "start_time", "end_time"
+    ):
+        target = own[item_id] if item_id is not None else by_category[category_id]
+        target.extend(_intervals(weekdays, start, end))
+
+    always, events = [], defaultdict(list)
+    for item_id, category_id in MenuItem.objects.filter(available=True).values_list("id", "category_id"):
+        intervals = own.get(item_id) or by_category.get(category_id)
+        if not intervals:
+            always.append(item_id)
+            continue
+        for begin, finish in intervals:
+            events[begin].append((item_id, 1))
+            events[finish].append((item_id, -1))
+
+    bounds, segments, active = [], [], Counter()
+    for minute in sorted(events):
+        for item_id, delta in events[minute]:
+            active[item_id] += delta
+        bounds.append(minute)
+        segments.append(tuple(sorted(item_id for item_id, count in active.items() if count > 0)))
+    return {"always": tuple(sorted(always)), "bounds": bounds, "segments": segments}
+
+
+def lookup(index, minute):
+    """Id món bán được tại phút `minute` trong tuần (tăng dần)."""
+    position = bisect_right(index["bounds"], minute) - 1
+    scheduled = index["segments"][position] if position >= 0 else ()
+    return sorted((*index["always"], *scheduled))
+
+
+def _version():
+    versions, _ = table_state(TABLES)
+    return ".".join(map(str, versions))
+
+
+def get_index(version=None):
+    version = version or _version()
+    key = f"menu_schedule:index:{version}"
+    index = cache.get(key)
+    if index is None:
+        index = compile_index()
+        cache.set(key, index, CACHE_TIMEOUT)
+    return index
+
+
+def sellable_ids(at=None):
+    """Id các món bán được tại thời điểm `at` (mặc định: bây giờ)."""
+    version = _version()
+    slot = minute_of_week(at or timezone.now()) // SLOT_MINUTES
+    key = f"menu_schedule:slot:{version}:{slot}"
+    ids = cache.get(key)
+    if ids is None:
+        ids = lookup(get_index(version), slot * SLOT_MINUTES)
+        cache.set(key, ids, CACHE_TIMEOUT)
+    return ids
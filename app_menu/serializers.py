@@ -1,13 +1,18 @@
 # app_menu/serializers.py
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Prefetch
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
-from .models import MenuItem, RecipeItem
+from .models import AvailabilityWindow, MenuItem, MenuSnapshot, RecipeItem
 from app_home.models import MenuCategory
-from app_home.serializers import MenuCategorySerializer
+from app_home.images import display_url, variant_urls
+from app_home.serializers import IMAGE_VARIANTS_SCHEMA, DynamicFieldsMixin, MenuCategorySerializer
 from app_inventory.models import Ingredient
-from app_inventory.serializers import IngredientSerializer
+from app_home.rows import Nested, RowBuilder
+from app_inventory.serializers import IngredientSerializer, IngredientRows
 
 
-class RecipeItemSerializer(serializers.ModelSerializer):
+class RecipeItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     menu_item = serializers.PrimaryKeyRelatedField(
         queryset=MenuItem.objects.all()
     )
@@ -30,17 +35,27 @@ class RecipeItemSerializer(serializers.ModelSerializer):
             "quantity": {"help_text": "Định lượng nguyên liệu cho 1 phần (theo đơn vị của Ingredient)"},
         }
 
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        if "ingredient_detail" in fields:
+            ingredients = IngredientSerializer.optimize_queryset(
+                Ingredient.objects.all(), set(IngredientSerializer.Meta.fields)
+            )
+            queryset = queryset.prefetch_related(Prefetch("ingredient", queryset=ingredients))
+        return queryset
+
     def validate_quantity(self, value):
         if value < 0:
             raise serializers.ValidationError("quantity phải >= 0")
         return value
 
 
-class MenuItemSerializer(serializers.ModelSerializer):
+class MenuItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     category = serializers.PrimaryKeyRelatedField(queryset=MenuCategory.objects.all())
 
     category_detail = MenuCategorySerializer(source="category", read_only=True)
     image_url = serializers.SerializerMethodField(read_only=True)
+    image_variants = serializers.SerializerMethodField(read_only=True)
 
     recipe_items = RecipeItemSerializer(many=True, read_only=True)
 
@@ -53,7 +68,7 @@ class MenuItemSerializer(serializers.ModelSerializer):
             "price",
             "description",
             "available",
-            "image", "image_url",
+            "image", "image_url", "image_variants",
             "recipe_items",
         ]
         extra_kwargs = {
@@ -64,9 +79,79 @@ class MenuItemSerializer(serializers.ModelSerializer):
             "image": {"help_text": "Ảnh món (ImageField)"},
         }
 
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        if "category_detail" in fields:
+            queryset = queryset.select_related("category")
+        if "recipe_items" in fields:
+            recipe_items = RecipeItemSerializer.optimize_queryset(
+                RecipeItem.objects.all(), set(RecipeItemSerializer.Meta.fields)
+            )
+            queryset = queryset.prefetch_related(Prefetch("recipe_items", queryset=recipe_items))
+        return queryset
+
     def get_image_url(self, obj):
-        request = self.context.get("request")
-        if obj.image and hasattr(obj.image, "url"):
-            url = obj.image.url
-            return request.build_absolute_uri(url) if request else url
-        return None
+        return display_url(obj.image, obj.image_variants, self.context.get("request"))
+
+    @extend_schema_field(IMAGE_VARIANTS_SCHEMA)
+    def get_image_variants(self, obj):
+        return variant_urls(obj.image, obj.image_variants, self.context.get("request"))
+
+
+class AvailabilityWindowSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    days = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6), allow_empty=False, required=False,
+        help_text="Ngày trong tuần: 0 = Thứ 2 ... 6 = Chủ nhật (mặc định cả tuần)",
+    )
+
+    class Meta:
+        model = AvailabilityWindow
+        fields = ["id", "menu_item", "category", "name", "days", "start_time", "end_time"]
+        extra_kwargs = {
+            "menu_item": {"help_text": "Khung giờ riêng của món (bỏ trống nếu áp cho danh mục)"},
+            "category": {"help_text": "Khung giờ cho cả danh mục (bỏ trống nếu áp cho món)"},
+        }
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if "days" in self.fields:
+            data["days"] = [day for day in range(7) if instance.weekdays & (1 << day)]
+        return data
+
+    def validate(self, attrs):
+        days = attrs.pop("days", None)
+        if days is not None:
+            attrs["weekdays"] = sum(1 << day for day in set(days))
+        window = AvailabilityWindow(**{**self._current(), **attrs})
+        try:
+            window.clean()
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.message_dict if hasattr(exc, "error_dict") else exc.messages)
+        return attrs
+
+    def _current(self):
+        if self.instance is None:
+            return {}
+        return {name: getattr(self.instance, name)
+                for name in ("menu_item", "category", "weekdays", "start_time", "end_time")}
+
+
+class MenuSnapshotSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Thông tin bản phát hành (không kèm tài liệu – tải ở /menu-snapshots/{version}/document/)."""
+
+    class Meta:
+        model = MenuSnapshot
+        fields = ["version", "checksum", "size", "raw_size", "category_count", "item_count",
+                  "published_at", "published_by"]
+        read_only_fields = fields
+
+
+# -------------------- ĐỌC NHANH (.values) --------------------
+class RecipeItemRows(RowBuilder):
+    model = RecipeItem
+    fields = (
+        "id",
+        ("menu_item", "menu_item_id"),
+        ("ingredient", "ingredient_id"), ("ingredient_detail", Nested(IngredientRows, "ingredient")),
+        "quantity",
+    )
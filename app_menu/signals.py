@@ -0,0 +1,15 @@
+# app_menu/signals.py
+from django.db.models.signals import post_delete, post_save
+
+from app_inventory.models import Ingredient, InventoryLot
+from app_inventory.signals import stock_consumed
+from .costing import invalidate_menu_costs
+from .models import MenuItem, RecipeItem
+
+
+def connect_signals():
+    # Giá món, công thức, giá tham chiếu, giá/tồn theo lô đổi -> cache giá vốn hết hạn
+    for model in (MenuItem, RecipeItem, Ingredient, InventoryLot):
+        post_save.connect(invalidate_menu_costs, sender=model, dispatch_uid=f"menu_costs_save_{model.__name__}")
+        post_delete.connect(invalidate_menu_costs, sender=model, dispatch_uid=f"menu_costs_delete_{model.__name__}")
+    stock_consumed.connect(invalidate_menu_costs, dispatch_uid="menu_costs_stock_consumed")
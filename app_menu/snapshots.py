@@ -0,0 +1,103 @@
+# app_menu/snapshots.py
+"""
+Phát hành menu cho POS / app gọi món thành 1 tài liệu duy nhất (MenuSnapshot).
+
+- publish(): dựng menu đang bán (danh mục theo sort_order, món, giá, URL ảnh thu nhỏ, khung giờ
+  bán) bằng 4 query, serialize JSON chuẩn hoá (sort_keys) rồi băm SHA-256. Nội dung trùng bản
+  mới nhất -> không tạo version mới; khác -> nén gzip 1 lần, lưu kèm version tăng dần.
+- Client tải /menu-snapshots/latest/ kèm If-None-Match: không đổi -> 304 (1 query đọc version);
+  đổi -> nhận nguyên byte gzip đã lưu (Content-Encoding: gzip), server không serialize / nén lại.
+- URL ảnh là đường dẫn tương đối (MEDIA_URL) vì tài liệu không gắn với request nào.
+"""
+import gzip
+import hashlib
+import json
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+
+from app_home.images import display_url, variant_urls
+from app_home.models import MenuCategory
+from .models import AvailabilityWindow, MenuItem, MenuSnapshot
+from .schedule import SLOT_MINUTES
+
+
+def _window(weekdays, start, end):
+    return {
+        "days": [day for day in range(7) if weekdays & (1 << day)],
+        "start": start.strftime("%H:%M"),
+        "end": end.strftime("%H:%M"),
+    }
+
+
+def build_menu():
+    """Nội dung menu (chưa gắn version): {"slot_minutes", "categories": [... "items": [...]]}."""
+    item_windows, category_windows = defaultdict(list), defaultdict(list)
+    for item_id, category_id, weekdays, start, end in AvailabilityWindow.objects.order_by(
+        "start_time", "pk"
+    ).values_list("menu_item_id", "category_id", "weekdays", "start_time", "end_time"):
+        target = item_windows[item_id] if item_id is not None else category_windows[category_id]
+        target.append(_window(weekdays, start, end))
+
+    items = defaultdict(list)
+    for item in MenuItem.objects.filter(available=True).order_by("name").only(
+        "id", "name", "category_id", "price", "description", "image", "image_variants"
+    ):
+        items[item.category_id].append({
+            "id": item.id,
+            "name": item.name,
+            "price": item.price,
+            "description": item.description,
+            "image_url": display_url(item.image, item.image_variants),
+            "image_variants": variant_urls(item.image, item.image_variants),
+            # rỗng -> theo khung giờ của danh mục
+            "schedule": item_windows.get(item.id, []),
+        })
+
+    categories = [
+        {**category, "schedule": category_windows.get(category["id"], []), "items": items[category["id"]]}
+        for category in MenuCategory.objects.order_by("sort_order", "name").values("id", "name", "sort_order")
+        if items.get(category["id"])
+    ]
+    return {"slot_minutes": SLOT_MINUTES, "categories": categories}
+
+
+def _dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def latest(with_document=False):
+    qs = MenuSnapshot.objects.order_by("-version")
+    if not with_document:
+        qs = qs.defer("document")
+    return qs.first()
+
+
+def publish(published_by_id=None):
+    """(MenuSnapshot, đã tạo mới?) – menu không đổi so với bản mới nhất thì trả bản đó."""
+    menu = build_menu()
+    checksum = hashlib.sha256(_dumps(menu).encode()).hexdigest()
+    current = latest()
+    if current is not None and current.checksum == checksum:
+        return current, False
+
+    version = current.version + 1 if current else 1
+    raw = _dumps({"version": version, "checksum": checksum, **menu}).encode()
+    document = gzip.compress(raw, compresslevel=9, mtime=0)
+    try:
+        with transaction.atomic():
+            snapshot = MenuSnapshot.objects.create(
+                version=version, checksum=checksum, document=document, size=len(document), raw_size=len(raw),
+                category_count=len(menu["categories"]),
+                item_count=sum(len(category["items"]) for category in menu["categories"]),
+                published_by_id=published_by_id,
+            )
+    except IntegrityError:
+        # 2 lần phát hành cùng lúc -> lần sau dùng bản vừa ghi
+        return latest(), False
+    return snapshot, True
+
+
+def decompress(snapshot):
+    return gzip.decompress(bytes(snapshot.document))
@@ -1,13 +1,18 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import MenuItemViewSet, RecipeItemViewSet
+from .views import AvailabilityWindowViewSet, MenuItemViewSet, MenuSnapshotViewSet, RecipeItemViewSet, MenuCostViewSet
+from .async_views import menu_availability
 
 router = DefaultRouter()
 app_name = "app_menu"
 
 router.register(r"menu-items", MenuItemViewSet, basename="menu-items")
 router.register(r"menu-recipes", RecipeItemViewSet, basename="menu-recipes")
+router.register(r"menu-costs", MenuCostViewSet, basename="menu-costs")
+router.register(r"menu-schedules", AvailabilityWindowViewSet, basename="menu-schedules")
+router.register(r"menu-snapshots", MenuSnapshotViewSet, basename="menu-snapshots")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("availability/", menu_availability, name="menu-availability"),
 ]
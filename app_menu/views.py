@@ -1,17 +1,40 @@
 # app_menu/views.py
 from django.db.models import Q
-from rest_framework import viewsets, permissions
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import quote_etag
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from drf_spectacular.utils import (
     extend_schema, extend_schema_view, OpenApiParameter, OpenApiTypes
 )
 
+from app_home.caching import ConditionalGetMixin
 from app_home.pagination import CustomPagination
-from .models import MenuItem, RecipeItem
-from .serializers import MenuItemSerializer, RecipeItemSerializer
+from app_home.filters import (
+    SparseFieldsMixin, OrderingMixin, DeclarativeFilterBackend, BooleanFilter, DecimalFilter, IntegerFilter,
+)
+from app_home.rows import FastListMixin
+from app_home.search import search_queryset, matching_ids
+from app_home.models import IngredientCategory, MenuCategory, Unit
+from app_inventory.models import Ingredient, InventoryLot
+from middleware.compression import accepts_gzip
+from .models import AvailabilityWindow, MenuItem, MenuSnapshot, RecipeItem
+from .serializers import (
+    AvailabilityWindowSerializer, MenuItemSerializer, MenuSnapshotSerializer, RecipeItemSerializer, RecipeItemRows,
+)
+from .costing import get_menu_costs
+from .schedule import sellable_ids
+from . import snapshots
 
-class CommonViewSet(viewsets.ModelViewSet):
+class CommonViewSet(ConditionalGetMixin, FastListMixin, SparseFieldsMixin, OrderingMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = CustomPagination
+    filter_backends = [DeclarativeFilterBackend]
 
 
 # -------------------- MENU ITEM --------------------
@@ -24,14 +47,16 @@ class CommonViewSet(viewsets.ModelViewSet):
                              description="Lọc theo id danh mục menu"),
             OpenApiParameter("available", OpenApiTypes.BOOL, OpenApiParameter.QUERY,
                              description="true/false"),
+            OpenApiParameter("sellable_now", OpenApiTypes.BOOL, OpenApiParameter.QUERY,
+                             description="true: chỉ món đang trong khung giờ bán (và còn bán)"),
             OpenApiParameter("price_gte", OpenApiTypes.NUMBER, OpenApiParameter.QUERY,
                              description="Giá >= số này"),
             OpenApiParameter("price_lte", OpenApiTypes.NUMBER, OpenApiParameter.QUERY,
                              description="Giá <= số này"),
             OpenApiParameter("search", OpenApiTypes.STR, OpenApiParameter.QUERY,
-                             description="Tìm theo tên/ mô tả"),
+                             description="Tìm theo tên/ mô tả (không phân biệt dấu, khớp đầu từ)"),
             OpenApiParameter("ordering", OpenApiTypes.STR, OpenApiParameter.QUERY,
-                             description="Ví dụ: 'category__name', 'price', '-name' hoặc chuỗi 'a,b'"),
+                             description="Cho phép: 'category' (mặc định, theo danh mục rồi tên), 'name', 'price'; '-' để giảm dần, nhiều key 'a,b'"),
         ],
     ),
     retrieve=extend_schema(summary="Chi tiết món"),
@@ -42,38 +67,94 @@ class CommonViewSet(viewsets.ModelViewSet):
 )
 class MenuItemViewSet(CommonViewSet):
     serializer_class = MenuItemSerializer
+    cache_tables = (MenuItem, MenuCategory, RecipeItem, Ingredient, IngredientCategory, Unit, InventoryLot)
+    ordering_fields = {
+        "category": ("category", "name"),
+        "name": ("name",),
+        "price": ("price",),
+    }
+    default_ordering = ("category",)
+    query_filters = {
+        "category": IntegerFilter("category_id"),
+        "available": BooleanFilter("available"),
+        "price_gte": DecimalFilter("price", "gte"),
+        "price_lte": DecimalFilter("price", "lte"),
+        "sellable_now": BooleanFilter(None, method="filter_sellable_now",
+                                      help_text="true: chỉ món đang trong khung giờ bán (và còn bán)"),
+    }
+
+    def filter_sellable_now(self, queryset, value):
+        return queryset.filter(pk__in=sellable_ids()) if value else queryset
 
     def get_queryset(self):
-        qs = (
-            MenuItem.objects
-            .select_related("category")
-            .prefetch_related("recipe_items__ingredient")
-        )
+        qs = self.optimize_queryset(MenuItem.objects.all())
 
+        # category / available / price_* / sellable_now -> query_filters (DeclarativeFilterBackend)
         params = self.request.query_params
-        category_id = params.get("category")
-        available = params.get("available")
-        price_gte = params.get("price_gte")
-        price_lte = params.get("price_lte")
         search = params.get("search")
-        ordering = params.get("ordering", "category__name,name")
-
-        if category_id:
-            qs = qs.filter(category_id=category_id)
-        if available is not None:
-            val = str(available).lower() in ("1", "true", "t", "yes", "y")
-            qs = qs.filter(available=val)
-        if price_gte:
-            qs = qs.filter(price__gte=price_gte)
-        if price_lte:
-            qs = qs.filter(price__lte=price_lte)
         if search:
-            qs = qs.filter(Q(name__icontains=search) | Q(description__icontains=search))
+            # chỉ mục bỏ dấu: "pho bo" khớp "Phở bò"; không truyền ordering -> xếp theo độ khớp
+            qs = search_queryset(qs, search, rank="ordering" not in params)
+            if "ordering" not in params:
+                return qs
 
-        if "," in ordering:
-            fields = [f.strip() for f in ordering.split(",") if f.strip()]
-            return qs.order_by(*fields)
-        return qs.order_by(ordering)
+        return self.order_queryset(qs)
+
+    @extend_schema(
+        summary="Id các món đang bán được (theo khung giờ)",
+        description="Tra chỉ mục khung giờ đã biên dịch, cache theo ô 15 phút – không quét bảng món.",
+        parameters=[OpenApiParameter("at", OpenApiTypes.DATETIME, OpenApiParameter.QUERY,
+                                     description="Thời điểm cần tra (mặc định: bây giờ)")],
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(detail=False, methods=["get"], url_path="sellable")
+    def sellable(self, request):
+        raw = request.query_params.get("at")
+        at = timezone.now()
+        if raw:
+            try:
+                at = parse_datetime(raw)
+            except ValueError:                  # đúng định dạng nhưng sai giá trị (25:00, 31/02...)
+                at = None
+            if at is None:
+                raise ValidationError({"at": "Thời điểm không hợp lệ (ISO 8601)"})
+            if timezone.is_naive(at):
+                at = timezone.make_aware(at)
+        return Response({"at": at, "menu_items": sellable_ids(at)})
+
+
+# -------------------- AVAILABILITY WINDOW --------------------
+@extend_schema(tags=["app_menu"])
+@extend_schema_view(
+    list=extend_schema(
+        summary="Danh sách khung giờ bán",
+        parameters=[
+            OpenApiParameter("menu_item", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Lọc theo id món"),
+            OpenApiParameter("category", OpenApiTypes.INT, OpenApiParameter.QUERY,
+                             description="Lọc theo id danh mục menu"),
+        ],
+    ),
+    retrieve=extend_schema(summary="Chi tiết khung giờ bán"),
+    create=extend_schema(summary="Tạo khung giờ bán"),
+    update=extend_schema(summary="Cập nhật khung giờ bán (PUT)"),
+    partial_update=extend_schema(summary="Cập nhật khung giờ bán (PATCH)"),
+    destroy=extend_schema(summary="Xoá khung giờ bán"),
+)
+class AvailabilityWindowViewSet(CommonViewSet):
+    serializer_class = AvailabilityWindowSerializer
+    cache_tables = (AvailabilityWindow,)
+    ordering_fields = {
+        "menu_item": ("menu_item", "start_time"),
+        "category": ("category", "start_time"),
+    }
+    default_ordering = ("menu_item",)
+    query_filters = {
+        "menu_item": IntegerFilter("menu_item_id"),
+        "category": IntegerFilter("category_id"),
+    }
+
+    def get_queryset(self):
+        return self.order_queryset(self.optimize_queryset(AvailabilityWindow.objects.all()))
 
 
 # -------------------- RECIPE ITEM --------------------
@@ -89,7 +170,7 @@ class MenuItemViewSet(CommonViewSet):
             OpenApiParameter("search", OpenApiTypes.STR, OpenApiParameter.QUERY,
                              description="Tìm theo tên món hoặc tên nguyên liệu"),
             OpenApiParameter("ordering", OpenApiTypes.STR, OpenApiParameter.QUERY,
-                             description="Ví dụ: 'menu_item__name', 'ingredient__name', '-quantity'"),
+                             description="Cho phép: 'menu_item' (mặc định), 'ingredient' (theo id)"),
         ],
     ),
     retrieve=extend_schema(summary="Chi tiết RecipeItem"),
@@ -100,26 +181,161 @@ class MenuItemViewSet(CommonViewSet):
 )
 class RecipeItemViewSet(CommonViewSet):
     serializer_class = RecipeItemSerializer
+    cache_tables = (RecipeItem, Ingredient, IngredientCategory, Unit, InventoryLot,)
+    row_builder = RecipeItemRows
+    ordering_fields = {
+        "menu_item": ("menu_item", "ingredient"),
+        "ingredient": ("ingredient", "menu_item"),
+    }
+    default_ordering = ("menu_item",)
+    query_filters = {
+        "menu_item": IntegerFilter("menu_item_id"),
+        "ingredient": IntegerFilter("ingredient_id"),
+    }
 
     def get_queryset(self):
-        qs = RecipeItem.objects.select_related("menu_item", "ingredient")
-        params = self.request.query_params
-        menu_item_id = params.get("menu_item")
-        ingredient_id = params.get("ingredient")
-        search = params.get("search")
-        ordering = params.get("ordering", "menu_item__name,ingredient__name")
-
-        if menu_item_id:
-            qs = qs.filter(menu_item_id=menu_item_id)
-        if ingredient_id:
-            qs = qs.filter(ingredient_id=ingredient_id)
+        qs = self.optimize_queryset(RecipeItem.objects.all())
+        search = self.request.query_params.get("search")
         if search:
             qs = qs.filter(
-                Q(menu_item__name__icontains=search) |
-                Q(ingredient__name__icontains=search)
+                Q(menu_item_id__in=matching_ids(MenuItem, search)) |
+                Q(ingredient_id__in=matching_ids(Ingredient, search))
             )
 
-        if "," in ordering:
-            fields = [f.strip() for f in ordering.split(",") if f.strip()]
-            return qs.order_by(*fields)
-        return qs.order_by(ordering)
+        return self.order_queryset(qs)
+
+
+# -------------------- MENU COST (giá vốn / biên lợi nhuận) --------------------
+@extend_schema(tags=["app_menu"])
+@extend_schema_view(
+    list=extend_schema(
+        operation_id="api_app_menu_menu_costs_list",
+        summary="Giá vốn & biên lợi nhuận toàn bộ menu",
+        description=(
+            "Cost = Σ định lượng × giá nhập bình quân các lô còn hàng "
+            "(không có lô thì dùng giá tham chiếu). Tính 1 lượt cho cả menu và cache "
+            "tới khi giá/công thức thay đổi."
+        ),
+        parameters=[
+            OpenApiParameter("category", OpenApiTypes.INT, OpenApiParameter.QUERY,
+                             description="Lọc theo id danh mục menu"),
+            OpenApiParameter("ordering", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                             description="name / price / cost / margin / margin_percent / food_cost_percent, "
+                                         "nhiều khoá cách nhau dấu phẩy (thêm '-' để giảm dần)"),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    ),
+    retrieve=extend_schema(
+        summary="Giá vốn & biên lợi nhuận 1 món",
+        parameters=[OpenApiParameter("id", OpenApiTypes.INT, OpenApiParameter.PATH, description="id món")],
+        responses=OpenApiTypes.OBJECT,
+    ),
+)
+class MenuCostViewSet(OrderingMixin, viewsets.ViewSet):
+    permission_classes = [permissions.IsAuthenticated]
+    # sắp xếp trên dict trong bộ nhớ (bản cache giá vốn), không đi qua index DB
+    ordering_fields = {
+        key: (key,) for key in ("name", "price", "cost", "margin", "margin_percent", "food_cost_percent")
+    }
+    default_ordering = ("name",)
+    ordering_tiebreaker = "menu_item"
+    ordering_allow_unindexed = True
+
+    def list(self, request):
+        rows = list(get_menu_costs().values())
+        params = request.query_params
+
+        category_id = params.get("category")
+        if category_id:
+            rows = [r for r in rows if str(r["category"]) == category_id]
+
+        # sort ổn định từ khoá cuối lên khoá đầu; giá trị None luôn xếp cuối
+        for column in reversed(self.get_ordering_columns()):
+            key = column.lstrip("-")
+            present = [r for r in rows if r[key] is not None]
+            present.sort(key=lambda r: r[key], reverse=column.startswith("-"))
+            rows = present + [r for r in rows if r[key] is None]
+
+        return Response({"total": len(rows), "results": rows})
+
+    def retrieve(self, request, pk=None):
+        try:
+            row = get_menu_costs()[int(pk)]
+        except (KeyError, TypeError, ValueError):
+            raise Http404
+        return Response(row)
+
+
+# -------------------- MENU SNAPSHOT (menu phát hành cho client) --------------------
+def _document_response(request, snapshot, immutable):
+    """Byte gzip đã lưu, trả nguyên trạng; ETag = checksum nội dung."""
+    etag = quote_etag(snapshot.checksum)
+    if etag in request.META.get("HTTP_IF_NONE_MATCH", ""):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        if snapshot.get_deferred_fields():
+            snapshot = MenuSnapshot.objects.get(pk=snapshot.pk)
+        if accepts_gzip(request):
+            response = HttpResponse(bytes(snapshot.document), content_type="application/json")
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(snapshots.decompress(snapshot), content_type="application/json")
+    response["ETag"] = etag
+    response["X-Menu-Version"] = str(snapshot.version)
+    patch_vary_headers(response, ("Accept-Encoding", "Authorization"))
+    # API cần đăng nhập -> chỉ cache phía client; bản theo version không bao giờ đổi,
+    # "latest" thì luôn hỏi lại (304 nếu chưa đổi)
+    response["Cache-Control"] = "private, max-age=31536000, immutable" if immutable else "private, no-cache"
+    return response
+
+
+@extend_schema(tags=["app_menu"])
+@extend_schema_view(
+    list=extend_schema(summary="Các bản phát hành menu"),
+    retrieve=extend_schema(summary="Thông tin 1 bản phát hành menu"),
+)
+class MenuSnapshotViewSet(ConditionalGetMixin, SparseFieldsMixin, OrderingMixin, viewsets.ReadOnlyModelViewSet):
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CustomPagination
+    filter_backends = [DeclarativeFilterBackend]
+    serializer_class = MenuSnapshotSerializer
+    cache_tables = (MenuSnapshot,)
+    lookup_field = "version"
+    lookup_value_regex = r"\d+"
+    ordering_fields = {"version": ("version",)}
+    default_ordering = ("-version",)
+
+    def get_queryset(self):
+        return self.order_queryset(MenuSnapshot.objects.defer("document"))
+
+    @extend_schema(
+        summary="Menu mới nhất (1 tài liệu JSON, gzip)",
+        description="Gửi If-None-Match = ETag lần trước: chưa phát hành bản mới -> 304. "
+                    "Header X-Menu-Version cho biết version.",
+        responses={(200, "application/json"): OpenApiTypes.OBJECT},
+    )
+    @action(detail=False, methods=["get"], url_path="latest")
+    def latest(self, request):
+        snapshot = snapshots.latest()
+        if snapshot is None:
+            raise Http404("Chưa phát hành menu.")
+        return _document_response(request, snapshot, immutable=False)
+
+    @extend_schema(summary="Tài liệu menu theo version (gzip, cache vô thời hạn)",
+                   responses={(200, "application/json"): OpenApiTypes.OBJECT})
+    @action(detail=True, methods=["get"], url_path="document")
+    def document(self, request, version=None):
+        snapshot = self.get_object()
+        return _document_response(request, snapshot, immutable=True)
+
+    @extend_schema(
+        summary="Phát hành menu",
+        description="Dựng lại menu đang bán; khác bản mới nhất -> version mới (201), trùng -> trả bản đó (200).",
+        request=None,
+        responses={200: MenuSnapshotSerializer, 201: MenuSnapshotSerializer},
+    )
+    @action(detail=False, methods=["post"], url_path="publish", permission_classes=[permissions.IsAdminUser])
+    def publish(self, request):
+        snapshot, created = snapshots.publish(published_by_id=request.user.id)
+        return Response(MenuSnapshotSerializer(snapshot).data,
+                        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
@@ -12,9 +12,11 @@ from django.db.models import Sum, Count, Avg
 from django.db.models.functions import TruncDay
 
 # Models trong app_order
-from .models import Order, OrderItem, Payment
+from .models import SIGNED_AMOUNT, DailyClosing, Order, OrderItem, Payment
+from . import services
 
 # Models tham chiếu bên ngoài
+from app_home.serializers import staff_profile_of
 from app_menu.models import MenuItem           # để đọc BOM và lấy price
 from app_inventory.models import Ingredient    # hoặc đổi sang app bạn đang dùng cho Ingredient
 
@@ -103,6 +105,7 @@ class OrderItemInline(admin.TabularInline):
 class PaymentInline(admin.TabularInline):
     model = Payment
     extra = 0
+    autocomplete_fields = ("received_by",)
     class Media:
         js = ("admin/order_payment_inline.js",)
 
@@ -125,7 +128,8 @@ class OrderAdmin(admin.ModelAdmin):
     search_fields = ("order_number", "customer_name", "customer_phone")  # bỏ staff_name vì model không còn
     ordering = ("-created_at",)
     inlines = [OrderItemInline, PaymentInline]
-    readonly_fields = ("created_at", "completed_at")
+    readonly_fields = ("payment_status", "total_amount", "amount_paid", "created_at", "completed_at")
+    autocomplete_fields = ("handled_by",)
 
     fieldsets = (
         (None, {
@@ -133,45 +137,59 @@ class OrderAdmin(admin.ModelAdmin):
                 "order_number",
                 ("customer_name", "customer_phone"),
                 ("order_type", "table"),
+                "handled_by",
                 "notes",
             )
         }),
         ("Trạng thái", {
             "fields": (
                 "order_status",
-                "payment_status",
+                ("payment_status", "total_amount", "amount_paid"),
                 ("created_at", "completed_at"),
             )
         }),
     )
 
+    def save_model(self, request, obj, form, change):
+        # đơn tạo từ admin: mặc định gán cho nhân sự của người đang thao tác
+        if obj.handled_by_id is None and not change:
+            obj.handled_by = staff_profile_of(request.user)
+        super().save_model(request, obj, form, change)
+        if obj.order_status == Order.OrderStatus.CANCELLED and "order_status" in form.changed_data:
+            services.cancel_stock(obj.pk)
+
     # Không còn subtotal/total trên Order → không gọi recalc_totals()
     def save_formset(self, request, form, formset, change):
         # Nếu là OrderItem, bạn đã xử lý ở Inline -> cứ save
         if formset.model is OrderItem:
-            return super().save_formset(request, form, formset, change)
+            order = form.instance
+            before = services.order_quantities(order.pk)
+            super().save_formset(request, form, formset, change)
+            if order.order_status != Order.OrderStatus.CANCELLED:
+                # xuất thêm / trả lại lô phần chênh lệch so với trước khi sửa món
+                services.adjust_line_stock(order.pk, before, services.order_quantities(order.pk))
+            services.refresh_totals([order.pk])
+            return
 
         if formset.model is Payment:
             instances = formset.save(commit=False)
+            for obj in formset.deleted_objects:
+                obj.delete()
 
-            # tổng tiền các mặt hàng
-            total_items = form.instance.items.aggregate(s=Sum("total"))["s"] or Decimal("0")
-
-            # tổng các payment đã có trong DB (không tính mấy cái đang save tạm)
-            paid_existing = form.instance.payments.exclude(pk__in=[obj.pk for obj in instances if obj.pk]).aggregate(
-                s=Sum("amount")
-            )["s"] or Decimal("0")
-
-            # tổng các payment đang nhập (đã có value)
-            paid_inputs = sum([Decimal(obj.amount or 0) for obj in instances])
-
-            remaining = total_items - paid_existing - paid_inputs
+            # số còn phải thu theo cột denormalized (total_amount đã cập nhật ở inline món phía trên)
+            order = Order.objects.only("total_amount", "amount_paid").get(pk=form.instance.pk)
+            remaining = order.total_amount - order.amount_paid - sum(
+                Decimal(obj.amount or 0) for obj in instances if obj.pk is None
+            )
+            receiver = staff_profile_of(request.user)
             # fill cho những obj có amount rỗng/0
             for obj in instances:
                 if not obj.amount or Decimal(obj.amount) == 0:
                     fill = max(remaining, Decimal("0"))
                     obj.amount = fill
                     remaining = Decimal("0")
+                if obj.received_by_id is None:
+                    obj.received_by = receiver
                 obj.save()
 
             formset.save_m2m()
@@ -179,6 +197,12 @@ class OrderAdmin(admin.ModelAdmin):
 
         # mặc định
         return super().save_formset(request, form, formset, change)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # sửa tay món / thanh toán -> tính lại amount_paid + payment_status từ dữ liệu thật
+        services.reconcile([form.instance.pk])
+
     def get_urls(self):
         urls = super().get_urls()
         custom = [
@@ -194,10 +218,45 @@ class OrderItemAdmin(admin.ModelAdmin):
 
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
-    list_display = ("order", "method", "amount", "paid_at", "note")
-    list_filter = ("method", "paid_at")
+    list_display = ("order", "kind", "method", "amount", "paid_at", "received_by", "note")
+    list_filter = ("kind", "method", "paid_at")
     search_fields = ("order__order_number", "note")
     ordering = ("-paid_at",)
+    autocomplete_fields = ("received_by",)
+
+    def save_model(self, request, obj, form, change):
+        if obj.received_by_id is None and not change:
+            obj.received_by = staff_profile_of(request.user)
+        super().save_model(request, obj, form, change)
+        services.reconcile([obj.order_id])
+
+    def delete_model(self, request, obj):
+        order_id = obj.order_id
+        super().delete_model(request, obj)
+        services.reconcile([order_id])
+
+    def delete_queryset(self, request, queryset):
+        order_ids = set(queryset.values_list("order_id", flat=True))
+        super().delete_queryset(request, queryset)
+        services.reconcile(order_ids)
+
+
+@admin.register(DailyClosing)
+class DailyClosingAdmin(admin.ModelAdmin):
+    """Z-report chỉ xem: chốt qua API /daily-closings/close/ hoặc lệnh close_business_day."""
+    list_display = ("business_date", "order_count", "cancelled_count", "items_sold", "gross_sales", "refunds",
+                    "net_sales", "closed_at", "closed_by")
+    date_hierarchy = "business_date"
+    ordering = ("-business_date",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 # ========================
@@ -208,8 +267,12 @@ from django.utils import timezone
 from django.db.models.functions import TruncDay, Coalesce, NullIf
 from django.db.models import Sum, Avg, Count, F, Value, CharField, Case, When
 from django.db.models.functions import TruncDay, Coalesce
+from django.views.decorators.cache import never_cache
+from foodshopeight_be.db.routing import use_replica
+# view async (ASGI): các query chờ DB không giữ worker; staff_member_required hỗ trợ view async
 @staff_member_required
-def dashboard_data(request):
+@use_replica()  # báo cáo: đọc từ replica (nếu có), không tranh tài nguyên với ghi đơn
+async def dashboard_data(request):
     now = timezone.now()
     start_14d = now - timedelta(days=14)
     start_30d = now - timedelta(days=30)
@@ -220,34 +283,37 @@ def dashboard_data(request):
         Payment.objects.filter(paid_at__gte=start_14d)
         .annotate(d=TruncDay("paid_at"))
         .values("d")
-        .annotate(revenue=Sum("amount"))
+        .annotate(revenue=Sum(SIGNED_AMOUNT))
         .order_by("d")
     )
-    rev_labels = [x["d"].strftime("%d/%m") for x in rev_qs]
-    rev_values = [float(x["revenue"] or 0) for x in rev_qs]
+    rev_rows = [x async for x in rev_qs]
+    rev_labels = [x["d"].strftime("%d/%m") for x in rev_rows]
+    rev_values = [float(x["revenue"] or 0) for x in rev_rows]
 
     # KPI
-    revenue_today = Payment.objects.filter(paid_at__gte=today_start).aggregate(s=Sum("amount"))["s"] or 0
-    revenue_7d = Payment.objects.filter(paid_at__gte=now - timedelta(days=7)).aggregate(s=Sum("amount"))["s"] or 0
-    orders_today = Order.objects.filter(created_at__gte=today_start).count()
+    # hoàn tiền mang dấu âm (SIGNED_AMOUNT) -> doanh thu thực thu
+    revenue_today = (await Payment.objects.filter(paid_at__gte=today_start).aaggregate(s=Sum(SIGNED_AMOUNT)))["s"] or 0
+    revenue_7d = (await Payment.objects.filter(paid_at__gte=now - timedelta(days=7))
+                  .aaggregate(s=Sum(SIGNED_AMOUNT)))["s"] or 0
+    orders_today = await Order.objects.filter(created_at__gte=today_start).acount()
 
     # AOV 30 ngày
+    # total_amount denormalized -> không join/gom OrderItem theo từng đơn
     aov_30d = (
-        Order.objects.filter(created_at__gte=start_30d)
-        .annotate(sum_total=Sum("items__total"))
-        .aggregate(avg=Avg("sum_total"))["avg"] or 0
-    )
+        await Order.objects.filter(created_at__gte=start_30d).aaggregate(avg=Avg("total_amount"))
+    )["avg"] or 0
 
     # Phương thức thanh toán (30 ngày)
     pm_qs = (
         Payment.objects.filter(paid_at__gte=start_30d)
         .values("method")
-        .annotate(total=Sum("amount"))
+        .annotate(total=Sum(SIGNED_AMOUNT))
         .order_by("-total")
     )
     method_map = dict(Payment.Method.choices)
-    pm_labels = [method_map.get(x["method"], x["method"]) for x in pm_qs]
-    pm_values = [float(x["total"] or 0) for x in pm_qs]
+    pm_rows = [x async for x in pm_qs]
+    pm_labels = [method_map.get(x["method"], x["method"]) for x in pm_rows]
+    pm_values = [float(x["total"] or 0) for x in pm_rows]
 
     # Top món (30 ngày) — ưu tiên snapshot name, fallback sang tên món hiện tại
     ti_qs = (
@@ -265,8 +331,9 @@ def dashboard_data(request):
         .order_by("-qty")[:10]
     )
 
-    ti_labels = [i["item_name"] or "(N/A)" for i in ti_qs]
-    ti_values = [int(i["qty"] or 0) for i in ti_qs]
+    ti_rows = [i async for i in ti_qs]
+    ti_labels = [i["item_name"] or "(N/A)" for i in ti_rows]
+    ti_values = [int(i["qty"] or 0) for i in ti_rows]
 
     # Trạng thái đơn hôm nay
     st_qs = (
@@ -276,8 +343,9 @@ def dashboard_data(request):
         .order_by("-c")
     )
     st_map = dict(Order.OrderStatus.choices)
-    st_labels = [st_map.get(x["order_status"], x["order_status"]) for x in st_qs]
-    st_values = [int(x["c"]) for x in st_qs]
+    st_rows = [x async for x in st_qs]
+    st_labels = [st_map.get(x["order_status"], x["order_status"]) for x in st_rows]
+    st_values = [int(x["c"]) for x in st_rows]
 
     return JsonResponse({
         "revenue_by_day": {"labels": rev_labels, "values": rev_values},
@@ -301,7 +369,8 @@ def menu_item_price_view(request, pk: int):
 def _wrap_urls(get_urls):
     def wrapper():
         my = [
-            path("dashboard-data/", admin.site.admin_view(dashboard_data), name="dashboard-data"),
+            # admin_view() bọc view bằng hàm sync -> view async chỉ dùng never_cache + staff_member_required
+            path("dashboard-data/", never_cache(dashboard_data), name="dashboard-data"),
             path("menu-item-price/<int:pk>/", admin.site.admin_view(menu_item_price_view), name="menu-item-price"),
         ]
         return my + get_urls()
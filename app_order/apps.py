@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class AppOrderConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app_order'
+
+    def ready(self):
+        from app_home import caching
+        from . import tables
+        from .models import DailyClosing, Order, OrderItem, Payment, TableState
+
+        caching.track(Order, OrderItem, Payment, DailyClosing, TableState)
+        tables.connect()
@@ -0,0 +1,97 @@
+# app_order/async_views.py
+"""
+Live feed đơn hàng cho màn hình bếp / thu ngân (long-poll, chạy dưới ASGI).
+
+GET /api/app-order/live/orders/?cursor=<cursor lần trước>&timeout=25
+- cursor khác version hiện tại của Order/OrderItem -> trả ngay danh sách đơn đang xử lý.
+- cursor trùng -> giữ kết nối, kiểm tra lại mỗi POLL_INTERVAL giây (asyncio.sleep,
+  không chiếm thread/worker) tới khi có thay đổi hoặc hết timeout -> {"changed": false}.
+
+GET /api/app-order/live/tables/?cursor=...&timeout=25 – như trên cho sơ đồ bàn
+(version DiningTable/TableState), trả {"cursor", "changed", "tables": [...]}.
+
+Chỉ giữ kết nối khi chạy dưới ASGI. Dưới WSGI (gunicorn sync) view async chạy qua
+async_to_sync và chiếm trọn 1 worker suốt thời gian chờ -> bỏ qua timeout, trả ngay
+trạng thái hiện tại (client poll lại như polling thường).
+"""
+import asyncio
+
+from django.core.handlers.asgi import ASGIRequest
+from django.views.decorators.http import require_GET
+
+from app_home.aio import async_login_required, json_response
+from app_home.caching import atable_state
+from app_home.models import DiningTable
+
+from . import tables
+from .models import Order, OrderItem, TableState
+
+POLL_INTERVAL = 1
+MAX_TIMEOUT = 30
+DEFAULT_TIMEOUT = 25
+ACTIVE_STATUSES = tables.OPEN_STATUSES
+
+
+def _timeout(request):
+    if not isinstance(request, ASGIRequest):
+        return 0
+    try:
+        value = int(request.GET.get("timeout", DEFAULT_TIMEOUT))
+    except ValueError:
+        value = DEFAULT_TIMEOUT
+    return max(0, min(value, MAX_TIMEOUT))
+
+
+async def _cursor(models=(Order, OrderItem)):
+    versions, _ = await atable_state(models)
+    return ".".join(map(str, versions))
+
+
+async def _wait_for_change(request, models):
+    """Cursor mới (trùng cursor client gửi lên nếu hết timeout mà không có thay đổi)."""
+    since = request.GET.get("cursor", "")
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + _timeout(request)
+
+    cursor = await _cursor(models)
+    while cursor == since and loop.time() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        cursor = await _cursor(models)
+    return cursor, cursor != since
+
+
+async def _active_orders():
+    orders = [
+        order async for order in Order.objects.filter(order_status__in=ACTIVE_STATUSES)
+        .order_by("created_at")
+        .values("id", "order_number", "order_type", "table_id", "order_status",
+                "payment_status", "customer_name", "notes", "created_at")
+    ]
+    by_id = {order["id"]: order for order in orders}
+    for order in orders:
+        order["items"] = []
+    async for item in OrderItem.objects.filter(order_id__in=by_id).order_by("pk") \
+            .values("id", "order_id", "menu_item_id", "name", "quantity", "total"):
+        by_id[item.pop("order_id")]["items"].append(item)
+    return orders
+
+
+@require_GET
+@async_login_required
+async def live_orders(request):
+    cursor, changed = await _wait_for_change(request, (Order, OrderItem))
+    if not changed:
+        return json_response({"cursor": cursor, "changed": False, "orders": []})
+    return json_response({"cursor": cursor, "changed": True, "orders": await _active_orders()})
+
+
+@require_GET
+@async_login_required
+async def live_tables(request):
+    cursor, changed = await _wait_for_change(request, (DiningTable, TableState))
+    if not changed:
+        return json_response({"cursor": cursor, "changed": False, "tables": []})
+    rows = await tables.aboard()
+    for row in rows:
+        row["occupied"] = bool(row["open_orders"])
+    return json_response({"cursor": cursor, "changed": True, "tables": rows})
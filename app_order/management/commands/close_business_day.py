@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from app_order.services import ClosingError, close_day
+
+
+class Command(BaseCommand):
+    help = "Chốt ngày (Z-report) – chạy bằng cron cuối ngày; ngày đã chốt thì bỏ qua."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="YYYY-MM-DD (mặc định: hôm nay)")
+
+    def handle(self, *args, **options):
+        day = timezone.localdate()
+        if options["date"]:
+            day = parse_date(options["date"])
+            if day is None:
+                raise CommandError("--date phải có dạng YYYY-MM-DD")
+        try:
+            row, created = close_day(day)
+        except ClosingError as exc:
+            raise CommandError(str(exc))
+        if created:
+            self.stdout.write(self.style.SUCCESS(f"Đã chốt {row}: thực thu {row.net_sales}"))
+        else:
+            self.stdout.write(f"{row} đã chốt lúc {timezone.localtime(row.closed_at):%H:%M %d/%m/%Y}")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from app_order.models import Order
+from app_order.services import reconcile
+
+
+class Command(BaseCommand):
+    help = ("Tính lại total_amount / amount_paid / payment_status của đơn từ OrderItem và Payment "
+            "(sau khi nhập liệu trực tiếp vào DB hoặc để đối soát).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--order", type=int, action="append", dest="orders", help="Id đơn (lặp lại được); mặc định: mọi đơn")
+
+    def handle(self, *args, **options):
+        order_ids = options["orders"]
+        reconcile(order_ids)
+        count = len(order_ids) if order_ids else Order.objects.count()
+        self.stdout.write(self.style.SUCCESS(f"Đã đối soát {count} đơn hàng"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_home', '0005_ordering_indexes'),
+        ('app_order', '0002_alter_order_options_alter_orderitem_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['order_status', 'created_at'], name='app_order_o_order_s_c17fa4_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_home', '0006_tableversion'),
+        ('app_hr', '0007_staff_performance'),
+        ('app_order', '0003_filter_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='handled_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='handled_orders', to='app_hr.staffprofile', verbose_name='Nhân viên phụ trách'),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='received_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='received_payments', to='app_hr.staffprofile', verbose_name='Nhân viên thu'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['completed_at', 'handled_by'], name='app_order_o_complet_aefb23_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['paid_at', 'received_by'], name='app_order_p_paid_at_7be876_idx'),
+        ),
+    ]
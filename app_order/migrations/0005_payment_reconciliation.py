@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:50
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_amounts(apps, schema_editor):
+    # đơn cũ chưa có hoàn tiền -> amount_paid = tổng Payment; payment_status giữ nguyên giá trị nhập tay
+    Order = apps.get_model("app_order", "Order")
+    OrderItem = apps.get_model("app_order", "OrderItem")
+    Payment = apps.get_model("app_order", "Payment")
+    money = models.DecimalField(max_digits=14, decimal_places=2)
+
+    def total_of(model, field):
+        return Coalesce(
+            Subquery(model.objects.filter(order=OuterRef("pk")).order_by().values("order")
+                     .annotate(s=Sum(field)).values("s")[:1]),
+            Value(Decimal("0")),
+            output_field=money,
+        )
+
+    Order.objects.update(total_amount=total_of(OrderItem, "total"), amount_paid=total_of(Payment, "amount"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_order', '0004_staff_performance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='amount_paid',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14, verbose_name='Đã thu'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14, verbose_name='Tổng tiền'),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='kind',
+            field=models.CharField(choices=[('payment', 'Thu tiền'), ('refund', 'Hoàn tiền')], default='payment', max_length=10, verbose_name='Loại'),
+        ),
+        migrations.RunPython(backfill_amounts, migrations.RunPython.noop),
+    ]
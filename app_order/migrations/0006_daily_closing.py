@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_hr', '0008_payroll'),
+        ('app_order', '0005_payment_reconciliation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyClosing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('business_date', models.DateField(unique=True, verbose_name='Ngày kinh doanh')),
+                ('order_count', models.PositiveIntegerField(default=0, verbose_name='Số đơn')),
+                ('cancelled_count', models.PositiveIntegerField(default=0, verbose_name='Số đơn hủy')),
+                ('cancelled_amount', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Giá trị đơn hủy')),
+                ('items_sold', models.PositiveIntegerField(default=0, verbose_name='Số món bán ra')),
+                ('gross_sales', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Tổng thu')),
+                ('refunds', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Tổng hoàn tiền')),
+                ('net_sales', models.DecimalField(decimal_places=2, default=0, max_digits=16, verbose_name='Thực thu')),
+                ('by_method', models.JSONField(default=dict, verbose_name='Theo phương thức')),
+                ('by_order_type', models.JSONField(default=dict, verbose_name='Theo hình thức')),
+                ('closed_at', models.DateTimeField(auto_now_add=True, verbose_name='Chốt lúc')),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='app_hr.staffprofile', verbose_name='Người chốt')),
+            ],
+            options={
+                'verbose_name': 'Chốt ngày (Z-report)',
+                'verbose_name_plural': 'Chốt ngày (Z-report)',
+                'ordering': ('-business_date',),
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-19 14:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+OPEN_STATUSES = ("pending", "preparing", "ready")
+
+
+def backfill_states(apps, schema_editor):
+    Order = apps.get_model("app_order", "Order")
+    TableState = apps.get_model("app_order", "TableState")
+    states = {}
+    orders = (
+        Order.objects.filter(table__isnull=False, order_status__in=OPEN_STATUSES)
+        .order_by("created_at", "pk").values_list("table_id", "pk", "created_at", "total_amount")
+    )
+    for table_id, order_id, created_at, total in orders:
+        state = states.setdefault(table_id, TableState(table_id=table_id, current_order_id=order_id,
+                                                       seated_at=created_at))
+        state.open_orders += 1
+        state.running_total += total
+    TableState.objects.bulk_create(states.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_home', '0006_tableversion'),
+        ('app_order', '0006_daily_closing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableState',
+            fields=[
+                ('table', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='state', serialize=False, to='app_home.diningtable', verbose_name='Bàn')),
+                ('open_orders', models.PositiveSmallIntegerField(default=0, verbose_name='Số đơn đang mở')),
+                ('seated_at', models.DateTimeField(blank=True, null=True, verbose_name='Vào bàn lúc')),
+                ('running_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Tạm tính')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Cập nhật')),
+                ('current_order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='app_order.order', verbose_name='Đơn đang mở')),
+            ],
+            options={
+                'verbose_name': 'Trạng thái bàn',
+                'verbose_name_plural': 'Trạng thái bàn',
+            },
+        ),
+        migrations.RunPython(backfill_states, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 # app_order/models.py
 from decimal import Decimal
 from django.db import models
+from django.db.models import Case, F, When
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from django.core.exceptions import ValidationError
@@ -37,6 +38,11 @@ class Order(models.Model):
                                     default=OrderStatus.PENDING)
     payment_status = models.CharField("Trạng thái thanh toán", max_length=20, choices=PaymentStatus.choices,
                                       default=PaymentStatus.UNPAID)
+    # denormalized (app_order.services): tổng tiền món và số đã thu (trừ hoàn tiền)
+    total_amount = models.DecimalField("Tổng tiền", max_digits=14, decimal_places=2, default=0, editable=False)
+    amount_paid = models.DecimalField("Đã thu", max_digits=14, decimal_places=2, default=0, editable=False)
+    handled_by = models.ForeignKey("app_hr.StaffProfile", on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name="handled_orders", verbose_name="Nhân viên phụ trách")
     created_at = models.DateTimeField("Ngày tạo", default=timezone.now)
     completed_at = models.DateTimeField("Ngày hoàn tất", null=True, blank=True)
     notes = models.TextField("Ghi chú", blank=True, default="")
@@ -46,7 +52,10 @@ class Order(models.Model):
             models.Index(fields=["created_at"]),
             models.Index(fields=["order_number"]),
             models.Index(fields=["order_status"]),
+            models.Index(fields=["order_status", "created_at"]),
             models.Index(fields=["payment_status"]),
+            # thống kê hiệu suất: lọc theo khoảng completed_at rồi gom theo nhân viên
+            models.Index(fields=["completed_at", "handled_by"]),
         ]
         verbose_name = "Đơn hàng"
         verbose_name_plural = "Đơn hàng"
@@ -122,18 +131,97 @@ class Payment(models.Model):
         TRANSFER = "transfer", "Chuyển khoản"
         E_WALLET = "ewallet", "Ví điện tử"
 
+    class Kind(models.TextChoices):
+        PAYMENT = "payment", "Thu tiền"
+        REFUND = "refund", "Hoàn tiền"
+
     order = models.ForeignKey(Order, on_delete=models.CASCADE,
                               related_name="payments", verbose_name="Đơn hàng")
+    kind = models.CharField("Loại", max_length=10, choices=Kind.choices, default=Kind.PAYMENT)
     method = models.CharField("Phương thức", max_length=20, choices=Method.choices)
     amount = models.DecimalField("Số tiền", max_digits=14, decimal_places=2,
                                  validators=[MinValueValidator(0)])
     paid_at = models.DateTimeField("Thời điểm thanh toán", default=timezone.now)
+    received_by = models.ForeignKey("app_hr.StaffProfile", on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name="received_payments", verbose_name="Nhân viên thu")
     note = models.CharField("Ghi chú", max_length=255, blank=True, default="")
 
     class Meta:
-        indexes = [models.Index(fields=["paid_at"])]
+        indexes = [
+            models.Index(fields=["paid_at"]),
+            models.Index(fields=["paid_at", "received_by"]),
+        ]
         verbose_name = "Thanh toán"
         verbose_name_plural = "Thanh toán"
 
     def __str__(self):
         return f"{self.get_method_display()} - {self.amount}"
+
+
+class TableState(models.Model):
+    """
+    Trạng thái hiện tại của 1 bàn (denormalized, app_order.tables.sync_tables): cập nhật khi
+    đơn tại bàn mở / đóng / đổi bàn / sửa món. Sơ đồ bàn đọc bảng này kèm DiningTable, không
+    quét đơn đang mở theo từng bàn.
+    """
+    table = models.OneToOneField(DiningTable, on_delete=models.CASCADE, primary_key=True,
+                                 related_name="state", verbose_name="Bàn")
+    current_order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, blank=True,
+                                      related_name="+", verbose_name="Đơn đang mở")
+    open_orders = models.PositiveSmallIntegerField("Số đơn đang mở", default=0)
+    seated_at = models.DateTimeField("Vào bàn lúc", null=True, blank=True)
+    running_total = models.DecimalField("Tạm tính", max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField("Cập nhật", auto_now=True)
+
+    class Meta:
+        verbose_name = "Trạng thái bàn"
+        verbose_name_plural = "Trạng thái bàn"
+
+    def __str__(self):
+        return f"{self.table_id}: {self.open_orders} đơn"
+
+
+class DailyClosing(models.Model):
+    """
+    Báo cáo chốt ngày (Z-report). Ghi 1 lần khi chốt, sau đó không sửa/xoá:
+    xem lại báo cáo cũ chỉ đọc 1 dòng theo business_date (unique).
+    """
+    business_date = models.DateField("Ngày kinh doanh", unique=True)
+    order_count = models.PositiveIntegerField("Số đơn", default=0)
+    cancelled_count = models.PositiveIntegerField("Số đơn hủy", default=0)
+    cancelled_amount = models.DecimalField("Giá trị đơn hủy", max_digits=16, decimal_places=2, default=0)
+    items_sold = models.PositiveIntegerField("Số món bán ra", default=0)
+    gross_sales = models.DecimalField("Tổng thu", max_digits=16, decimal_places=2, default=0)
+    refunds = models.DecimalField("Tổng hoàn tiền", max_digits=16, decimal_places=2, default=0)
+    net_sales = models.DecimalField("Thực thu", max_digits=16, decimal_places=2, default=0)
+    # {"cash": {"count": 3, "amount": "...", "refund": "..."}, ...}
+    by_method = models.JSONField("Theo phương thức", default=dict)
+    # {"dine_in": {"count": 10, "amount": "..."}, ...} – không tính đơn hủy
+    by_order_type = models.JSONField("Theo hình thức", default=dict)
+    closed_at = models.DateTimeField("Chốt lúc", auto_now_add=True)
+    closed_by = models.ForeignKey("app_hr.StaffProfile", on_delete=models.SET_NULL, null=True, blank=True,
+                                  related_name="+", verbose_name="Người chốt")
+
+    class Meta:
+        ordering = ("-business_date",)
+        verbose_name = "Chốt ngày (Z-report)"
+        verbose_name_plural = "Chốt ngày (Z-report)"
+
+    def __str__(self):
+        return f"Z-report {self.business_date:%d/%m/%Y}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValidationError("Báo cáo chốt ngày đã ghi không được sửa.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValidationError("Báo cáo chốt ngày đã ghi không được xoá.")
+
+
+# số tiền có dấu: hoàn tiền là âm -> Sum(SIGNED_AMOUNT) = doanh thu thực thu
+SIGNED_AMOUNT = Case(
+    When(kind=Payment.Kind.REFUND, then=-F("amount")),
+    default=F("amount"),
+    output_field=models.DecimalField(max_digits=14, decimal_places=2),
+)
@@ -2,12 +2,18 @@ from decimal import Decimal
 from collections import defaultdict
 
 from django.db import transaction
+from django.db.models import Prefetch
 from django.utils import timezone
 from rest_framework import serializers
 
-from app_order.models import Order, OrderItem
+from app_order.models import DailyClosing, Order, OrderItem, Payment
+from app_order.services import cancel_stock
 from app_menu.models import MenuItem, RecipeItem
 from app_inventory.models import Ingredient
+from app_inventory.services import consume_fifo
+from app_home.models import DiningTable
+from app_home.rows import RowBuilder
+from app_home.serializers import DynamicFieldsMixin, request_staff_id
 
 
 # -------- OrderItem serializers --------
@@ -34,7 +40,7 @@ class OrderItemWriteSerializer(serializers.ModelSerializer):
         return v
 
 
-class OrderItemReadSerializer(serializers.ModelSerializer):
+class OrderItemReadSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Dùng cho đọc – show đủ thông tin snapshot.
     """
@@ -44,10 +50,30 @@ class OrderItemReadSerializer(serializers.ModelSerializer):
         model = OrderItem
         fields = ("id", "menu_item", "menu_item_name", "name", "unit_price", "quantity", "total")
 
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        if "menu_item_name" in fields:
+            queryset = queryset.select_related("menu_item")
+        return queryset
+
+
+class OrderItemRows(RowBuilder):
+    """Bản đọc nhanh của OrderItemReadSerializer (dựng từ .values_list)."""
+    model = OrderItem
+    fields = (
+        "id",
+        ("menu_item", "menu_item_id"),
+        ("menu_item_name", "menu_item__name"),
+        "name",
+        "unit_price",
+        "quantity",
+        "total",
+    )
+
 
 # -------- Order serializer with stock check --------
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     # Ghi: nhận mảng items (ghi)
     items = OrderItemWriteSerializer(many=True, write_only=True)
     # Đọc: trả mảng items (đọc)
@@ -64,6 +90,7 @@ class OrderSerializer(serializers.ModelSerializer):
             "table",
             "order_status",
             "payment_status",
+            "handled_by",
             "created_at",
             "completed_at",
             "notes",
@@ -71,15 +98,34 @@ class OrderSerializer(serializers.ModelSerializer):
             "items_detail",  # read-only
             "subtotal",
             "total",
+            "total_amount",
+            "amount_paid",
         )
-        read_only_fields = ("created_at", "completed_at", "subtotal", "total")
+        # payment_status do app_order.services cập nhật theo Payment, không sửa tay
+        read_only_fields = ("payment_status", "created_at", "completed_at", "subtotal", "total",
+                            "total_amount", "amount_paid")
+        extra_kwargs = {
+            "handled_by": {"help_text": "Nhân viên phụ trách (mặc định: nhân sự của người đang đăng nhập)"},
+        }
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        if "items_detail" in fields:
+            items = OrderItemReadSerializer.optimize_queryset(
+                OrderItem.objects.all(), set(OrderItemReadSerializer.Meta.fields)
+            )
+            queryset = queryset.prefetch_related(Prefetch("items", queryset=items))
+        return queryset
+
+    def _request_staff_id(self):
+        return request_staff_id(self.context.get("request"))
 
     # ---- STOCK CHECK (aggregate toàn đơn) ----
     def _check_stock_for_items(self, items_data):
         """
         Gom nhu cầu Ingredient từ tất cả món/quantity trong đơn,
         so với tồn kho hiện tại (Ingredient.current_stock).
-        Raise ValidationError nếu thiếu.
+        Raise ValidationError nếu thiếu, ngược lại trả về nhu cầu {ingredient_id: qty}.
         """
         # 1) Collect menu_item_ids & quantity
         menu_qty = defaultdict(int)
@@ -110,7 +156,7 @@ class OrderSerializer(serializers.ModelSerializer):
 
         if not needs:
             # Món chưa có BOM coi như không tốn nguyên liệu -> cho qua
-            return
+            return needs
 
         # 4) Khóa hàng tồn để kiểm tra an toàn (giảm race condition)
         #    Lưu ý: chỉ LOCK rows Ingredient, không lock Lots; vẫn đủ "best effort".
@@ -138,6 +184,7 @@ class OrderSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError({
                     "items": "Thiếu nguyên liệu cho đơn hàng: " + "; ".join(lack_msgs)
                 })
+        return needs
 
     def validate(self, attrs):
         """
@@ -151,12 +198,17 @@ class OrderSerializer(serializers.ModelSerializer):
 
         # Check tồn kho toàn đơn
         # (Gọi trước khi ghi DB; có select_for_update bên trong)
-        self._check_stock_for_items(items_data)
+        needs = self._check_stock_for_items(items_data)
+
+        # ghi nhận nhân viên phụ trách để tính hiệu suất (app_hr.services)
+        if "handled_by" not in validated_data:
+            validated_data["handled_by_id"] = self._request_staff_id()
 
         # Tạo Order
         order: Order = Order.objects.create(**validated_data)
 
         # Tạo từng OrderItem với snapshot giá/tên
+        total_amount = Decimal("0")
         for it in items_data:
             menu_item: MenuItem = it["menu_item"]
             qty = int(it.get("quantity") or 0)
@@ -168,7 +220,7 @@ class OrderSerializer(serializers.ModelSerializer):
 
             name = it.get("name") or menu_item.name
 
-            OrderItem.objects.create(
+            item = OrderItem.objects.create(
                 order=order,
                 menu_item=menu_item,
                 name=name,
@@ -176,7 +228,13 @@ class OrderSerializer(serializers.ModelSerializer):
                 quantity=qty,
                 total=Decimal(unit_price) * Decimal(qty),
             )
+            total_amount += item.total
+
+        order.total_amount = total_amount
+        order.save(update_fields=["total_amount"])
 
+        # Xuất kho FIFO theo lô -> ghi nhận giá vốn (COGS)
+        consume_fifo(needs, order=order)
         return order
 
     @transaction.atomic
@@ -186,9 +244,13 @@ class OrderSerializer(serializers.ModelSerializer):
         Ở đây demo update các trường đơn, không sửa items (tránh rắc rối).
         Nếu cần chỉnh items, nên implement endpoint chuyên dụng (PUT/PATCH items) + check stock.
         """
+        was_cancelled = instance.order_status == Order.OrderStatus.CANCELLED
+        if was_cancelled and validated_data.get("order_status", instance.order_status) != instance.order_status:
+            raise serializers.ValidationError({"order_status": "Đơn đã hủy không mở lại được."})
+
         for field in [
             "customer_name", "customer_phone", "order_type", "table",
-            "order_status", "payment_status", "notes"
+            "order_status", "handled_by", "notes"
         ]:
             if field in validated_data:
                 setattr(instance, field, validated_data[field])
@@ -196,6 +258,115 @@ class OrderSerializer(serializers.ModelSerializer):
         # auto set completed_at nếu chuyển trạng thái hoàn tất
         if instance.order_status == Order.OrderStatus.COMPLETED and not instance.completed_at:
             instance.completed_at = timezone.now()
+            if instance.handled_by_id is None:
+                instance.handled_by_id = self._request_staff_id()
 
         instance.save()
+        if instance.order_status == Order.OrderStatus.CANCELLED and not was_cancelled:
+            # hủy đơn -> trả lại lô phần nguyên liệu đã xuất (tồn kho, giá trị tồn, COGS)
+            cancel_stock(instance.pk)
         return instance
+
+
+# -------- Payment serializers --------
+
+class PaymentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    order_number = serializers.CharField(source="order.order_number", read_only=True)
+
+    class Meta:
+        model = Payment
+        fields = ("id", "order", "order_number", "kind", "method", "amount", "paid_at", "received_by", "note")
+        read_only_fields = fields
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        if "order_number" in fields:
+            queryset = queryset.select_related("order")
+        return queryset
+
+
+class OrderPaymentStateSerializer(serializers.ModelSerializer):
+    """Trạng thái thanh toán của đơn trả về sau khi thu / hoàn tiền."""
+    order = serializers.IntegerField(source="pk", read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ("order", "total_amount", "amount_paid", "payment_status")
+        read_only_fields = fields
+
+
+class PaymentPartSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=Payment.Method.choices)
+    amount = serializers.DecimalField(max_digits=14, decimal_places=2, min_value=Decimal("0.01"))
+    note = serializers.CharField(max_length=255, required=False, allow_blank=True, default="")
+
+
+class PayOrderSerializer(serializers.Serializer):
+    """1 hoặc nhiều phần thanh toán (chia hoá đơn) ghi trong cùng 1 giao dịch."""
+    payments = PaymentPartSerializer(many=True, allow_empty=False)
+
+
+class RefundSerializer(PaymentPartSerializer):
+    pass
+
+
+# -------- Chuyển bàn / gộp / tách đơn --------
+
+class MoveOrderSerializer(serializers.Serializer):
+    table = serializers.PrimaryKeyRelatedField(queryset=DiningTable.objects.all(), help_text="Bàn chuyển tới")
+
+
+class MergeOrdersSerializer(serializers.Serializer):
+    orders = serializers.ListField(child=serializers.IntegerField(), allow_empty=False,
+                                   help_text="Id các đơn gộp vào đơn này (bị xoá sau khi gộp)")
+
+
+class SplitLineSerializer(serializers.Serializer):
+    item = serializers.IntegerField(help_text="Id OrderItem của đơn gốc")
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class SplitPartSerializer(serializers.Serializer):
+    table = serializers.PrimaryKeyRelatedField(queryset=DiningTable.objects.all(), required=False, allow_null=True,
+                                               help_text="Mặc định: bàn của đơn gốc")
+    items = SplitLineSerializer(many=True, allow_empty=False)
+
+    def validate_table(self, table):
+        return table.pk if table else None
+
+
+class SplitOrderSerializer(serializers.Serializer):
+    parts = SplitPartSerializer(many=True, allow_empty=False)
+
+
+# -------- Z-report --------
+
+class DailyClosingSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = DailyClosing
+        fields = (
+            "id", "business_date", "order_count", "cancelled_count", "cancelled_amount", "items_sold",
+            "gross_sales", "refunds", "net_sales", "by_method", "by_order_type", "closed_at", "closed_by",
+        )
+        read_only_fields = fields
+
+
+class CloseDaySerializer(serializers.Serializer):
+    business_date = serializers.DateField(required=False, help_text="Mặc định: hôm nay")
+
+
+# -------- Sơ đồ bàn --------
+
+class TableBoardSerializer(serializers.Serializer):
+    """1 dòng của app_order.tables.board(); bàn trống: current_order = null, open_orders = 0."""
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    occupied = serializers.SerializerMethodField()
+    current_order = serializers.IntegerField(allow_null=True)
+    order_number = serializers.CharField(allow_null=True)
+    open_orders = serializers.IntegerField()
+    seated_at = serializers.DateTimeField(allow_null=True)
+    running_total = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+    def get_occupied(self, row) -> bool:
+        return bool(row["open_orders"])
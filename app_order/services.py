@@ -0,0 +1,427 @@
+# app_order/services.py
+"""
+Thanh toán đơn hàng.
+
+- Order.total_amount (tổng tiền món) và Order.amount_paid (đã thu - đã hoàn) là cột
+  denormalized: thu tiền / hoàn tiền / sửa món cập nhật thẳng các cột này, checkout và
+  KPI doanh thu không phải Sum() lại Payment theo từng đơn.
+- Mỗi lần thu/hoàn là 1 câu UPDATE có điều kiện trên dòng Order: vừa cộng amount_paid,
+  vừa đổi payment_status bằng Case, vừa chặn thu vượt / hoàn vượt (0 dòng -> lỗi).
+  Không cần khoá dòng, 2 máy thu ngân thu cùng đơn cũng không vượt tổng tiền.
+- Chuyển bàn / gộp đơn / tách đơn: chỉ dời dòng có sẵn (update/bulk_create OrderItem,
+  Payment, LotConsumption), không qua OrderItem.save() nên không kiểm tồn kho lại –
+  nguyên liệu đã xuất khi tạo đơn.
+- Chốt ngày (Z-report): số liệu 1 ngày tính bằng 3 query theo khoảng paid_at / created_at
+  (có index), ghi 1 lần vào DailyClosing; xem lại báo cáo cũ chỉ đọc 1 dòng.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DecimalField, Exists, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThanOrEqual, LessThanOrEqual
+from django.utils import timezone
+
+from app_home import caching
+from app_home.models import DiningTable
+from app_inventory.models import LotConsumption
+from app_inventory.services import (
+    consume_fifo, ensure_available, move_consumption, restore_order_stock, return_stock,
+)
+from app_menu.models import RecipeItem
+from . import tables
+from .models import SIGNED_AMOUNT, DailyClosing, Order, OrderItem, Payment
+
+ZERO = Decimal("0")
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+
+
+class PaymentError(ValueError):
+    """Thu/hoàn tiền không hợp lệ (vượt số còn phải thu, hoàn nhiều hơn đã thu...)."""
+
+
+class TransferError(ValueError):
+    """Không chuyển bàn / gộp / tách được (đơn đã đóng, món không thuộc đơn...)."""
+
+
+class ClosingError(ValueError):
+    """Không chốt được ngày (ngày trong tương lai...)."""
+
+
+def _status_after(new_paid, refund):
+    Status = Order.PaymentStatus
+    if refund:
+        # hoàn 1 phần hay toàn bộ đều là "hoàn tiền"; hoàn xong mà vẫn đủ tiền thì giữ "đã thanh toán"
+        return Case(
+            When(GreaterThanOrEqual(new_paid, F("total_amount")), then=Value(Status.PAID)),
+            default=Value(Status.REFUNDED),
+        )
+    return Case(
+        When(LessThanOrEqual(new_paid, Value(ZERO)), then=Value(Status.UNPAID)),
+        When(GreaterThanOrEqual(new_paid, F("total_amount")), then=Value(Status.PAID)),
+        default=Value(Status.PENDING),
+    )
+
+
+def _apply(order_id, delta, refund=False, guard=None):
+    new_paid = F("amount_paid") + Value(delta, output_field=MONEY)
+    qs = Order.objects.filter(pk=order_id)
+    if guard is not None:
+        qs = qs.filter(guard)
+    return qs.update(amount_paid=new_paid, payment_status=_status_after(new_paid, refund))
+
+
+@transaction.atomic
+def record_payments(order, payments, received_by_id=None, paid_at=None):
+    """
+    Thu tiền cho đơn, 1 hay nhiều phần (chia hoá đơn / nhiều phương thức):
+        payments = [{"method": "cash", "amount": Decimal(...), "note": ""}, ...]
+    Tổng không được vượt số còn phải thu. Trả danh sách Payment đã tạo.
+    """
+    total = sum((Decimal(p["amount"]) for p in payments), ZERO)
+    if not payments or total <= 0:
+        raise PaymentError("Số tiền thu phải > 0.")
+    guard = (Q(amount_paid__lte=F("total_amount") - Value(total, output_field=MONEY))
+             & ~Q(order_status=Order.OrderStatus.CANCELLED))
+    if not _apply(order.pk, total, guard=guard):
+        if Order.objects.filter(pk=order.pk, order_status=Order.OrderStatus.CANCELLED).exists():
+            raise PaymentError("Đơn đã hủy, không thu tiền được.")
+        raise PaymentError("Số tiền thu vượt quá số còn phải thanh toán của đơn.")
+
+    paid_at = paid_at or timezone.now()
+    # create từng dòng: MySQL không trả pk cho bulk_create, response cần id của Payment
+    rows = [
+        Payment.objects.create(order_id=order.pk, kind=Payment.Kind.PAYMENT, method=p["method"],
+                               amount=p["amount"], note=p.get("note", ""), received_by_id=received_by_id,
+                               paid_at=paid_at)
+        for p in payments
+    ]
+    # update() không phát post_save -> tự tăng version cho ETag / long-poll
+    caching.bump(Order)
+    return rows
+
+
+@transaction.atomic
+def refund(order, amount, method, note="", received_by_id=None):
+    """Hoàn tiền (tối đa số đã thu). Trả Payment loại hoàn tiền."""
+    amount = Decimal(amount)
+    if amount <= 0:
+        raise PaymentError("Số tiền hoàn phải > 0.")
+    if not _apply(order.pk, -amount, refund=True, guard=Q(amount_paid__gte=amount)):
+        raise PaymentError("Số tiền hoàn vượt quá số đã thu của đơn.")
+    row = Payment.objects.create(order_id=order.pk, kind=Payment.Kind.REFUND, method=method, amount=amount,
+                                 note=note, received_by_id=received_by_id)
+    caching.bump(Order, Payment)
+    return row
+
+
+# -------------------- ĐỐI SOÁT --------------------
+def _paid_subquery():
+    return Coalesce(
+        Subquery(
+            Payment.objects.filter(order=OuterRef("pk")).order_by().values("order")
+            .annotate(s=Sum(SIGNED_AMOUNT)).values("s")[:1]
+        ),
+        Value(ZERO),
+        output_field=MONEY,
+    )
+
+
+def _total_subquery():
+    return Coalesce(
+        Subquery(
+            OrderItem.objects.filter(order=OuterRef("pk")).order_by().values("order")
+            .annotate(s=Sum("total")).values("s")[:1]
+        ),
+        Value(ZERO),
+        output_field=MONEY,
+    )
+
+
+def refresh_totals(order_ids):
+    """Tính lại total_amount sau khi thêm/sửa/xoá món (1 UPDATE cho cả danh sách đơn)."""
+    order_ids = list(order_ids)
+    Order.objects.filter(pk__in=order_ids).update(total_amount=_total_subquery())
+    caching.bump(Order)
+    tables.sync_orders(order_ids)
+
+
+def reconcile(order_ids=None):
+    """
+    Tính lại total_amount, amount_paid và payment_status từ OrderItem / Payment
+    (sau khi sửa thanh toán bằng admin, hoặc backfill). order_ids=None -> mọi đơn.
+    """
+    if order_ids is not None:
+        order_ids = list(order_ids)
+    qs = Order.objects.all() if order_ids is None else Order.objects.filter(pk__in=order_ids)
+    with transaction.atomic():
+        qs.update(total_amount=_total_subquery(), amount_paid=_paid_subquery())
+        has_refund = Payment.objects.filter(order=OuterRef("pk"), kind=Payment.Kind.REFUND)
+        Status = Order.PaymentStatus
+        qs.update(payment_status=Case(
+            When(amount_paid__gte=F("total_amount"), amount_paid__gt=0, then=Value(Status.PAID)),
+            When(Exists(has_refund), then=Value(Status.REFUNDED)),
+            When(amount_paid__lte=0, then=Value(Status.UNPAID)),
+            default=Value(Status.PENDING),
+        ))
+    caching.bump(Order)
+    if order_ids is None:
+        tables.sync_tables(DiningTable.objects.values_list("pk", flat=True))
+    else:
+        tables.sync_orders(order_ids)
+
+
+# -------------------- TỒN KHO THEO MÓN --------------------
+def bom_needs(quantities):
+    """{menu_item_id: số phần} -> {ingredient_id: lượng nguyên liệu} theo công thức (1 query)."""
+    needs = defaultdict(Decimal)
+    quantities = {pk: qty for pk, qty in quantities.items() if pk is not None and qty}
+    for menu_item_id, ingredient_id, per_serving in RecipeItem.objects.filter(
+        menu_item_id__in=quantities.keys()
+    ).values_list("menu_item_id", "ingredient_id", "quantity"):
+        if per_serving and per_serving > 0:
+            needs[ingredient_id] += Decimal(per_serving) * quantities[menu_item_id]
+    return needs
+
+
+def order_quantities(order_id):
+    """{menu_item_id: tổng số phần} của đơn – chụp trước/sau khi sửa món để tính chênh lệch."""
+    return dict(
+        OrderItem.objects.filter(order_id=order_id).order_by().values("menu_item_id")
+        .annotate(q=Sum("quantity")).values_list("menu_item_id", "q")
+    )
+
+
+@transaction.atomic
+def adjust_line_stock(order_id, before, after):
+    """
+    Sửa / xoá dòng món: chỉ xuất hoặc trả phần chênh lệch nguyên liệu giữa trước và sau
+    (before/after: {menu_item_id: số phần}). Thiếu hàng cho phần tăng -> InsufficientStock.
+    """
+    old, new = bom_needs(before), bom_needs(after)
+    back = {ing: qty - new.get(ing, ZERO) for ing, qty in old.items() if qty > new.get(ing, ZERO)}
+    extra = {ing: qty - old.get(ing, ZERO) for ing, qty in new.items() if qty > old.get(ing, ZERO)}
+    return_stock(back, order_id)
+    if extra:
+        ensure_available(extra)
+        consume_fifo(extra, order=Order(pk=order_id))
+
+
+def cancel_stock(order_id):
+    """Đơn bị hủy / xoá: trả lại lô toàn bộ nguyên liệu đã xuất (gọi lại nhiều lần không sao)."""
+    restore_order_stock(order_id)
+
+
+# -------------------- CHUYỂN BÀN / GỘP / TÁCH ĐƠN --------------------
+def _lock_open(order_ids):
+    """Khoá các đơn (theo thứ tự pk, tránh deadlock) và kiểm tra còn mở."""
+    orders = {o.pk: o for o in Order.objects.select_for_update().filter(pk__in=order_ids).order_by("pk")}
+    missing = set(order_ids) - set(orders)
+    if missing:
+        raise TransferError(f"Không tìm thấy đơn: {', '.join(map(str, sorted(missing)))}.")
+    closed = [o.order_number for o in orders.values() if o.order_status not in tables.OPEN_STATUSES]
+    if closed:
+        raise TransferError(f"Đơn đã hoàn tất / hủy: {', '.join(closed)}.")
+    return orders
+
+
+@transaction.atomic
+def move_order(order, table_id):
+    """Chuyển đơn sang bàn khác (1 UPDATE)."""
+    order = _lock_open([order.pk])[order.pk]
+    if order.table_id != table_id:
+        Order.objects.filter(pk=order.pk).update(table_id=table_id)
+        caching.bump(Order)
+        tables.sync_tables([order.table_id, table_id])
+    return order.pk
+
+
+@transaction.atomic
+def merge_orders(target, source_ids):
+    """
+    Gộp các đơn nguồn vào target: dời món, thanh toán và nhật ký xuất kho sang target rồi xoá
+    đơn nguồn (không tính là đơn hủy trong Z-report). Tổng tiền / đã thu tính lại theo target.
+    """
+    source_ids = sorted(set(source_ids) - {target.pk})
+    if not source_ids:
+        raise TransferError("Chọn ít nhất 1 đơn khác để gộp.")
+    _lock_open([target.pk, *source_ids])
+    OrderItem.objects.filter(order_id__in=source_ids).update(order_id=target.pk)
+    Payment.objects.filter(order_id__in=source_ids).update(order_id=target.pk)
+    LotConsumption.objects.filter(order_id__in=source_ids).update(order_id=target.pk)
+    Order.objects.filter(pk__in=source_ids).delete()
+    caching.bump(OrderItem, Payment)
+    reconcile([target.pk])
+    return target.pk
+
+
+def _split_numbers(order_number, count):
+    taken = set(Order.objects.filter(order_number__startswith=f"{order_number}-").values_list("order_number", flat=True))
+    numbers, k = [], 1
+    while len(numbers) < count:
+        candidate = f"{order_number}-{k}"
+        if candidate not in taken:
+            numbers.append(candidate)
+        k += 1
+    return numbers
+
+
+@transaction.atomic
+def split_order(order, parts):
+    """
+    Tách món sang đơn mới, mỗi phần 1 đơn:
+        parts = [{"table": <id|None>, "items": [{"item": <OrderItem id>, "quantity": n}, ...]}, ...]
+    Tách cả dòng -> dời dòng (UPDATE); tách 1 phần số lượng -> giảm dòng gốc + tạo dòng mới.
+    Nhật ký xuất kho của phần món tách đi theo đơn mới (giá vốn từng đơn vẫn đúng).
+    Đơn gốc phải còn món và tổng còn lại không nhỏ hơn số đã thu. Trả id các đơn mới.
+    """
+    source = _lock_open([order.pk])[order.pk]
+    items = {item.pk: item for item in OrderItem.objects.filter(order_id=source.pk)}
+    left = {pk: item.quantity for pk, item in items.items()}
+    moved_total = ZERO
+    for part in parts:
+        if not part["items"]:
+            raise TransferError("Mỗi phần tách phải có ít nhất 1 món.")
+        for line in part["items"]:
+            item = items.get(line["item"])
+            if item is None:
+                raise TransferError(f"Món #{line['item']} không thuộc đơn {source.order_number}.")
+            if line["quantity"] > left[item.pk]:
+                raise TransferError(f"{item.name}: chỉ còn {left[item.pk]} để tách.")
+            left[item.pk] -= line["quantity"]
+            moved_total += item.unit_price * line["quantity"]
+    if not any(left.values()):
+        raise TransferError("Đơn gốc phải còn ít nhất 1 món; muốn dời cả đơn thì dùng chuyển bàn.")
+    if source.amount_paid > source.total_amount - moved_total:
+        raise TransferError("Đơn gốc đã thu nhiều hơn tổng tiền còn lại sau khi tách; hoàn tiền trước.")
+
+    numbers = _split_numbers(source.order_number, len(parts))
+    # create từng đơn: MySQL không trả pk cho bulk_create mà món / xuất kho cần order_id
+    new_orders = [
+        Order.objects.create(order_number=number, order_type=source.order_type,
+                             table_id=part.get("table", source.table_id), order_status=source.order_status,
+                             customer_name=source.customer_name, customer_phone=source.customer_phone,
+                             handled_by_id=source.handled_by_id, created_at=source.created_at)
+        for number, part in zip(numbers, parts)
+    ]
+
+    whole, created = {}, []
+    for new_order, part in zip(new_orders, parts):
+        servings = defaultdict(int)
+        for line in part["items"]:
+            servings[items[line["item"]].menu_item_id] += line["quantity"]
+        move_consumption(bom_needs(servings), source.pk, new_order.pk)
+        for line in part["items"]:
+            item = items[line["item"]]
+            if line["quantity"] == item.quantity:
+                whole.setdefault(new_order.pk, []).append(item.pk)
+                continue
+            created.append(OrderItem(order_id=new_order.pk, menu_item_id=item.menu_item_id, name=item.name,
+                                     unit_price=item.unit_price, quantity=line["quantity"],
+                                     total=item.unit_price * line["quantity"]))
+    for order_id, item_ids in whole.items():
+        OrderItem.objects.filter(pk__in=item_ids).update(order_id=order_id)
+
+    # dòng gốc bị tách 1 phần: giảm số lượng (tách hết qua nhiều phần -> xoá dòng)
+    moved = {pk for item_ids in whole.values() for pk in item_ids}
+    reduced = [items[pk] for pk in items if pk not in moved and left[pk] != items[pk].quantity]
+    OrderItem.objects.filter(pk__in=[item.pk for item in reduced if not left[item.pk]]).delete()
+    for item in reduced:
+        item.quantity = left[item.pk]
+        item.total = item.unit_price * item.quantity
+    OrderItem.objects.bulk_update([item for item in reduced if item.quantity], ["quantity", "total"])
+    OrderItem.objects.bulk_create(created)
+    caching.bump(OrderItem)
+    reconcile([source.pk, *(o.pk for o in new_orders)])
+    return [o.pk for o in new_orders]
+
+
+# -------------------- CHỐT NGÀY (Z-REPORT) --------------------
+def _day_range(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def _money(value):
+    return str((value or ZERO).quantize(Decimal("0.01")))
+
+
+def closing_figures(day):
+    """
+    Số liệu Z-report của 1 ngày (giờ địa phương), không ghi DB – dùng cho xem trước (X-report).
+    3 query: Payment theo khoảng paid_at, Order và OrderItem theo khoảng created_at của đơn.
+    """
+    start, end = _day_range(day)
+    cancelled = Order.OrderStatus.CANCELLED
+
+    by_method, gross, refunds = {}, ZERO, ZERO
+    payment_rows = (
+        Payment.objects.filter(paid_at__gte=start, paid_at__lt=end).order_by()
+        .values("method", "kind").annotate(n=Count("id"), s=Sum("amount"))
+    )
+    for row in payment_rows:
+        bucket = by_method.setdefault(row["method"], {"count": 0, "amount": ZERO, "refund": ZERO})
+        if row["kind"] == Payment.Kind.REFUND:
+            bucket["refund"] += row["s"]
+            refunds += row["s"]
+        else:
+            bucket["count"] += row["n"]
+            bucket["amount"] += row["s"]
+            gross += row["s"]
+
+    by_order_type, order_count, cancelled_count, cancelled_amount = {}, 0, 0, ZERO
+    order_rows = (
+        Order.objects.filter(created_at__gte=start, created_at__lt=end).order_by()
+        .values("order_type", "order_status").annotate(n=Count("id"), s=Sum("total_amount"))
+    )
+    for row in order_rows:
+        if row["order_status"] == cancelled:
+            cancelled_count += row["n"]
+            cancelled_amount += row["s"] or ZERO
+            continue
+        bucket = by_order_type.setdefault(row["order_type"], {"count": 0, "amount": ZERO})
+        bucket["count"] += row["n"]
+        bucket["amount"] += row["s"] or ZERO
+        order_count += row["n"]
+
+    items_sold = (
+        OrderItem.objects
+        .filter(order__created_at__gte=start, order__created_at__lt=end)
+        .exclude(order__order_status=cancelled)
+        .aggregate(n=Sum("quantity"))["n"]
+    ) or 0
+
+    return {
+        "business_date": day,
+        "order_count": order_count,
+        "cancelled_count": cancelled_count,
+        "cancelled_amount": cancelled_amount,
+        "items_sold": items_sold,
+        "gross_sales": gross,
+        "refunds": refunds,
+        "net_sales": gross - refunds,
+        "by_method": {key: {**v, "amount": _money(v["amount"]), "refund": _money(v["refund"])}
+                      for key, v in by_method.items()},
+        "by_order_type": {key: {**v, "amount": _money(v["amount"])} for key, v in by_order_type.items()},
+    }
+
+
+def close_day(day, closed_by_id=None):
+    """
+    Chốt ngày: (DailyClosing, đã tạo mới?). Ngày đã chốt -> trả báo cáo đã ghi, không tính lại
+    (thu / hoàn tiền phát sinh sau giờ chốt thuộc về ngày đó nhưng không làm đổi Z-report).
+    """
+    if day > timezone.localdate():
+        raise ClosingError("Không chốt được ngày trong tương lai.")
+    existing = DailyClosing.objects.filter(business_date=day).first()
+    if existing is not None:
+        return existing, False
+    try:
+        with transaction.atomic():
+            row = DailyClosing.objects.create(closed_by_id=closed_by_id, **closing_figures(day))
+    except IntegrityError:
+        # 2 máy chốt cùng lúc -> máy sau đọc bản đã ghi
+        return DailyClosing.objects.get(business_date=day), False
+    return row, True
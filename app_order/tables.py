@@ -0,0 +1,122 @@
+# app_order/tables.py
+"""
+Sơ đồ bàn: trạng thái từng bàn (đơn đang mở, giờ vào bàn, tạm tính) lưu sẵn ở TableState.
+
+- sync_tables(table_ids): tính lại trạng thái các bàn từ đơn đang mở – 1 query gom đơn +
+  INSERT IGNORE các bàn chưa có dòng + 1 câu bulk_update (không dùng update_conflicts với
+  unique_fields: MySQL không hỗ trợ). Gọi sau mọi thay đổi làm đổi đơn mở của bàn:
+    + save/xoá Order (đổi bàn, đổi trạng thái mở <-> đóng): signal connect() trong AppConfig.ready()
+    + sửa món (refresh_totals), hoặc queryset.update() đổi bàn/trạng thái: gọi trực tiếp
+- board(): mọi bàn kèm trạng thái trong 1 query (DiningTable LEFT JOIN TableState theo khoá chính).
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from app_home import caching
+from app_home.models import DiningTable
+
+from .models import Order, TableState
+
+# đơn còn giữ bàn: chưa hoàn tất / chưa hủy
+OPEN_STATUSES = (
+    Order.OrderStatus.PENDING,
+    Order.OrderStatus.PREPARING,
+    Order.OrderStatus.READY,
+)
+BOARD_FIELDS = dict(
+    current_order=F("state__current_order_id"),
+    order_number=F("state__current_order__order_number"),
+    # bàn chưa có dòng TableState (chưa từng có đơn) -> 0
+    open_orders=Coalesce(F("state__open_orders"), 0),
+    seated_at=F("state__seated_at"),
+    running_total=Coalesce(F("state__running_total"), Value(Decimal("0")),
+                           output_field=DecimalField(max_digits=14, decimal_places=2)),
+)
+
+
+def sync_tables(table_ids):
+    table_ids = {pk for pk in table_ids if pk is not None}
+    if not table_ids:
+        return
+    states = {pk: TableState(table_id=pk) for pk in table_ids}
+    orders = (
+        Order.objects.filter(table_id__in=table_ids, order_status__in=OPEN_STATUSES)
+        .order_by("created_at", "pk").values_list("table_id", "pk", "created_at", "total_amount")
+    )
+    for table_id, order_id, created_at, total in orders:
+        state = states[table_id]
+        if state.current_order_id is None:
+            state.current_order_id, state.seated_at = order_id, created_at
+        state.open_orders += 1
+        state.running_total += total
+    now = timezone.now()
+    for state in states.values():
+        state.updated_at = now
+    existing = set(TableState.objects.filter(table_id__in=table_ids).values_list("table_id", flat=True))
+    missing = [state for pk, state in states.items() if pk not in existing]
+    if missing:
+        # request khác có thể vừa chèn cùng bàn -> bỏ qua trùng, bulk_update bên dưới ghi đè giá trị
+        TableState.objects.bulk_create(missing, ignore_conflicts=True)
+    TableState.objects.bulk_update(
+        states.values(), ["current_order", "open_orders", "seated_at", "running_total", "updated_at"],
+    )
+    caching.bump(TableState)
+
+
+def sync_orders(order_ids):
+    """Tính lại bàn của các đơn (sau khi sửa món đổi tổng tiền)."""
+    sync_tables(set(
+        Order.objects.filter(pk__in=list(order_ids), table__isnull=False).values_list("table_id", flat=True)
+    ))
+
+
+def board():
+    return list(DiningTable.objects.order_by("name").values("id", "name", **BOARD_FIELDS))
+
+
+async def aboard():
+    return [row async for row in DiningTable.objects.order_by("name").values("id", "name", **BOARD_FIELDS)]
+
+
+# -------------------- SIGNAL --------------------
+def _is_open(status):
+    return status in OPEN_STATUSES
+
+
+def _before_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._table_before = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not {"table", "table_id", "order_status"} & set(update_fields):
+        return
+    instance._table_before = sender.objects.filter(pk=instance.pk).values("table_id", "order_status").first()
+
+
+def _after_save(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, "_table_before", None)
+    if old is None:
+        # đơn mới, hoặc save(update_fields=[...]) không đổi bàn/trạng thái mà đổi tổng tiền
+        if created or (update_fields is not None and "total_amount" in update_fields):
+            if instance.table_id is not None and _is_open(instance.order_status):
+                sync_tables([instance.table_id])
+        return
+    # chỉ sửa ghi chú / chuyển trạng thái trong nhóm "đang mở" -> bàn không đổi
+    if old["table_id"] == instance.table_id and _is_open(old["order_status"]) == _is_open(instance.order_status):
+        return
+    sync_tables([old["table_id"], instance.table_id])
+
+
+def _after_delete(sender, instance, **kwargs):
+    sync_tables([instance.table_id])
+
+
+def connect():
+    pre_save.connect(_before_save, sender=Order, dispatch_uid="table_state_before_save")
+    post_save.connect(_after_save, sender=Order, dispatch_uid="table_state_after_save")
+    post_delete.connect(_after_delete, sender=Order, dispatch_uid="table_state_after_delete")
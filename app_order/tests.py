@@ -1,3 +1,115 @@
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from app_home.models import DiningTable, IngredientCategory, MenuCategory, Unit
+from app_inventory.models import Ingredient, InventoryLot, LotConsumption
+from app_inventory.services import InsufficientStock, consume_fifo, consumed_by_order
+from app_menu.models import MenuItem, RecipeItem
+from app_order import services
+from app_order.models import Order, OrderItem, TableState
+
+
+class OrderStockTests(TestCase):
+    """Sửa / xoá món, hủy đơn phải xuất thêm hoặc trả lại đúng lô đã xuất."""
+
+    @classmethod
+    def setUpTestData(cls):
+        kg = Unit.objects.create(code="kg", name="Kilogram")
+        meat = IngredientCategory.objects.create(name="Thịt")
+        cls.beef = Ingredient.objects.create(name="Bò", category=meat, unit=kg)
+        cls.old_lot = InventoryLot.objects.create(ingredient=cls.beef, quantity_received=Decimal("1"),
+                                                  unit_price=Decimal("200000"))
+        cls.new_lot = InventoryLot.objects.create(ingredient=cls.beef, quantity_received=Decimal("5"),
+                                                  unit_price=Decimal("250000"))
+        soup = MenuCategory.objects.create(name="Món nước")
+        cls.pho = MenuItem.objects.create(name="Phở bò", category=soup, price=Decimal("55000"))
+        RecipeItem.objects.create(menu_item=cls.pho, ingredient=cls.beef, quantity=Decimal("0.5"))
+
+    def setUp(self):
+        self.order = Order.objects.create(order_number="HD-STOCK")
+        # 3 phần x 0.5 kg: hết lô cũ (1 kg) + 0.5 kg lô mới
+        consume_fifo({self.beef.pk: Decimal("1.5")}, order=self.order)
+
+    def remaining(self):
+        return [lot.quantity_remaining for lot in InventoryLot.objects.order_by("pk")]
+
+    def consumed(self):
+        return consumed_by_order(self.order.pk).get(self.beef.pk, Decimal("0"))
+
+    def test_lower_quantity_returns_newest_lot_first(self):
+        services.adjust_line_stock(self.order.pk, {self.pho.pk: 3}, {self.pho.pk: 1})
+        # trả 1 kg: 0.5 kg về lô mới trước, 0.5 kg về lô cũ
+        self.assertEqual(self.remaining(), [Decimal("0.5"), Decimal("5")])
+        self.assertEqual(self.consumed(), Decimal("0.5"))
+        self.assertEqual(LotConsumption.objects.get(order=self.order).total_cost, Decimal("100000.00"))
+
+    def test_raise_quantity_consumes_difference(self):
+        services.adjust_line_stock(self.order.pk, {self.pho.pk: 3}, {self.pho.pk: 5})
+        self.assertEqual(self.remaining(), [Decimal("0"), Decimal("3.5")])
+        self.assertEqual(self.consumed(), Decimal("2.5"))
+
+    def test_raise_quantity_without_stock_fails(self):
+        with self.assertRaises(InsufficientStock):
+            services.adjust_line_stock(self.order.pk, {self.pho.pk: 3}, {self.pho.pk: 13})
+        self.assertEqual(self.consumed(), Decimal("1.5"))
+
+    def test_cancel_restores_all_lots(self):
+        services.cancel_stock(self.order.pk)
+        self.assertEqual(self.remaining(), [Decimal("1"), Decimal("5")])
+        self.assertFalse(LotConsumption.objects.filter(order=self.order).exists())
+        # gọi lại không trả thêm
+        services.cancel_stock(self.order.pk)
+        self.assertEqual(self.remaining(), [Decimal("1"), Decimal("5")])
+
+    def test_delete_line_restores_stock(self):
+        item = OrderItem.objects.create(order=self.order, menu_item=self.pho, quantity=3)
+        services.adjust_line_stock(self.order.pk, {item.menu_item_id: item.quantity}, {})
+        self.assertEqual(self.consumed(), Decimal("0"))
+
+    def test_split_moves_consumption_with_items(self):
+        item = OrderItem.objects.create(order=self.order, menu_item=self.pho, quantity=3)
+        services.refresh_totals([self.order.pk])
+        self.order.refresh_from_db()
+        [new_id] = services.split_order(self.order, [{"items": [{"item": item.pk, "quantity": 1}]}])
+        self.assertEqual(consumed_by_order(new_id), {self.beef.pk: Decimal("0.5")})
+        self.assertEqual(self.consumed(), Decimal("1.0"))
+        # tồn lô không đổi khi chỉ chuyển nhật ký xuất kho
+        self.assertEqual(self.remaining(), [Decimal("0"), Decimal("4.5")])
+
+
+class TableStateSignalTests(TestCase):
+    """Save / xoá Order thật đi qua signal của app_order.tables và cập nhật TableState."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.table = DiningTable.objects.create(name="Bàn 1")
+        cls.other = DiningTable.objects.create(name="Bàn 2")
+
+    def state(self, table=None):
+        return TableState.objects.get(table=table or self.table)
+
+    def test_order_lifecycle_updates_board(self):
+        first = Order.objects.create(order_number="HD-T1", table=self.table, total_amount=Decimal("50000"))
+        state = self.state()
+        self.assertEqual((state.open_orders, state.current_order_id), (1, first.pk))
+
+        # bàn đã có dòng TableState -> nhánh cập nhật
+        second = Order.objects.create(order_number="HD-T2", table=self.table, total_amount=Decimal("30000"))
+        state = self.state()
+        self.assertEqual(state.open_orders, 2)
+        self.assertEqual(state.running_total, Decimal("80000"))
+
+        first.order_status = Order.OrderStatus.COMPLETED
+        first.save()
+        state = self.state()
+        self.assertEqual((state.open_orders, state.current_order_id), (1, second.pk))
+
+        second.table = self.other
+        second.save()
+        self.assertEqual(self.state().open_orders, 0)
+        self.assertIsNone(self.state().current_order_id)
+        self.assertEqual(self.state(self.other).current_order_id, second.pk)
+
+        second.delete()
+        self.assertEqual(self.state(self.other).open_orders, 0)
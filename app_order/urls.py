@@ -1,14 +1,20 @@
 # app_order/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from app_order.views import OrderViewSet, OrderItemViewSet
+from app_order.views import DailyClosingViewSet, OrderViewSet, OrderItemViewSet, PaymentViewSet, TableBoardViewSet
+from app_order.async_views import live_orders, live_tables
 
 app_name = "app_order"
 
 router = DefaultRouter()
 router.register(r"orders", OrderViewSet, basename="orders")
 router.register(r"order-items", OrderItemViewSet, basename="order-items")
+router.register(r"payments", PaymentViewSet, basename="payments")
+router.register(r"daily-closings", DailyClosingViewSet, basename="daily-closings")
+router.register(r"table-board", TableBoardViewSet, basename="table-board")
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("live/orders/", live_orders, name="live-orders"),
+    path("live/tables/", live_tables, name="live-tables"),
 ]
@@ -1,23 +1,59 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from django.db import transaction
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiTypes
 
-from app_order.models import Order, OrderItem
+from app_home.caching import ConditionalGetMixin
+from app_home.filters import (
+    SparseFieldsMixin, OrderingMixin, DeclarativeFilterBackend, ChoiceFilter, DateFilter, DayBoundaryFilter,
+    IntegerFilter, query_param,
+)
+from app_home.rows import FastListMixin
+from app_menu.models import MenuItem
+from app_home.models import DiningTable
+from app_order.models import DailyClosing, Order, OrderItem, Payment, TableState
+from app_inventory.services import InsufficientStock, consume_fifo
+from . import services, tables
 from .serializers import (
+    CloseDaySerializer,
+    DailyClosingSerializer,
+    MergeOrdersSerializer,
+    MoveOrderSerializer,
     OrderSerializer,
     OrderItemReadSerializer,
     OrderItemWriteSerializer,
+    OrderItemRows,
+    OrderPaymentStateSerializer,
+    PaymentSerializer,
+    PayOrderSerializer,
+    RefundSerializer,
+    SplitOrderSerializer,
+    TableBoardSerializer,
+    request_staff_id,
 )
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ConditionalGetMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     /api/orders/  – tạo đơn với items (nested)
     Validate tồn kho theo BOM trước khi tạo.
     """
-    queryset = Order.objects.all().select_related("table").prefetch_related("items", "items__menu_item")
+    queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    cache_tables = (Order, OrderItem, MenuItem,)
+
+    def get_queryset(self):
+        # ?fields= / ?omit= : bỏ items_detail thì không prefetch items
+        return self.optimize_queryset(super().get_queryset())
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            # nguyên liệu đã xuất cho đơn quay lại lô trước khi xoá đơn
+            services.cancel_stock(instance.pk)
+            instance.delete()
 
     # Optional: endpoint kiểm tra nhanh tồn kho trước khi tạo (dry-run)
     @action(detail=False, methods=["post"], url_path="check-stock")
@@ -48,13 +84,101 @@ class OrderViewSet(viewsets.ModelViewSet):
                 return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+    def _payment_response(self, order, rows):
+        order.refresh_from_db(fields=["amount_paid", "payment_status", "total_amount"])
+        return Response({
+            **OrderPaymentStateSerializer(order).data,
+            "payments": PaymentSerializer(rows, many=True).data,
+        }, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        summary="Thu tiền đơn (1 hoặc nhiều phần – chia hoá đơn)",
+        description="Tổng các phần không được vượt số còn phải thu; payment_status tự chuyển "
+                    "unpaid -> pending (thu 1 phần) -> paid.",
+        request=PayOrderSerializer,
+        responses={201: OrderPaymentStateSerializer},
+    )
+    @action(detail=True, methods=["post"], url_path="pay")
+    def pay(self, request, pk=None):
+        order = self.get_object()
+        data = PayOrderSerializer(data=request.data)
+        data.is_valid(raise_exception=True)
+        try:
+            rows = services.record_payments(order, data.validated_data["payments"],
+                                            received_by_id=request_staff_id(request))
+        except services.PaymentError as exc:
+            raise ValidationError({"detail": str(exc)})
+        return self._payment_response(order, rows)
+
+    @extend_schema(summary="Hoàn tiền đơn", description="Tối đa số đã thu; payment_status -> refunded.",
+                   request=RefundSerializer, responses={201: OrderPaymentStateSerializer})
+    @action(detail=True, methods=["post"], url_path="refund")
+    def refund(self, request, pk=None):
+        order = self.get_object()
+        data = RefundSerializer(data=request.data)
+        data.is_valid(raise_exception=True)
+        try:
+            row = services.refund(order, received_by_id=request_staff_id(request), **data.validated_data)
+        except services.PaymentError as exc:
+            raise ValidationError({"detail": str(exc)})
+        return self._payment_response(order, [row])
+
+    def _transfer(self, operation, *args):
+        try:
+            result = operation(*args)
+        except services.TransferError as exc:
+            raise ValidationError({"detail": str(exc)})
+        ids = result if isinstance(result, list) else [result]
+        orders = self.optimize_queryset(Order.objects.filter(pk__in=ids).order_by("pk"))
+        return OrderSerializer(orders, many=True, context=self.get_serializer_context()).data
+
+    @extend_schema(summary="Chuyển đơn sang bàn khác", request=MoveOrderSerializer, responses={200: OrderSerializer})
+    @action(detail=True, methods=["post"], url_path="move")
+    def move(self, request, pk=None):
+        data = MoveOrderSerializer(data=request.data)
+        data.is_valid(raise_exception=True)
+        return Response(self._transfer(services.move_order, self.get_object(), data.validated_data["table"].pk)[0])
+
+    @extend_schema(
+        summary="Gộp đơn",
+        description="Dời món, thanh toán của các đơn trong `orders` vào đơn này rồi xoá các đơn đó. "
+                    "Không kiểm tồn kho lại.",
+        request=MergeOrdersSerializer,
+        responses={200: OrderSerializer},
+    )
+    @action(detail=True, methods=["post"], url_path="merge")
+    def merge(self, request, pk=None):
+        data = MergeOrdersSerializer(data=request.data)
+        data.is_valid(raise_exception=True)
+        return Response(self._transfer(services.merge_orders, self.get_object(), data.validated_data["orders"])[0])
+
+    @extend_schema(
+        summary="Tách đơn",
+        description="Mỗi phần trong `parts` thành 1 đơn mới (mã <mã gốc>-1, -2...), tách cả dòng hoặc 1 phần "
+                    "số lượng. Không kiểm tồn kho lại. Trả danh sách đơn mới.",
+        request=SplitOrderSerializer,
+        responses={201: OrderSerializer(many=True)},
+    )
+    @action(detail=True, methods=["post"], url_path="split")
+    def split(self, request, pk=None):
+        data = SplitOrderSerializer(data=request.data)
+        data.is_valid(raise_exception=True)
+        return Response(self._transfer(services.split_order, self.get_object(), data.validated_data["parts"]),
+                        status=status.HTTP_201_CREATED)
 
-class OrderItemViewSet(viewsets.ModelViewSet):
+
+class OrderItemViewSet(ConditionalGetMixin, FastListMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     Cho phép xem danh sách items hoặc thêm từng item vào đơn (nếu bạn muốn).
     Khi tạo lẻ 1 item, cũng validate tồn kho (dựa trên BOM).
     """
-    queryset = OrderItem.objects.all().select_related("order", "menu_item")
+    queryset = OrderItem.objects.all()
+    cache_tables = (OrderItem, MenuItem)
+    row_builder = OrderItemRows
+
+    def get_queryset(self):
+        return self.optimize_queryset(super().get_queryset())
+
     # Auto chọn serializer theo action: write vs read
     def get_serializer_class(self):
         if self.action in ["create", "update", "partial_update"]:
@@ -67,8 +191,145 @@ class OrderItemViewSet(viewsets.ModelViewSet):
         """
         item_data = serializer.validated_data
         fake_order_serializer = OrderSerializer()
-        fake_order_serializer._check_stock_for_items([item_data])
-        serializer.save(
-            total=(item_data.get("unit_price") or item_data["menu_item"].price) * item_data["quantity"],
-            name=item_data.get("name") or item_data["menu_item"].name,
-        )
+        with transaction.atomic():
+            needs = fake_order_serializer._check_stock_for_items([item_data])
+            item = serializer.save(
+                total=(item_data.get("unit_price") or item_data["menu_item"].price) * item_data["quantity"],
+                name=item_data.get("name") or item_data["menu_item"].name,
+            )
+            consume_fifo(needs, order=item.order)
+            services.refresh_totals([item.order_id])
+
+    def perform_update(self, serializer):
+        before = {serializer.instance.menu_item_id: serializer.instance.quantity}
+        with transaction.atomic():
+            item = serializer.save()
+            # chỉ xuất thêm / trả lại phần chênh lệch nguyên liệu so với trước khi sửa
+            try:
+                services.adjust_line_stock(item.order_id, before, {item.menu_item_id: item.quantity})
+            except InsufficientStock as exc:
+                raise ValidationError({"quantity": str(exc)})
+            services.refresh_totals([item.order_id])
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            order_id = instance.order_id
+            services.adjust_line_stock(order_id, {instance.menu_item_id: instance.quantity}, {})
+            instance.delete()
+            services.refresh_totals([order_id])
+
+
+@extend_schema(tags=["app_order"])
+@extend_schema_view(
+    list=extend_schema(
+        summary="Lịch sử thu / hoàn tiền",
+        parameters=[
+            OpenApiParameter("date_from", OpenApiTypes.DATE, OpenApiParameter.QUERY, description="paid_at từ ngày"),
+            OpenApiParameter("date_to", OpenApiTypes.DATE, OpenApiParameter.QUERY, description="paid_at đến ngày"),
+            OpenApiParameter("order", OpenApiTypes.INT, OpenApiParameter.QUERY, description="Lọc theo id đơn"),
+            OpenApiParameter("method", OpenApiTypes.STR, OpenApiParameter.QUERY,
+                             description=f"Lọc theo phương thức: {', '.join(m for m, _ in Payment.Method.choices)}"),
+            OpenApiParameter("kind", OpenApiTypes.STR, OpenApiParameter.QUERY, description="payment / refund"),
+        ],
+    ),
+    retrieve=extend_schema(summary="Chi tiết thu / hoàn tiền"),
+)
+class PaymentViewSet(ConditionalGetMixin, SparseFieldsMixin, OrderingMixin, viewsets.ReadOnlyModelViewSet):
+    """Chỉ đọc: ghi qua /orders/{id}/pay/ và /orders/{id}/refund/ để amount_paid / payment_status luôn khớp."""
+    serializer_class = PaymentSerializer
+    filter_backends = [DeclarativeFilterBackend]
+    cache_tables = (Payment, Order)
+    ordering_fields = {"paid_at": ("paid_at",)}
+    default_ordering = ("-paid_at",)
+    query_filters = {
+        # khoảng ngày -> khoảng paid_at theo giờ địa phương (dùng được index paid_at)
+        "date_from": DayBoundaryFilter("paid_at"),
+        "date_to": DayBoundaryFilter("paid_at", upper=True),
+        "order": IntegerFilter("order_id"),
+        "method": ChoiceFilter("method", Payment.Method.choices),
+        "kind": ChoiceFilter("kind", Payment.Kind.choices),
+    }
+
+    def get_queryset(self):
+        return self.order_queryset(self.optimize_queryset(Payment.objects.all()))
+
+
+@extend_schema(tags=["app_order"])
+@extend_schema_view(
+    list=extend_schema(
+        summary="Danh sách Z-report đã chốt",
+        parameters=[
+            OpenApiParameter("date_from", OpenApiTypes.DATE, OpenApiParameter.QUERY, description="Từ ngày"),
+            OpenApiParameter("date_to", OpenApiTypes.DATE, OpenApiParameter.QUERY, description="Đến ngày"),
+        ],
+    ),
+    retrieve=extend_schema(summary="Z-report theo ngày (YYYY-MM-DD)"),
+)
+class DailyClosingViewSet(ConditionalGetMixin, SparseFieldsMixin, OrderingMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Báo cáo chốt ngày. Báo cáo đã chốt đọc thẳng từ bảng DailyClosing (/daily-closings/2025-01-31/),
+    không tính lại từ Payment / Order.
+    """
+    serializer_class = DailyClosingSerializer
+    filter_backends = [DeclarativeFilterBackend]
+    cache_tables = (DailyClosing,)
+    lookup_field = "business_date"
+    lookup_value_regex = r"\d{4}-\d{2}-\d{2}"
+    ordering_fields = {"business_date": ("business_date",)}
+    default_ordering = ("-business_date",)
+    query_filters = {
+        "date_from": DateFilter("business_date", "gte"),
+        "date_to": DateFilter("business_date", "lte"),
+    }
+
+    def get_queryset(self):
+        return self.order_queryset(self.optimize_queryset(DailyClosing.objects.all()))
+
+    @extend_schema(
+        summary="Chốt ngày",
+        description="Tính và ghi Z-report (201). Ngày đã chốt -> trả báo cáo đã ghi (200), không tính lại.",
+        request=CloseDaySerializer,
+        responses={200: DailyClosingSerializer, 201: DailyClosingSerializer},
+    )
+    @action(detail=False, methods=["post"], url_path="close")
+    def close(self, request):
+        data = CloseDaySerializer(data=request.data)
+        data.is_valid(raise_exception=True)
+        day = data.validated_data.get("business_date") or timezone.localdate()
+        try:
+            row, created = services.close_day(day, closed_by_id=request_staff_id(request))
+        except services.ClosingError as exc:
+            raise ValidationError({"business_date": str(exc)})
+        return Response(DailyClosingSerializer(row).data,
+                        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    @extend_schema(
+        summary="Xem trước số liệu ngày (X-report, không chốt)",
+        parameters=[OpenApiParameter("date", OpenApiTypes.DATE, OpenApiParameter.QUERY, description="Mặc định: hôm nay")],
+        responses={200: DailyClosingSerializer},
+    )
+    @action(detail=False, methods=["get"], url_path="preview")
+    def preview(self, request):
+        day = query_param(request.query_params, "date", DateFilter("business_date"), timezone.localdate())
+        return Response(DailyClosingSerializer(DailyClosing(**services.closing_figures(day))).data)
+
+
+@extend_schema(tags=["app_order"])
+@extend_schema_view(
+    list=extend_schema(
+        summary="Sơ đồ bàn",
+        description="Mọi bàn kèm đơn đang mở, giờ vào bàn, tạm tính (1 query). Hỗ trợ ETag -> 304 khi "
+                    "không bàn nào đổi; muốn nhận đẩy thay đổi dùng long-poll /live/tables/.",
+    ),
+)
+class TableBoardViewSet(ConditionalGetMixin, viewsets.GenericViewSet):
+    serializer_class = TableBoardSerializer
+    pagination_class = None
+    # order_number không đổi sau khi tạo đơn -> chỉ phụ thuộc 2 bảng này
+    cache_tables = (DiningTable, TableState)
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(self._list, request, *args, **kwargs)
+
+    def _list(self, request, *args, **kwargs):
+        return Response(TableBoardSerializer(tables.board(), many=True).data)
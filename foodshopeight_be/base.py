@@ -59,6 +59,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",  # put it at the very top
     "middleware.disable_csrf.DisableCSRFMiddleware",  # 👈 Thêm dòng này
+    "middleware.compression.ApiCompressionMiddleware",  # nén JSON /api/ (gzip/brotli), đứng trước để nén response cuối
 
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -67,6 +68,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    "middleware.db_routing.ReplicaRoutingMiddleware",  # GET -> replica, sau khi ghi -> primary
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -89,6 +91,21 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'foodshopeight_be.wsgi.application'
+ASGI_APPLICATION = 'foodshopeight_be.asgi.application'
+
+# Đọc từ replica (nếu dev.py/prod.py khai báo DATABASES["replica"])
+DATABASE_ROUTERS = ["foodshopeight_be.db.routing.ReplicaRouter"]
+REPLICA_DATABASE_ALIAS = "replica"
+# Sau khi client ghi, đọc từ primary trong N giây (read-your-writes)
+DB_STICKY_SECONDS = env.int("DB_STICKY_SECONDS", default=10)
+
+# Nén response /api/ (middleware.compression); mức nén xem: python manage.py bench_compression
+API_COMPRESSION_MIN_SIZE = env.int("API_COMPRESSION_MIN_SIZE", default=1024)
+API_COMPRESSION_GZIP_LEVEL = env.int("API_COMPRESSION_GZIP_LEVEL", default=6)
+API_COMPRESSION_BROTLI_QUALITY = env.int("API_COMPRESSION_BROTLI_QUALITY", default=4)
+
+# JWT không query user: nạp lại danh sách user bị thu hồi/khóa sau N giây (app_home/authentication.py)
+JWT_REVOCATION_TTL = env.int("JWT_REVOCATION_TTL", default=30)
 
 
 
@@ -124,6 +141,13 @@ USE_I18N = True
 USE_TZ = True
 
 
+# Cache – dùng chung giữa các worker khi có Redis (CACHE_URL=redis://host:6379/1),
+# mặc định LocMem cho dev.
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 STATIC_URL = '/static/'
@@ -131,6 +155,19 @@ MEDIA_URL = '/media/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static_root')
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+# collectstatic: tên có hash + bản .gz/.br nén sẵn (app_home.fileserve.serve_static chọn theo Accept-Encoding)
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "app_home.staticstorage.CompressedManifestStaticFilesStorage"},
+}
+# media: nginx gửi file qua X-Accel-Redirect (location internal trỏ MEDIA_ROOT), rỗng -> Django tự gửi
+MEDIA_ACCEL_REDIRECT = env("MEDIA_ACCEL_REDIRECT", default="")
+MEDIA_CACHE_SECONDS = env.int("MEDIA_CACHE_SECONDS", default=3600)
+# phiếu lương PDF/CSV: thư mục riêng ngoài MEDIA_ROOT, chỉ tải qua API có kiểm tra quyền
+PAYROLL_ROOT = env("PAYROLL_ROOT", default=os.path.join(BASE_DIR, 'private', 'payroll'))
+# lương = lương cơ bản * giờ làm / giờ chuẩn (tối đa giờ chuẩn) + giờ vượt * đơn giá giờ * hệ số tăng ca
+PAYROLL_STANDARD_HOURS = env.int("PAYROLL_STANDARD_HOURS", default=208)
+PAYROLL_OVERTIME_RATE = env.float("PAYROLL_OVERTIME_RATE", default=1.5)
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -144,9 +181,14 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # đọc quyền từ claim của token, không query user mỗi request (app_home/authentication.py)
+        'app_home.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': (
+        'app_home.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
 SIMPLE_JWT = {
@@ -170,13 +212,13 @@ SIMPLE_JWT = {
     "USER_AUTHENTICATION_RULE": "rest_framework_simplejwt.authentication.default_user_authentication_rule",
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
     "TOKEN_TYPE_CLAIM": "token_type",
-    "TOKEN_USER_CLASS": "rest_framework_simplejwt.models.TokenUser",
+    "TOKEN_USER_CLASS": "app_home.authentication.StaffTokenUser",
     "JTI_CLAIM": "jti",
     "SLIDING_TOKEN_REFRESH_EXP_CLAIM": "refresh_exp",
     "SLIDING_TOKEN_LIFETIME": timedelta(days=3),
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=7),
-    "TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainPairSerializer",
-    "TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSerializer",
+    "TOKEN_OBTAIN_SERIALIZER": "app_home.serializers.CustomTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "app_home.serializers.CustomTokenRefreshSerializer",
     "TOKEN_VERIFY_SERIALIZER": "rest_framework_simplejwt.serializers.TokenVerifySerializer",
     "TOKEN_BLACKLIST_SERIALIZER": "rest_framework_simplejwt.serializers.TokenBlacklistSerializer",
     "SLIDING_TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainSlidingSerializer",
@@ -233,6 +275,8 @@ JAZZMIN_SETTINGS = {
         "app_inventory.Supplier": "fas fa-truck",
         "app_inventory.Ingredient": "fas fa-carrot",
         "app_inventory.InventoryLot": "fas fa-boxes",
+        "app_inventory.LotConsumption": "fas fa-dolly",
+        "app_inventory.InventoryValuationSnapshot": "fas fa-calculator",
     },
     "order_with_respect_to": [
         "app_home", "app_inventory", "app_menu", "app_order", "app_hr"
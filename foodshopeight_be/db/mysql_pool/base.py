@@ -0,0 +1,44 @@
+# foodshopeight_be/db/mysql_pool/base.py
+"""
+Backend MySQL có pool kết nối – dùng cho triển khai ASGI:
+
+    DATABASES["default"] = {
+        "ENGINE": "foodshopeight_be.db.mysql_pool",
+        "CONN_MAX_AGE": 0,                      # trả kết nối về pool sau mỗi request
+        "POOL": {"SIZE": 10, "RECYCLE": 1800, "TIMEOUT": 10},   # SIZE = tối đa kết nối mở / process
+        ...
+    }
+
+close() của Django (cuối request) không đóng socket mà rollback rồi trả về pool;
+kết nối lỗi (errors_occurred / không còn usable) thì đóng hẳn.
+Đã mở đủ SIZE kết nối -> request mới chờ tối đa TIMEOUT giây rồi lỗi PoolTimeout.
+"""
+from django.db.backends.mysql import base as mysql_base
+
+from ..pool import get_pool
+
+
+class DatabaseWrapper(mysql_base.DatabaseWrapper):
+    def _pool(self):
+        options = self.settings_dict.get("POOL") or {}
+        return get_pool(
+            self.alias,
+            size=int(options.get("SIZE", 5)),
+            recycle=int(options.get("RECYCLE", 1800)),
+            ping_after=int(options.get("PING_AFTER", 30)),
+            timeout=float(options.get("TIMEOUT", 10)),
+        )
+
+    def get_new_connection(self, conn_params):
+        parent = super().get_new_connection
+        return self._pool().acquire(lambda: parent(conn_params), ping=lambda conn: conn.ping())
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = self._pool()
+        with self.wrap_database_errors:
+            if self.errors_occurred and not self.is_usable():
+                pool.discard(self.connection)
+            else:
+                pool.release(self.connection, reset=lambda conn: conn.rollback())
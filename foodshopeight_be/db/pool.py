@@ -0,0 +1,140 @@
+# foodshopeight_be/db/pool.py
+"""
+Pool kết nối DB dùng chung trong 1 process (thread-safe), không phụ thuộc driver.
+
+Django chỉ có pool sẵn cho PostgreSQL. Với MySQL dưới ASGI, CONN_MAX_AGE không giúp
+được nhiều (mỗi request chạy trên thread khác nhau của sync_to_async), nên backend
+foodshopeight_be.db.mysql_pool mượn/trả kết nối qua pool này thay cho mở/đóng TCP.
+
+size là trần tổng số kết nối đang mở (idle + đang dùng) của process: hết chỗ thì
+acquire() chờ tối đa timeout giây để có kết nối được trả / đóng, quá hạn -> PoolTimeout.
+"""
+import queue
+import threading
+import time
+from collections import Counter
+
+from django.db.utils import OperationalError
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(OperationalError):
+    """Đã mở đủ size kết nối và không có kết nối nào được trả trong thời gian chờ."""
+
+
+class ConnectionPool:
+    def __init__(self, size, recycle=1800, ping_after=30, timeout=10):
+        self.size = size
+        self.recycle = recycle          # giây: kết nối sống quá lâu -> đóng, mở mới
+        self.ping_after = ping_after    # giây: nằm idle quá lâu -> ping trước khi dùng
+        self.timeout = timeout          # giây: chờ tối đa khi đã mở đủ size kết nối
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._born = {}
+        self._open = 0
+        self._lock = threading.Lock()
+        self._freed = threading.Condition(self._lock)
+        self.stats = Counter()
+
+    def acquire(self, connect, ping=None):
+        """Lấy kết nối idle còn dùng được; chưa đủ size thì connect() mở mới, đủ rồi thì chờ."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            conn = self._take_idle(ping)
+            if conn is not None:
+                return conn
+            with self._freed:
+                if self._open < self.size:
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats["timeouts"] += 1
+                    raise PoolTimeout(f"Hết kết nối trong pool (size={self.size}) sau {self.timeout}s chờ.")
+                # được đánh thức khi có kết nối trả về idle hoặc bị đóng
+                self._freed.wait(remaining)
+
+        try:
+            conn = connect()
+        except Exception:
+            with self._freed:
+                self._open -= 1
+                self._freed.notify()
+            raise
+        with self._lock:
+            self._born[id(conn)] = time.monotonic()
+        self.stats["created"] += 1
+        return conn
+
+    def _take_idle(self, ping):
+        now = time.monotonic()
+        while True:
+            try:
+                conn, released_at = self._idle.get_nowait()
+            except queue.Empty:
+                return None
+            born = self._born.get(id(conn), now)
+            if now - born > self.recycle:
+                self._discard(conn)
+                continue
+            if ping is not None and now - released_at > self.ping_after:
+                try:
+                    ping(conn)
+                except Exception:
+                    self._discard(conn)
+                    continue
+            self.stats["reused"] += 1
+            return conn
+
+    def release(self, conn, reset=None):
+        """Trả kết nối về pool; reset() (vd. rollback) lỗi hoặc pool đầy -> đóng hẳn."""
+        try:
+            if reset is not None:
+                reset(conn)
+            self._idle.put_nowait((conn, time.monotonic()))
+            self.stats["returned"] += 1
+        except Exception:
+            self._discard(conn)
+            return
+        with self._freed:
+            self._freed.notify()
+
+    def discard(self, conn):
+        self._discard(conn)
+
+    def _discard(self, conn):
+        with self._freed:
+            self._born.pop(id(conn), None)
+            self._open -= 1
+            self._freed.notify()
+        self.stats["discarded"] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def snapshot(self):
+        data = dict(self.stats)
+        data.update(size=self.size, open=self._open, idle=self._idle.qsize())
+        return data
+
+    def close_all(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(conn)
+
+
+def get_pool(alias, size, **kwargs):
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = ConnectionPool(size, **kwargs)
+        return pool
+
+
+def all_pools():
+    return dict(_pools)
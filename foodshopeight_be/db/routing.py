@@ -0,0 +1,88 @@
+# foodshopeight_be/db/routing.py
+"""
+Định tuyến đọc sang DB replica (alias settings.REPLICA_DATABASE_ALIAS, mặc định "replica").
+
+- Chỉ đọc trong phạm vi đã được đánh dấu mới đi replica:
+    + request GET/HEAD/OPTIONS (middleware.db_routing.ReplicaRoutingMiddleware),
+    + khối báo cáo: `with use_replica():` hoặc `@use_replica()` (dashboard, export...).
+- Mọi ghi đi "default". Sau khi ghi, phần còn lại của request đọc từ "default";
+  request kế tiếp của cùng client cũng đọc "default" trong DB_STICKY_SECONDS giây
+  (read-your-writes, xem middleware).
+- Đang trong transaction trên "default" -> luôn đọc "default".
+- Không cấu hình replica -> router không làm gì, mọi thứ như cũ.
+"""
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# session được đọc ở mọi request ngay sau khi đăng nhập -> không chấp nhận trễ replica
+PRIMARY_ONLY_APPS = {"sessions"}
+
+_read_from_replica = ContextVar("read_from_replica", default=False)
+_wrote = ContextVar("db_wrote", default=False)
+
+
+def replica_alias():
+    alias = getattr(settings, "REPLICA_DATABASE_ALIAS", "replica")
+    return alias if alias in settings.DATABASES else None
+
+
+class use_replica(ContextDecorator):
+    """Cho phép đọc từ replica trong khối/hàm (nếu replica đã cấu hình)."""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._tokens = []
+
+    def __enter__(self):
+        self._tokens.append((_read_from_replica.set(self.enabled), _wrote.set(False)))
+        return self
+
+    def __exit__(self, *exc):
+        read_token, wrote_token = self._tokens.pop()
+        _read_from_replica.reset(read_token)
+        _wrote.reset(wrote_token)
+        return False
+
+    def __call__(self, func):
+        if not iscoroutinefunction(func):
+            return super().__call__(func)
+
+        @wraps(func)
+        async def inner(*args, **kwargs):
+            with type(self)(self.enabled):
+                return await func(*args, **kwargs)
+        return inner
+
+
+def wrote_in_context():
+    return _wrote.get()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = replica_alias()
+        if alias is None or not _read_from_replica.get() or _wrote.get():
+            return None
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        if replica_alias() is not None and _read_from_replica.get():
+            _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replica là bản sao của default -> quan hệ giữa 2 bên luôn hợp lệ
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != replica_alias()
@@ -9,9 +9,14 @@ SECURE_SSL_REDIRECT = False
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
+# Kết nối DB:
+# - WSGI (gunicorn sync): giữ kết nối giữa các request (CONN_MAX_AGE) + health check.
+# - ASGI: đặt DB_POOL_SIZE_DEV > 0 -> dùng pool, trả kết nối về pool cuối mỗi request.
+DB_POOL_SIZE = env.int("DB_POOL_SIZE_DEV", default=0)
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'foodshopeight_be.db.mysql_pool' if DB_POOL_SIZE else 'django.db.backends.mysql',
         'NAME': env("NAME_DEV"),
         'HOST': env("HOST_DEV"),
         'PORT': env("PORT_DEV"),
@@ -21,6 +26,23 @@ DATABASES = {
             'sql_mode': 'STRICT_TRANS_TABLES',
             'charset': 'utf8mb4',
             'use_unicode': True,
-        }
+            'connect_timeout': env.int("DB_CONNECT_TIMEOUT_DEV", default=5),
+        },
+        'CONN_MAX_AGE': 0 if DB_POOL_SIZE else env.int("CONN_MAX_AGE_DEV", default=60),
+        'CONN_HEALTH_CHECKS': env.bool("CONN_HEALTH_CHECKS_DEV", default=True),
+        'POOL': {
+            'SIZE': DB_POOL_SIZE,
+            'RECYCLE': env.int("DB_POOL_RECYCLE_DEV", default=1800),
+            'TIMEOUT': env.float("DB_POOL_TIMEOUT_DEV", default=10),
+        },
     }
 }
+
+# Replica chỉ đọc (tuỳ chọn): cùng user/DB name, khác host
+if env("HOST_REPLICA_DEV", default=""):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': env("HOST_REPLICA_DEV"),
+        'PORT': env("PORT_REPLICA_DEV", default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
@@ -1,7 +1,8 @@
 from .base import *
 
-# Prod mà :>
-DEBUG = True
+# DEBUG=True làm ManifestStaticFilesStorage trả tên chưa hash -> header immutable 1 năm
+# rơi vào URL không đổi theo nội dung. Chỉ bật tạm qua DEBUG_PROD khi cần dò lỗi.
+DEBUG = env.bool("DEBUG_PROD", default=False)
 
 # Khi CHƯA có HTTPS qua Nginx/certbot thì KHÔNG redirect https
 SECURE_SSL_REDIRECT = False
@@ -12,9 +13,14 @@ ALLOWED_HOSTS = ["*"]
 CSRF_TRUSTED_ORIGINS = ['*']
 
 # DB giữ nguyên phần bạn dùng env PROD
+# Kết nối DB:
+# - WSGI (gunicorn sync): giữ kết nối giữa các request (CONN_MAX_AGE) + health check.
+# - ASGI: đặt DB_POOL_SIZE_PROD > 0 -> dùng pool, trả kết nối về pool cuối mỗi request.
+DB_POOL_SIZE = env.int("DB_POOL_SIZE_PROD", default=0)
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'foodshopeight_be.db.mysql_pool' if DB_POOL_SIZE else 'django.db.backends.mysql',
         'NAME': env("NAME_PROD"),
         'HOST': env("HOST_PROD"),
         'PORT': env("PORT_PROD"),
@@ -24,6 +30,23 @@ DATABASES = {
             'sql_mode': 'STRICT_TRANS_TABLES',
             'charset': 'utf8mb4',
             'use_unicode': True,
-        }
+            'connect_timeout': env.int("DB_CONNECT_TIMEOUT_PROD", default=5),
+        },
+        'CONN_MAX_AGE': 0 if DB_POOL_SIZE else env.int("CONN_MAX_AGE_PROD", default=300),
+        'CONN_HEALTH_CHECKS': env.bool("CONN_HEALTH_CHECKS_PROD", default=True),
+        'POOL': {
+            'SIZE': DB_POOL_SIZE,
+            'RECYCLE': env.int("DB_POOL_RECYCLE_PROD", default=1800),
+            'TIMEOUT': env.float("DB_POOL_TIMEOUT_PROD", default=10),
+        },
     }
 }
+
+# Replica chỉ đọc (tuỳ chọn): cùng user/DB name, khác host
+if env("HOST_REPLICA_PROD", default=""):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': env("HOST_REPLICA_PROD"),
+        'PORT': env("PORT_REPLICA_PROD", default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
@@ -15,19 +15,19 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
-from django.conf import settings
-from django.views.static import serve
+from django.urls import path, include, re_path
 from django.views.generic import TemplateView
 
+from app_home.fileserve import serve_media, serve_static
+
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
     TokenVerifyView,
 )
 urlpatterns = [
-    path('media/<path:path>/', serve, {'document_root': settings.MEDIA_ROOT}),
-    path('static/<path:path>/', serve, {'document_root': settings.STATIC_ROOT}),
+    re_path(r'^media/(?P<path>.+)$', serve_media),
+    re_path(r'^static/(?P<path>.+)$', serve_static),
     path('admin/', admin.site.urls),
     
     path('api-gateway/', include(('api_gateway.urls', 'api-gateway'), namespace='api-gateway')),
@@ -0,0 +1,128 @@
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # brotli là tuỳ chọn, thiếu thì chỉ nén gzip
+    brotli = None
+
+DEFAULT_CONTENT_TYPES = (
+    "application/json",
+    "application/vnd.oai.openapi",
+    "application/javascript",
+    "application/xml",
+    "text/",
+)
+_accepts_br = re.compile(r"\bbr\b(?!;\s*q=0(\.0*)?\s*(,|$))")
+_accepts_gzip = re.compile(r"\bgzip\b(?!;\s*q=0(\.0*)?\s*(,|$))")
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def accepts_gzip(request):
+    return bool(_accepts_gzip.search(request.META.get("HTTP_ACCEPT_ENCODING", "")))
+
+
+class _Compressor:
+    """Nén từng chunk và flush ngay -> client nhận dần dữ liệu của streaming response."""
+
+    def __init__(self, coding):
+        self.coding = coding
+        if coding == "br":
+            self._br = brotli.Compressor(quality=_setting("API_COMPRESSION_BROTLI_QUALITY", 4))
+        else:
+            self._zlib = zlib.compressobj(_setting("API_COMPRESSION_GZIP_LEVEL", 6), zlib.DEFLATED, 31)
+
+    def chunk(self, data):
+        if self.coding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.coding == "br":
+            return self._br.finish()
+        return self._zlib.flush()
+
+    def whole(self, data):
+        if self.coding == "br":
+            return self._br.process(data) + self._br.finish()
+        return self._zlib.compress(data) + self._zlib.flush()
+
+
+class ApiCompressionMiddleware(MiddlewareMixin):
+    """
+    Nén response JSON của API (gzip, hoặc brotli nếu client hỗ trợ và đã cài package brotli).
+
+    - Chỉ áp dụng cho đường dẫn trong API_COMPRESSION_PATHS (mặc định "/api/") và
+      content-type trong API_COMPRESSION_CONTENT_TYPES.
+    - Body nhỏ hơn API_COMPRESSION_MIN_SIZE byte (mặc định 1024) giữ nguyên: header gzip +
+      CPU không đáng so với vài trăm byte tiết kiệm.
+    - Streaming response (export CSV...) được nén từng chunk, không gom vào bộ nhớ.
+    - Mức nén: API_COMPRESSION_GZIP_LEVEL (6), API_COMPRESSION_BROTLI_QUALITY (4);
+      so sánh kích thước / CPU các mức: python manage.py bench_compression
+    - ETag (ConditionalGetMixin) được chuyển thành weak vì byte trên đường truyền đã khác.
+    """
+
+    def _eligible(self, request, response):
+        prefixes = _setting("API_COMPRESSION_PATHS", ("/api/",))
+        if not request.path.startswith(tuple(prefixes)):
+            return False
+        if response.has_header("Content-Encoding") or response.status_code in (204, 304):
+            return False
+        if "no-transform" in response.get("Cache-Control", ""):
+            return False
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        allowed = _setting("API_COMPRESSION_CONTENT_TYPES", DEFAULT_CONTENT_TYPES)
+        return any(content_type.startswith(prefix) for prefix in allowed)
+
+    def _coding(self, request):
+        accept = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        if brotli is not None and _accepts_br.search(accept):
+            return "br"
+        if accepts_gzip(request):
+            return "gzip"
+        return None
+
+    def process_response(self, request, response):
+        if not self._eligible(request, response):
+            return response
+        # cùng URL trả body khác nhau theo Accept-Encoding -> cache phải tách theo header này
+        patch_vary_headers(response, ("Accept-Encoding",))
+        coding = self._coding(request)
+        if coding is None:
+            return response
+
+        if response.streaming:
+            compressor = _Compressor(coding)
+            if response.is_async:
+                async def compressed(content=response.streaming_content):
+                    async for chunk in content:
+                        yield compressor.chunk(chunk)
+                    yield compressor.finish()
+            else:
+                def compressed(content=response.streaming_content):
+                    for chunk in content:
+                        yield compressor.chunk(chunk)
+                    yield compressor.finish()
+            response.streaming_content = compressed()
+            del response["Content-Length"]
+        else:
+            if len(response.content) < _setting("API_COMPRESSION_MIN_SIZE", 1024):
+                return response
+            packed = _Compressor(coding).whole(response.content)
+            if len(packed) >= len(response.content):
+                return response
+            response.content = packed
+            response["Content-Length"] = str(len(packed))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = coding
+        return response
@@ -0,0 +1,73 @@
+import hashlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+from foodshopeight_be.db.routing import replica_alias, use_replica, wrote_in_context
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+STICKY_COOKIE = "db_sticky"
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Request chỉ đọc -> cho phép đọc từ replica (xem foodshopeight_be/db/routing.py).
+    Client vừa ghi (POST/PUT/PATCH/DELETE hoặc có ghi trong request) -> các request sau
+    trong DB_STICKY_SECONDS giây đọc từ primary để thấy ngay dữ liệu mình vừa ghi.
+    Nhận diện client: cookie (trình duyệt/admin) hoặc header Authorization (JWT, qua cache).
+    Chạy được cả WSGI lẫn ASGI (không ép view async về thread).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _client_key(self, request):
+        auth = request.META.get("HTTP_AUTHORIZATION")
+        if not auth:
+            return None
+        return "db_sticky:" + hashlib.sha1(auth.encode()).hexdigest()
+
+    def _read_only(self, request, sticky_in_cache):
+        return request.method in SAFE_METHODS and not request.COOKIES.get(STICKY_COOKIE) and not sticky_in_cache
+
+    def _mark_sticky(self, request, response, wrote):
+        if not (wrote and response.status_code < 400):
+            return None
+        seconds = getattr(settings, "DB_STICKY_SECONDS", 10)
+        response.set_cookie(STICKY_COOKIE, "1", max_age=seconds, httponly=True, samesite="Lax")
+        return seconds
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if replica_alias() is None:
+            return self.get_response(request)
+
+        key = self._client_key(request)
+        with use_replica(self._read_only(request, bool(key and cache.get(key)))):
+            response = self.get_response(request)
+            wrote = request.method not in SAFE_METHODS or wrote_in_context()
+
+        seconds = self._mark_sticky(request, response, wrote)
+        if seconds and key:
+            cache.set(key, 1, seconds)
+        return response
+
+    async def __acall__(self, request):
+        if replica_alias() is None:
+            return await self.get_response(request)
+
+        key = self._client_key(request)
+        with use_replica(self._read_only(request, bool(key and await cache.aget(key)))):
+            response = await self.get_response(request)
+            wrote = request.method not in SAFE_METHODS or wrote_in_context()
+
+        seconds = self._mark_sticky(request, response, wrote)
+        if seconds and key:
+            await cache.aset(key, 1, seconds)
+        return response